@@ -0,0 +1,134 @@
+import time
+from dataclasses import dataclass
+from functools import lru_cache, cached_property
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import TestQuestions
+from .snapshots import Snapshot, get_snapshot
+
+ABILITY_GRID = np.linspace(-4, 4, 161)
+ADAPTIVE_MIN_QUESTIONS = 5
+ADAPTIVE_MAX_QUESTIONS = 30
+ADAPTIVE_STANDARD_ERROR = 0.3
+ADAPTIVE_SESSION_KEY = 'adaptive_test_{test_pk}'
+ITEM_BANK_CACHE_SIZE = 64
+ITEM_BANK_VERSION_CACHE_KEY = 'item_bank_version'
+
+
+@dataclass(frozen=True)
+class ItemBank:
+    """
+    Откалиброванные вопросы теста. order - таблица поиска: для каждой точки ABILITY_GRID индексы вопросов
+    по убыванию информации Фишера в этой точке, так что выбор следующего вопроса - округление оценки
+    способности до сетки и пропуск уже заданных вопросов
+    """
+    question_pks: tuple
+    difficulties: np.ndarray
+    discriminations: np.ndarray
+    order: np.ndarray
+
+    @cached_property
+    def positions(self) -> dict:
+        return {quest_pk: num for num, quest_pk in enumerate(self.question_pks)}
+
+    def probability(self, indexes: list) -> np.ndarray:
+        """
+        Вероятности правильного ответа на вопросы indexes в каждой точке сетки: матрица вопросы x сетка
+        """
+        return 1 / (1 + np.exp(
+            -self.discriminations[indexes, None] * (ABILITY_GRID - self.difficulties[indexes, None])
+        ))
+
+    def next_question(self, ability: float, asked: set):
+        """
+        pk самого информативного при данной способности из ещё не заданных вопросов, None если вопросы закончились
+        """
+        step = ABILITY_GRID[1] - ABILITY_GRID[0]
+        point = int(np.clip(round((ability - ABILITY_GRID[0]) / step), 0, len(ABILITY_GRID) - 1))
+        for num in self.order[point]:
+            if self.question_pks[num] not in asked:
+                return self.question_pks[num]
+        return None
+
+    def estimate(self, question_pks: list, correct: list) -> tuple:
+        """
+        EAP-оценка способности и её стандартная ошибка по ответам на вопросы question_pks при априорном N(0, 1).
+        В отличие от оценки максимального правдоподобия конечна и при одних правильных ответах
+        """
+        positions = self.positions
+        log_posterior = -ABILITY_GRID ** 2 / 2
+        if question_pks:
+            probability = self.probability([positions[quest_pk] for quest_pk in question_pks])
+            correct = np.array(correct, dtype=bool)[:, None]
+            log_posterior = log_posterior + np.log(np.where(correct, probability, 1 - probability)).sum(axis=0)
+        posterior = np.exp(log_posterior - log_posterior.max())
+        posterior /= posterior.sum()
+        ability = float(posterior @ ABILITY_GRID)
+        return ability, float(np.sqrt(posterior @ (ABILITY_GRID - ability) ** 2))
+
+    def expected_score(self, ability: float) -> int:
+        """
+        Ожидаемый процент правильных ответов на все вопросы теста при данной способности -
+        балл, сопоставимый с баллом обычного прохождения
+        """
+        probability = 1 / (1 + np.exp(-self.discriminations * (ability - self.difficulties)))
+        return int(probability.mean() * 100)
+
+
+def build_item_bank(question_pks: list, difficulties: list, discriminations: list) -> ItemBank:
+    """
+    Неоткалиброванные вопросы получают трудность 0 и различающую способность 1, пока их не откалибруют
+    """
+    difficulties = np.nan_to_num(np.array(difficulties, dtype=np.float64), nan=0.0)
+    discriminations = np.nan_to_num(np.array(discriminations, dtype=np.float64), nan=1.0)
+    probability = 1 / (1 + np.exp(-discriminations * (ABILITY_GRID[:, None] - difficulties)))
+    information = discriminations ** 2 * probability * (1 - probability)
+    return ItemBank(
+        question_pks=tuple(question_pks), difficulties=difficulties, discriminations=discriminations,
+        order=np.argsort(-information, axis=1, kind='stable').astype(np.int32)
+    )
+
+
+def get_item_bank_version() -> int:
+    version = cache.get(ITEM_BANK_VERSION_CACHE_KEY)
+    if version is None:
+        # Начальная версия от времени, чтобы после вытеснения счётчика не прочитать старые банки
+        cache.add(ITEM_BANK_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(ITEM_BANK_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_item_banks() -> None:
+    try:
+        cache.incr(ITEM_BANK_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(ITEM_BANK_VERSION_CACHE_KEY, time.time_ns(), None)
+
+
+@lru_cache(maxsize=ITEM_BANK_CACHE_SIZE)
+def load_item_bank(test_pk: int, version: int, bank_version: int) -> ItemBank:
+    question_pks = [quest.pk for quest in get_snapshot(test_pk, version).questions]
+    params = {
+        pk: (difficulty, discrimination) for pk, difficulty, discrimination in
+        TestQuestions.objects.filter(pk__in=question_pks).values_list('pk', 'irt_difficulty', 'irt_discrimination')
+    }
+    # Вопросы, удалённые после сборки версии, остаются в банке с параметрами по умолчанию
+    rows = [params.get(pk, (None, None)) for pk in question_pks]
+    return build_item_bank(question_pks, [row[0] for row in rows], [row[1] for row in rows])
+
+
+def get_item_bank(snapshot: Snapshot) -> ItemBank:
+    """
+    Банк вопросов версии теста из кеша процесса, без запросов к базе. Ключ - версия снимка и версия
+    банков, которую сдвигает калибровка, так что изменение вопросов и новая калибровка дают новый банк,
+    а вопросы попытки всегда есть в банке её версии
+    """
+    return load_item_bank(snapshot.test_pk, snapshot.version, get_item_bank_version())
+
+
+def is_finished(bank: ItemBank, asked: list, standard_error: float) -> bool:
+    if len(asked) >= min(ADAPTIVE_MAX_QUESTIONS, len(bank.question_pks)):
+        return True
+    return len(asked) >= ADAPTIVE_MIN_QUESTIONS and standard_error <= ADAPTIVE_STANDARD_ERROR
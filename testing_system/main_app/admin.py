@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, Tag, TestAnswers, TestQuestions, Test, TestResults
+from .models import (Category, Tag, TestAnswers, TestQuestions, Test, TestResults, TestPassedCounter, TestScoreHistogram,
+                     TestBestAttempt, CategoryBestAttempt, TestAnalytics, QuestionAnalytics, TestSnapshot,
+                     UserStatistics)
 
 
 @admin.register(Category, Tag)
@@ -22,9 +24,10 @@ class TestAnswersAdmin(admin.ModelAdmin):
 
 @admin.register(TestQuestions)
 class TestQuestionsAdmin(admin.ModelAdmin):
-    list_display = ['id', 'test', 'question', 'image']
+    list_display = ['id', 'test', 'question', 'image', 'irt_difficulty', 'irt_discrimination']
     list_display_links = ['id', 'test']
     search_fields = ['question']
+    readonly_fields = ['irt_difficulty', 'irt_discrimination', 'irt_calibrated_at']
     save_as = True
 
 
@@ -40,8 +43,69 @@ class TestAdmin(admin.ModelAdmin):
 
 @admin.register(TestResults)
 class TestResultsAdmin(admin.ModelAdmin):
-    list_display = ['id', 'test', 'user', 'score', 'completed_at']
+    list_display = ['id', 'test', 'user', 'score', 'right_count', 'completed_at']
     list_display_links = ['id', 'test']
     list_filter = ['score']
     search_fields = ['test', 'user']
+    readonly_fields = ['right_questions_list']
     save_as = True
+
+    def get_queryset(self, request):
+        return super(TestResultsAdmin, self).get_queryset(request).prefetch_related('test__questions')
+
+    @admin.display(description='Правильных ответов')
+    def right_count(self, obj):
+        return obj.right_count
+
+    @admin.display(description='Правильные ответы')
+    def right_questions_list(self, obj):
+        return ', '.join(quest.question for quest in obj.get_right_questions())
+
+
+@admin.register(TestPassedCounter)
+class TestPassedCounterAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'shard', 'count']
+    list_display_links = ['id', 'test']
+
+
+@admin.register(TestScoreHistogram)
+class TestScoreHistogramAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'shard']
+    list_display_links = ['id', 'test']
+
+
+@admin.register(TestBestAttempt)
+class TestBestAttemptAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'user', 'score', 'completed_at']
+    list_display_links = ['id', 'test']
+
+
+@admin.register(CategoryBestAttempt)
+class CategoryBestAttemptAdmin(admin.ModelAdmin):
+    list_display = ['id', 'category', 'test', 'user', 'score', 'completed_at']
+    list_display_links = ['id', 'category']
+
+
+@admin.register(TestAnalytics)
+class TestAnalyticsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'attempts', 'mean_score', 'alpha', 'computed_at']
+    list_display_links = ['id', 'test']
+
+
+@admin.register(QuestionAnalytics)
+class QuestionAnalyticsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'question', 'attempts', 'difficulty', 'discrimination', 'computed_at']
+    list_display_links = ['id', 'question']
+
+
+@admin.register(TestSnapshot)
+class TestSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'version', 'created_at']
+    list_display_links = ['id', 'test']
+    readonly_fields = ['test', 'version', 'payload', 'created_at']
+
+
+@admin.register(UserStatistics)
+class UserStatisticsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'attempts', 'best_score', 'last_activity_at']
+    list_display_links = ['id', 'user']
@@ -0,0 +1,160 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.db import transaction
+
+from .models import TestQuestions, TestResults, TestAnalytics, QuestionAnalytics
+from .snapshots import decode_attempts
+
+ANALYTICS_CHUNK_SIZE = 10000
+
+
+@dataclass
+class ItemStatistics:
+    """
+    Достаточные статистики матрицы правильности (попытки x вопросы), накапливаемые по пачкам попыток.
+    Хранятся только суммы размером с кол-во вопросов, поэтому память не зависит от кол-ва попыток.
+    Статистики вопроса считаются только по попыткам, в которых он был предъявлен: вопросы, добавленные
+    после попытки, в её версии теста отсутствуют.
+    """
+    question_count: int
+    attempts: int = 0
+    score_sum: int = 0
+    total_sum: int = 0
+    total_squares: int = 0
+    item_attempts: np.ndarray = field(default=None)
+    item_sums: np.ndarray = field(default=None)
+    item_total_sums: np.ndarray = field(default=None)
+    item_presented_sums: np.ndarray = field(default=None)
+    item_presented_squares: np.ndarray = field(default=None)
+
+    def __post_init__(self):
+        self.item_attempts = np.zeros(self.question_count, dtype=np.int64)
+        self.item_sums = np.zeros(self.question_count, dtype=np.int64)
+        self.item_total_sums = np.zeros(self.question_count, dtype=np.int64)
+        self.item_presented_sums = np.zeros(self.question_count, dtype=np.int64)
+        self.item_presented_squares = np.zeros(self.question_count, dtype=np.int64)
+
+    def update(self, correct: np.ndarray, scores: np.ndarray, presented: np.ndarray = None) -> None:
+        """
+        presented - маска предъявленных вопросов той же формы, что correct, по умолчанию предъявлены все
+        """
+        if presented is None:
+            presented = np.ones(correct.shape, dtype=bool)
+        correct = (correct & presented).astype(np.int64)
+        presented = presented.astype(np.int64)
+        totals = correct.sum(axis=1)
+        self.attempts += len(correct)
+        self.score_sum += int(scores.sum())
+        self.total_sum += int(totals.sum())
+        self.total_squares += int((totals * totals).sum())
+        self.item_attempts += presented.sum(axis=0)
+        self.item_sums += correct.sum(axis=0)
+        self.item_total_sums += totals @ correct
+        self.item_presented_sums += totals @ presented
+        self.item_presented_squares += (totals * totals) @ presented
+
+    @property
+    def mean_score(self) -> float:
+        return self.score_sum / self.attempts if self.attempts else 0.0
+
+    @property
+    def is_complete(self) -> bool:
+        """
+        Каждый вопрос предъявлен в каждой попытке
+        """
+        return bool((self.item_attempts == self.attempts).all())
+
+    @property
+    def difficulty(self) -> np.ndarray:
+        """
+        p-value вопроса: доля попыток с этим вопросом, в которых на него ответили правильно
+        """
+        return self.item_sums / np.maximum(self.item_attempts, 1)
+
+    @property
+    def total_variance(self) -> float:
+        if not self.attempts:
+            return 0.0
+        mean = self.total_sum / self.attempts
+        return self.total_squares / self.attempts - mean * mean
+
+    @property
+    def discrimination(self) -> np.ndarray:
+        """
+        Точечно-бисериальная корреляция ответа на вопрос с суммой остальных вопросов попытки
+        (без самого вопроса, иначе лёгкие короткие тесты завышают корреляцию). NaN, если дисперсия нулевая.
+        """
+        n = np.maximum(self.item_attempts, 1)
+        rest_sums = self.item_presented_sums - self.item_sums
+        rest_squares = self.item_presented_squares - 2 * self.item_total_sums + self.item_sums
+        item_rest_sums = self.item_total_sums - self.item_sums
+        p = self.difficulty
+        rest_mean = rest_sums / n
+        covariance = item_rest_sums / n - p * rest_mean
+        variance = p * (1 - p) * (rest_squares / n - rest_mean * rest_mean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(variance > 0, covariance / np.sqrt(np.maximum(variance, 0)), np.nan)
+
+    @property
+    def alpha(self) -> float:
+        """
+        Альфа Кронбаха - согласованность вопросов теста. NaN, если вопрос один, у суммы нет дисперсии
+        или не все вопросы предъявлены во всех попытках.
+        """
+        k = self.question_count
+        total_variance = self.total_variance
+        if k < 2 or total_variance <= 0 or not self.is_complete:
+            return float('nan')
+        p = self.difficulty
+        return k / (k - 1) * (1 - float((p * (1 - p)).sum()) / total_variance)
+
+
+def iter_correctness_chunks(test_pk: int, question_pks: list, chunk_size: int = ANALYTICS_CHUNK_SIZE):
+    """
+    Отдаёт матрицы правильности и предъявления попыток теста по вопросам question_pks пачками
+    по chunk_size строк вместе с баллами попыток
+    """
+    last_pk = 0
+    while True:
+        rows = list(
+            TestResults.objects.filter(test_id=test_pk, pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'score', 'test_version', 'right_questions', 'asked_questions'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        correct, presented = decode_attempts(test_pk, question_pks, [row[2:] for row in rows])
+        yield correct, presented, np.array([row[1] for row in rows])
+
+
+def analyze_test(test_pk: int, chunk_size: int = ANALYTICS_CHUNK_SIZE) -> ItemStatistics:
+    question_pks = list(TestQuestions.objects.filter(test_id=test_pk).order_by('pk').values_list('pk', flat=True))
+    statistics = ItemStatistics(question_count=len(question_pks))
+    for correct, presented, scores in iter_correctness_chunks(test_pk, question_pks, chunk_size):
+        statistics.update(correct, scores, presented)
+    save_analytics(test_pk, question_pks, statistics)
+    return statistics
+
+
+def to_nullable(value: float):
+    return None if np.isnan(value) else float(value)
+
+
+def save_analytics(test_pk: int, question_pks: list, statistics: ItemStatistics) -> None:
+    with transaction.atomic():
+        TestAnalytics.objects.update_or_create(test_id=test_pk, defaults=dict(
+            attempts=statistics.attempts, mean_score=statistics.mean_score, alpha=to_nullable(statistics.alpha)
+        ))
+        QuestionAnalytics.objects.filter(question__test_id=test_pk).delete()
+        if not statistics.attempts:
+            return
+        QuestionAnalytics.objects.bulk_create(
+            QuestionAnalytics(
+                question_id=quest_pk, attempts=int(attempts), difficulty=float(difficulty),
+                discrimination=to_nullable(discrimination)
+            ) for quest_pk, attempts, difficulty, discrimination in
+            zip(question_pks, statistics.item_attempts, statistics.difficulty, statistics.discrimination)
+            if attempts
+        )
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import Test, Tag, Category, CATALOG_FILTER
+
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_CACHE_KEY = 'main_app:autocomplete:{source}:{term}'
+AUTOCOMPLETE_CACHE_TIMEOUT = 60
+
+
+def get_author_queryset():
+    """
+    Только пользователи, у которых есть хотя бы один опубликованный тест
+    """
+    return get_user_model().objects.filter(
+        Exists(Test.objects.filter(CATALOG_FILTER, author=OuterRef('pk')))
+    )
+
+
+AUTOCOMPLETE_SOURCES = {
+    'authors': (get_author_queryset, 'username'),
+    'tags': (Tag.objects.all, 'title'),
+    'categories': (Category.objects.all, 'title'),
+}
+
+
+def normalize_term(term: str) -> str:
+    return ' '.join(term.split()).casefold()
+
+
+def find_options(source: str, term: str, limit: int = AUTOCOMPLETE_LIMIT) -> list:
+    """
+    Поиск по префиксу: UPPER(поле) LIKE 'TERM%' обслуживается функциональным индексом text_pattern_ops
+    """
+    get_queryset, field = AUTOCOMPLETE_SOURCES[source]
+    queryset = get_queryset()
+    if term:
+        queryset = queryset.filter(**{f'{field}__istartswith': term})
+    return [
+        {'id': pk, 'text': label}
+        for pk, label in queryset.order_by(field, 'pk').values_list('pk', field)[:limit]
+    ]
+
+
+def get_options(source: str, term: str) -> list:
+    term = normalize_term(term)
+    cache_key = AUTOCOMPLETE_CACHE_KEY.format(source=source, term=hashlib.md5(term.encode()).hexdigest())
+    options = cache.get(cache_key)
+    if options is None:
+        options = find_options(source, term)
+        cache.set(cache_key, options, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return options
@@ -0,0 +1,60 @@
+"""
+Битовые множества над упорядоченными ключами теста: вопросами или ответами, отсортированными по pk.
+Бит i соответствует keys[i], биты идут от старшего к младшему, как в np.packbits,
+поэтому множество из 200 элементов занимает 25 байт, а пачка множеств распаковывается в матрицу без циклов.
+"""
+import numpy as np
+
+
+def has_bit(bitset: bytes, num: int) -> bool:
+    return num >> 3 < len(bitset) and bool(bitset[num >> 3] & (0x80 >> (num & 7)))
+
+
+def encode_bitset(keys, members) -> bytes:
+    """
+    Упаковывает members в битовую карту по позициям в keys. Ключи не из keys отбрасываются.
+    """
+    members = set(members)
+    bitset = bytearray((len(keys) + 7) // 8)
+    for num, key in enumerate(keys):
+        if key in members:
+            bitset[num >> 3] |= 0x80 >> (num & 7)
+    return bytes(bitset)
+
+
+def decode_bitset(keys, bitset) -> list:
+    """
+    Возвращает элементы keys, биты которых установлены
+    """
+    bitset = bytes(bitset or b'')
+    return [key for num, key in enumerate(keys) if has_bit(bitset, num)]
+
+
+def complement_bitset(keys, bitset) -> list:
+    """
+    Возвращает элементы keys, биты которых сброшены
+    """
+    bitset = bytes(bitset or b'')
+    return [key for num, key in enumerate(keys) if not has_bit(bitset, num)]
+
+
+def count_bitset(bitset) -> int:
+    return int.from_bytes(bytes(bitset or b''), 'big').bit_count()
+
+
+def decode_bitsets(bitsets: list, size: int) -> np.ndarray:
+    """
+    Распаковывает битовые карты в булеву матрицу (множества x ключи)
+    """
+    length = (size + 7) // 8
+    packed = np.frombuffer(
+        b''.join(bytes(bitset or b'').ljust(length, b'\0')[:length] for bitset in bitsets), dtype=np.uint8
+    ).reshape(len(bitsets), length)
+    return np.unpackbits(packed, axis=1, count=size).astype(bool)
+
+
+def encode_bitsets(matrix: np.ndarray) -> list:
+    """
+    Упаковывает строки булевой матрицы (множества x ключи) в битовые карты
+    """
+    return [row.tobytes() for row in np.packbits(matrix, axis=1)]
@@ -0,0 +1,245 @@
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+from django.utils.timezone import now
+
+from .adaptive import invalidate_item_banks
+from .models import Test, TestQuestions, TestResults
+from .snapshots import decode_attempts
+
+CALIBRATION_MODELS = ('rasch', '2pl')
+CALIBRATION_MAX_ITERATIONS = 200
+CALIBRATION_TOLERANCE = 1e-4
+CALIBRATION_CHUNK_SIZE = 10000
+MAX_NEWTON_STEP = 1.0
+DISCRIMINATION_BOUNDS = (0.1, 5.0)
+
+
+@dataclass
+class Responses:
+    """
+    Ответы в длинном формате: по элементу на пару (проходящий, вопрос), на которую есть ответ
+    """
+    persons: np.ndarray
+    items: np.ndarray
+    correct: np.ndarray
+    person_count: int
+    item_count: int
+
+
+@dataclass
+class Calibration:
+    """
+    Оценки параметров. У проходящих и вопросов без конечной оценки (все ответы правильные или все
+    неправильные, нет ответов) параметры NaN и calibrated = False
+    """
+    abilities: np.ndarray
+    difficulties: np.ndarray
+    discriminations: np.ndarray
+    calibrated: np.ndarray
+    iterations: int
+    converged: bool
+
+
+def probability(abilities: np.ndarray, difficulties: np.ndarray, discriminations: np.ndarray) -> np.ndarray:
+    """
+    Вероятность правильного ответа в модели 2PL, в модели Раша все discriminations равны 1
+    """
+    return 1 / (1 + np.exp(-np.clip(discriminations * (abilities - difficulties), -30, 30)))
+
+
+def drop_extreme(responses: Responses) -> np.ndarray:
+    """
+    Маска ответов без проходящих и вопросов с одними правильными или одними неправильными ответами:
+    для них оценка максимального правдоподобия уходит в бесконечность. После исключения одних крайними
+    могут стать другие, поэтому отбор повторяется до неподвижной точки
+    """
+    keep = np.ones(len(responses.correct), dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        for index, count in ((responses.persons, responses.person_count), (responses.items, responses.item_count)):
+            totals = np.bincount(index, weights=keep, minlength=count)
+            rights = np.bincount(index, weights=keep & responses.correct, minlength=count)
+            drop = keep & ((rights == 0) | (rights == totals))[index]
+            if drop.any():
+                keep &= ~drop
+                changed = True
+    return keep
+
+
+def newton_step(gradient: np.ndarray, information: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = np.where(information > 0, gradient / information, 0)
+    return np.clip(step, -MAX_NEWTON_STEP, MAX_NEWTON_STEP)
+
+
+def calibrate(responses: Responses, model: str = 'rasch', difficulties: np.ndarray = None,
+              discriminations: np.ndarray = None, max_iterations: int = CALIBRATION_MAX_ITERATIONS,
+              tolerance: float = CALIBRATION_TOLERANCE) -> Calibration:
+    """
+    Совместное оценивание максимального правдоподобия (JML): по очереди шаг Ньютона по способностям всех
+    проходящих и по параметрам всех вопросов. Суммы по проходящим и вопросам считаются через np.bincount,
+    поэтому итерация - несколько проходов по массивам ответов без циклов Python.
+
+    Переданные difficulties/discriminations (NaN - нет оценки) служат начальным приближением и якорем шкалы:
+    среднее трудностей и логарифмов различающей способности ранее откалиброванных вопросов сохраняется,
+    так что ночные пересчёты не сдвигают шкалу и сходятся за несколько итераций.
+    Без предыдущих оценок шкала задаётся средней трудностью 0 и средним логарифмом различающей способности 0.
+    """
+    if model not in CALIBRATION_MODELS:
+        raise ValueError(f'Unknown model {model}')
+    keep = drop_extreme(responses)
+    persons, items = responses.persons[keep], responses.items[keep]
+    correct = responses.correct[keep].astype(np.float64)
+    person_totals = np.bincount(persons, minlength=responses.person_count)
+    item_totals = np.bincount(items, minlength=responses.item_count)
+    active_persons, calibrated = person_totals > 0, item_totals > 0
+
+    if difficulties is None:
+        difficulties = np.full(responses.item_count, np.nan)
+    if discriminations is None or model == 'rasch':
+        discriminations = np.full(responses.item_count, np.nan)
+    anchors = calibrated & ~np.isnan(difficulties)
+    if model == '2pl':
+        anchors &= ~np.isnan(discriminations)
+    warm = anchors.any()
+    if not warm:
+        anchors = calibrated
+    target_difficulty = difficulties[anchors].mean() if warm else 0.0
+    target_log_discrimination = np.log(discriminations[anchors]).mean() if warm and model == '2pl' else 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        item_rights = np.bincount(items, weights=correct, minlength=responses.item_count)
+        start_difficulties = -np.log(item_rights / (item_totals - item_rights))
+        person_rights = np.bincount(persons, weights=correct, minlength=responses.person_count)
+        abilities = np.log(person_rights / (person_totals - person_rights))
+    b = np.where(np.isnan(difficulties), start_difficulties, difficulties)
+    a = np.where(np.isnan(discriminations), 1.0, discriminations)
+    b[~calibrated], a[~calibrated] = 0.0, 1.0
+    abilities[~active_persons] = 0.0
+    if warm:
+        # Новые вопросы начинают с p-value, сдвинутого на шкалу ранее откалиброванных
+        b[calibrated & ~anchors] += target_difficulty - start_difficulties[anchors].mean()
+
+    iterations, converged = 0, False
+    while calibrated.any() and iterations < max_iterations and not converged:
+        iterations += 1
+        item_a = a[items]
+        p = probability(abilities[persons], b[items], item_a)
+        residual, weight = correct - p, p * (1 - p)
+        ability_step = newton_step(
+            np.bincount(persons, weights=item_a * residual, minlength=responses.person_count),
+            np.bincount(persons, weights=item_a * item_a * weight, minlength=responses.person_count)
+        )
+        new_abilities = abilities + ability_step
+
+        distance = new_abilities[persons] - b[items]
+        p = probability(new_abilities[persons], b[items], item_a)
+        residual, weight = correct - p, p * (1 - p)
+        difficulty_step = newton_step(
+            -np.bincount(items, weights=item_a * residual, minlength=responses.item_count),
+            np.bincount(items, weights=item_a * item_a * weight, minlength=responses.item_count)
+        )
+        new_b = b + difficulty_step
+        new_a = a
+        if model == '2pl':
+            new_a = np.clip(a + newton_step(
+                np.bincount(items, weights=distance * residual, minlength=responses.item_count),
+                np.bincount(items, weights=distance * distance * weight, minlength=responses.item_count)
+            ), *DISCRIMINATION_BOUNDS)
+
+        # Линейное преобразование шкалы theta' = scale * theta + shift не меняет a * (theta - b)
+        scale = np.exp(np.log(new_a[anchors]).mean() - target_log_discrimination)
+        shift = target_difficulty - scale * new_b[anchors].mean()
+        new_b, new_a = scale * new_b + shift, new_a / scale
+        new_abilities = scale * new_abilities + shift
+        # Сходимость проверяется по параметрам после нормировки: у вопросов, упёршихся в границу
+        # различающей способности, шаги не затухают, но параметры перестают меняться
+        change = max(
+            np.abs(new_b - b)[calibrated].max(initial=0), np.abs(new_a - a)[calibrated].max(initial=0),
+            np.abs(new_abilities - abilities)[active_persons].max(initial=0)
+        )
+        abilities, b, a = new_abilities, new_b, new_a
+        converged = change < tolerance
+
+    abilities[~active_persons] = np.nan
+    b[~calibrated], a[~calibrated] = np.nan, np.nan
+    return Calibration(
+        abilities=abilities, difficulties=b, discriminations=a, calibrated=calibrated,
+        iterations=iterations, converged=converged
+    )
+
+
+def load_responses(test_pks: list, chunk_size: int = CALIBRATION_CHUNK_SIZE) -> tuple:
+    """
+    Собирает последнюю попытку каждого пользователя по каждому тесту. Проходящий в модели - пользователь,
+    а не попытка, поэтому вопросы разных тестов, пройденных одними пользователями, оказываются на одной шкале.
+    Возвращает ответы и pk вопросов в порядке индексов вопросов
+    """
+    question_pks, user_pks, persons, items, correct = [], [], [], [], []
+    rows = TestQuestions.objects.filter(test_id__in=test_pks).order_by('test_id', 'pk').values_list('test_id', 'pk')
+    test_questions = {}
+    for test_pk, quest_pk in rows:
+        test_questions.setdefault(test_pk, []).append(quest_pk)
+    for test_pk, test_question_pks in test_questions.items():
+        offset = len(question_pks)
+        question_pks.extend(test_question_pks)
+        attempts = TestResults.objects.filter(test_id=test_pk).order_by('user_id', '-completed_at').distinct(
+            'user_id'
+        ).values_list('user_id', 'test_version', 'right_questions', 'asked_questions').iterator(
+            chunk_size=chunk_size
+        )
+        while chunk := [row for _, row in zip(range(chunk_size), attempts)]:
+            # Вопросы, которых не было в версии теста попытки или которые не задавали в адаптивной попытке,
+            # не предъявлялись и в ответы не попадают
+            matrix, presented = decode_attempts(test_pk, test_question_pks, [row[1:] for row in chunk])
+            rows, columns = np.nonzero(presented)
+            user_pks.append(np.array([row[0] for row in chunk], dtype=np.int64)[rows])
+            items.append((offset + columns).astype(np.int32))
+            correct.append(matrix[rows, columns])
+    if not user_pks:
+        return Responses(np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, bool), 0, len(question_pks)), \
+            question_pks
+    person_pks, persons = np.unique(np.concatenate(user_pks), return_inverse=True)
+    responses = Responses(
+        persons=persons.astype(np.int32), items=np.concatenate(items), correct=np.concatenate(correct),
+        person_count=len(person_pks), item_count=len(question_pks)
+    )
+    return responses, question_pks
+
+
+def calibrate_questions(test_pks: list = None, model: str = 'rasch', warm_start: bool = True,
+                        max_iterations: int = CALIBRATION_MAX_ITERATIONS,
+                        tolerance: float = CALIBRATION_TOLERANCE) -> Calibration:
+    """
+    Калибрует вопросы тестов (по умолчанию - всего банка) и сохраняет параметры в TestQuestions.
+    Вопросы без конечной оценки сохраняют прежние параметры
+    """
+    if test_pks is None:
+        test_pks = list(Test.objects.values_list('pk', flat=True))
+    responses, question_pks = load_responses(test_pks)
+    difficulties = discriminations = None
+    if warm_start:
+        previous = {
+            pk: (difficulty, discrimination) for pk, difficulty, discrimination in
+            TestQuestions.objects.filter(pk__in=question_pks).values_list('pk', 'irt_difficulty', 'irt_discrimination')
+        }
+        difficulties = np.array([previous[pk][0] for pk in question_pks], dtype=np.float64)
+        discriminations = np.array([previous[pk][1] for pk in question_pks], dtype=np.float64)
+    calibration = calibrate(responses, model, difficulties, discriminations, max_iterations, tolerance)
+    calibrated_at = now()
+    questions = [
+        TestQuestions(pk=quest_pk, irt_difficulty=float(difficulty), irt_discrimination=float(discrimination),
+                      irt_calibrated_at=calibrated_at)
+        for quest_pk, difficulty, discrimination, is_calibrated in zip(
+            question_pks, calibration.difficulties, calibration.discriminations, calibration.calibrated
+        ) if is_calibrated
+    ]
+    with transaction.atomic():
+        TestQuestions.objects.bulk_update(
+            questions, ['irt_difficulty', 'irt_discrimination', 'irt_calibrated_at'], batch_size=CALIBRATION_CHUNK_SIZE
+        )
+        transaction.on_commit(invalidate_item_banks)
+    return calibration
@@ -0,0 +1,81 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value, IntegerField, CharField
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .detail_cache import invalidate_test_details
+from .models import Test, TestQuestions
+
+CARD_CHUNK_SIZE = 10000
+CATALOG_VERSION_CACHE_KEY = 'main_app:catalog:version'
+
+
+def get_catalog_version() -> int:
+    """
+    Версия карточек каталога - время их последнего изменения в наносекундах
+    """
+    version = cache.get(CATALOG_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_catalog() -> None:
+    """
+    Сдвигает версию каталога после коммита, чтобы параллельный запрос не закрепил за новой версией старые карточки
+    """
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_CACHE_KEY, time.time_ns(), None))
+
+
+def get_card_fields() -> dict:
+    """
+    Выражения для денормализованных полей карточки теста в каталоге
+    """
+    question_count = Subquery(
+        TestQuestions.objects.filter(test_id=OuterRef('pk')).values('test_id').annotate(
+            count=Count('pk')
+        ).values('count'),
+        output_field=IntegerField()
+    )
+    tags_label = Subquery(
+        Test.tags.through.objects.filter(test_id=OuterRef('pk'), tag__is_deleted=False).values('test_id').annotate(
+            label=StringAgg('tag__title', ', ', ordering='tag__title')
+        ).values('label'),
+        output_field=CharField()
+    )
+    author_name = Subquery(get_user_model().objects.filter(pk=OuterRef('author_id')).values('username'))
+    return dict(
+        question_count=Coalesce(question_count, Value(0)),
+        tags_label=Coalesce(tags_label, Value('')),
+        author_name=Coalesce(author_name, Value(''))
+    )
+
+
+def update_test_cards(queryset, *fields) -> int:
+    """
+    Пересчитывает поля карточек тестов выборки. Данные страниц этих тестов в кеше тоже содержат поля карточки,
+    поэтому сбрасываются вместе с каталогом
+    """
+    card_fields = get_card_fields()
+    if fields:
+        card_fields = {field: card_fields[field] for field in fields}
+    invalidate_test_details(queryset.values_list('slug', flat=True))
+    updated = queryset.update(updated_at=now(), **card_fields)
+    invalidate_catalog()
+    return updated
+
+
+def repair_test_cards(chunk_size: int = CARD_CHUNK_SIZE) -> int:
+    updated, last_pk = 0, 0
+    while True:
+        pks = list(Test.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return updated
+        updated += update_test_cards(Test.objects.filter(pk__in=pks))
+        last_pk = pks[-1]
@@ -0,0 +1,63 @@
+import hashlib
+
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Test, TestPassedCounter
+
+
+def make_etag(*parts) -> str:
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def get_test_stamp(slug: str):
+    """
+    Время изменения теста и текущее значение счётчика прохождений одним запросом, None если теста нет
+    """
+    return Test.objects.filter(slug=slug).annotate(
+        live_passed_times=F('passed_times') + Coalesce(Sum('passed_counters__count'), 0)
+    ).values_list('updated_at', 'live_passed_times').first()
+
+
+def get_results_stamp(user) -> dict:
+    """
+    Водяной знак результатов пользователя. Кроме его попыток учитываются изменения пройденных тестов
+    и ещё не перенесённые прохождения всеми пользователями, от которых зависит процентиль:
+    перенос счётчиков сам меняет время изменения теста
+    """
+    results = user.results.filter(test__is_deleted=False)
+    stamp = results.aggregate(
+        completed_at=Max('completed_at'), count=Count('pk'), updated_at=Max('test__updated_at')
+    )
+    stamp['pending_passed_times'] = TestPassedCounter.objects.filter(
+        test_id__in=results.values('test_id')
+    ).aggregate(count=Sum('count'))['count']
+    return stamp
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET: страница отдаётся с ETag и Last-Modified, а если версия не изменилась - ответ 304
+    без основных запросов и рендеринга шаблона.
+    get_version_stamp возвращает (время последнего изменения, части ETag) или None, если страница строится как обычно
+    """
+
+    def get_version_stamp(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        stamp = self.get_version_stamp()
+        view = super(ConditionalGetMixin, self).get
+        if stamp is None:
+            return view(request, *args, **kwargs)
+        last_modified, parts = stamp
+        # В шапке страницы меню пользователя, поэтому у каждого пользователя своя версия
+        etag = make_etag(request.user.pk, *parts)
+        response = condition(
+            etag_func=lambda *args, **kwargs: etag, last_modified_func=lambda *args, **kwargs: last_modified
+        )(view)(request, *args, **kwargs)
+        # Без no-cache браузер по Last-Modified сам решит, сколько показывать страницу без перепроверки
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
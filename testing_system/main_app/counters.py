@@ -0,0 +1,60 @@
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Case, When, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .cards import invalidate_catalog
+from .models import Test, TestPassedCounter
+
+PASSED_TIMES_SHARDS = getattr(settings, 'PASSED_TIMES_SHARDS', 8)
+
+
+def increment_passed_times(test_pk: int) -> None:
+    """
+    Увеличивает счётчик прохождений теста в случайном шарде, не блокируя строку самого теста
+    """
+    shard = random.randrange(PASSED_TIMES_SHARDS)
+    counter = TestPassedCounter.objects.filter(test_id=test_pk, shard=shard)
+    if counter.update(count=F('count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            TestPassedCounter.objects.create(test_id=test_pk, shard=shard, count=1)
+    except IntegrityError:
+        counter.update(count=F('count') + 1)
+
+
+def get_passed_times(test_pk: int) -> int:
+    """
+    Возвращает приблизительное текущее значение счётчика: сохранённое значение и ещё не перенесённые шарды
+    """
+    passed_times = Test.objects.filter(pk=test_pk).annotate(
+        live_passed_times=F('passed_times') + Coalesce(Sum('passed_counters__count'), 0)
+    ).values_list('live_passed_times', flat=True).first()
+    return passed_times or 0
+
+
+def flush_passed_times() -> int:
+    """
+    Переносит накопленные в шардах прохождения в Test.passed_times одним UPDATE.
+    Возвращает кол-во обновлённых тестов.
+    """
+    with transaction.atomic():
+        counters = list(
+            TestPassedCounter.objects.select_for_update().filter(count__gt=0).values_list('pk', 'test_id', 'count')
+        )
+        if not counters:
+            return 0
+        totals = dict()
+        for _, test_pk, count in counters:
+            totals[test_pk] = totals.get(test_pk, 0) + count
+        Test.objects.filter(pk__in=totals.keys()).update(
+            passed_times=F('passed_times') + Case(*[When(pk=pk, then=Value(total)) for pk, total in totals.items()]),
+            updated_at=now()
+        )
+        TestPassedCounter.objects.filter(pk__in=[pk for pk, _, _ in counters]).update(count=0)
+        invalidate_catalog()
+    return len(totals)
@@ -0,0 +1,94 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Test
+
+TEST_DETAIL_CACHE_KEY = 'main_app:test_detail:{slug}'
+TEST_DETAIL_LOCK_KEY = 'main_app:test_detail_lock:{slug}'
+TEST_DETAIL_STATS_KEY = 'main_app:test_detail_stats:{name}'
+TEST_DETAIL_CACHE_TIMEOUT = 60 * 60
+# После мягкого срока запись обновляет один запрос, остальные пока получают её же
+TEST_DETAIL_REFRESH_AFTER = 60 * 5
+TEST_DETAIL_LOCK_TIMEOUT = 10
+TEST_DETAIL_WAIT_ATTEMPTS = 5
+TEST_DETAIL_WAIT_INTERVAL = 0.05
+TEST_DETAIL_STATS = ('hits', 'stale_hits', 'misses')
+
+
+def get_cache_key(slug: str) -> str:
+    return TEST_DETAIL_CACHE_KEY.format(slug=slug)
+
+
+def count(name: str) -> None:
+    key = TEST_DETAIL_STATS_KEY.format(name=name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_detail_cache_stats() -> dict:
+    values = cache.get_many([TEST_DETAIL_STATS_KEY.format(name=name) for name in TEST_DETAIL_STATS])
+    stats = {name: values.get(TEST_DETAIL_STATS_KEY.format(name=name), 0) for name in TEST_DETAIL_STATS}
+    requests = sum(stats.values())
+    stats['hit_ratio'] = (stats['hits'] + stats['stale_hits']) / requests if requests else 0.0
+    return stats
+
+
+def build_test_detail(slug: str):
+    """
+    Данные страницы теста одним запросом по денормализованным полям карточки, None если теста нет
+    """
+    test = Test.objects.filter(slug=slug).values(
+        'pk', 'slug', 'title', 'description', 'author_name', 'tags_label', 'question_count', 'published_at',
+        'category__slug', 'category__title'
+    ).first()
+    if test is None:
+        return None
+    test['category'] = {'slug': test.pop('category__slug'), 'title': test.pop('category__title')}
+    return test
+
+
+def get_test_detail(slug: str):
+    """
+    Читает данные страницы теста из кеша, при промахе собирает и кладёт в кеш.
+    Сборку выполняет один запрос (блокировка через cache.add): при промахе остальные коротко ждут
+    его результата, а устаревшую по мягкому сроку запись отдают, пока она обновляется
+    """
+    cache_key, lock_key = get_cache_key(slug), TEST_DETAIL_LOCK_KEY.format(slug=slug)
+    entry = cache.get(cache_key)
+    if entry is not None and entry['refresh_at'] > time.time():
+        count('hits')
+        return entry['test']
+    locked = cache.add(lock_key, 1, TEST_DETAIL_LOCK_TIMEOUT)
+    if not locked and entry is not None:
+        count('stale_hits')
+        return entry['test']
+    for _ in range(TEST_DETAIL_WAIT_ATTEMPTS if not locked else 0):
+        time.sleep(TEST_DETAIL_WAIT_INTERVAL)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            count('hits')
+            return entry['test']
+    count('misses')
+    try:
+        test = build_test_detail(slug)
+        if test is not None:
+            cache.set(cache_key, {'test': test, 'refresh_at': time.time() + TEST_DETAIL_REFRESH_AFTER},
+                      TEST_DETAIL_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return test
+
+
+def invalidate_test_details(slugs) -> None:
+    """
+    Удаляет данные страниц тестов после коммита, чтобы параллельный запрос не собрал их до изменения
+    """
+    keys = [get_cache_key(slug) for slug in slugs]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Value, CharField, Model, QuerySet
+
+from .models import Category, Tag, Test
+
+FACETS_CACHE_KEY = 'main_app:facets:{version}:{signature}'
+FACETS_VERSION_CACHE_KEY = 'main_app:facets:version'
+FACETS_CACHE_TIMEOUT = 60 * 10
+# Фасет -> фильтр TestsFilter, который не применяется при подсчёте своего фасета,
+# чтобы были видны альтернативы уже выбранному значению
+FACET_FILTERS = {'category': 'category', 'tags': 'tags'}
+# Поля теста, по которым отбирается и фильтруется каталог: только их изменение у теста,
+# который был или стал виден в каталоге, меняет счётчики
+FACET_TEST_FIELDS = ('is_published', 'is_created', 'is_deleted', 'category_id', 'author_id', 'title', 'description')
+IGNORED_FILTERS = ('ordering',)
+
+
+def get_facets_version() -> int:
+    version = cache.get(FACETS_VERSION_CACHE_KEY)
+    if version is None:
+        # Начальная версия от времени, чтобы после вытеснения счётчика не прочитать старые записи
+        cache.add(FACETS_VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(FACETS_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_facets() -> None:
+    """
+    Сдвигает версию фасетов после коммита, чтобы параллельный запрос не закешировал под новой версией старые счётчики
+    """
+    def bump():
+        try:
+            cache.incr(FACETS_VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(FACETS_VERSION_CACHE_KEY, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+def get_facet_state(test) -> dict:
+    return {field: getattr(test, field) for field in FACET_TEST_FIELDS}
+
+
+def is_in_catalog(state: dict) -> bool:
+    return state['is_published'] and state['is_created'] and not state['is_deleted']
+
+
+def is_catalog_change(old_state, state: dict) -> bool:
+    """
+    Виден ли сохраняемый тест в каталоге до или после сохранения. old_state - состояние до сохранения,
+    None у нового теста
+    """
+    return is_in_catalog(state) or (old_state is not None and is_in_catalog(old_state))
+
+
+def is_facet_change(old_state, state: dict) -> bool:
+    """
+    Меняет ли сохранение теста фасетные счётчики
+    """
+    return is_catalog_change(old_state, state) and old_state != state
+
+
+def get_cleaned_filters(filterset) -> dict:
+    if not filterset.is_bound or not filterset.is_valid():
+        return {}
+    return {
+        name: value for name, value in filterset.form.cleaned_data.items()
+        if name not in IGNORED_FILTERS and value not in (None, '') and not (isinstance(value, QuerySet) and not value)
+    }
+
+
+def normalize_value(value):
+    if isinstance(value, QuerySet):
+        # Кэш выборки уже заполнен при валидации формы, запроса не будет
+        return sorted(obj.pk for obj in value)
+    if isinstance(value, Model):
+        return value.pk
+    if isinstance(value, str):
+        return ' '.join(value.split()).casefold()
+    return value
+
+
+def get_filters_signature(filters: dict) -> str:
+    normalized = {name: normalize_value(value) for name, value in filters.items()}
+    return hashlib.md5(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def filter_queryset(filterset, filters: dict, exclude: str):
+    queryset = filterset.queryset.all()
+    for name, value in filters.items():
+        if name != exclude:
+            queryset = filterset.filters[name].filter(queryset, value)
+    return queryset.order_by()
+
+
+def get_facets_queryset(filterset, filters: dict):
+    """
+    Счётчики всех фасетов одним запросом: сгруппированные COUNT по категориям и тегам, объединённые UNION ALL.
+    Строки имеют вид (фасет, pk, кол-во тестов). Названия не соединяются в агрегат, чтобы планировщик
+    группировал только по индексированному внешнему ключу.
+    """
+    category_base = filter_queryset(filterset, filters, FACET_FILTERS['category'])
+    if category_base.query.distinct:
+        # Фильтр по тегам размножает строки соединением, поэтому тесты отбираются через подзапрос
+        category_base = Test.objects.filter(pk__in=category_base.values('pk'))
+    categories = category_base.annotate(
+        facet=Value('category', output_field=CharField()), facet_pk=F('category_id')
+    ).values_list('facet', 'facet_pk').annotate(count=Count('pk'))
+
+    tags_base = filter_queryset(filterset, filters, FACET_FILTERS['tags'])
+    tags = Test.tags.through.objects.filter(test_id__in=tags_base.values('pk')).annotate(
+        facet=Value('tags', output_field=CharField()), facet_pk=F('tag_id')
+    ).values_list('facet', 'facet_pk').annotate(count=Count('test_id'))
+    return categories.order_by().union(tags.order_by(), all=True)
+
+
+def count_facets(filterset, filters: dict) -> dict:
+    counts = {facet: {} for facet in FACET_FILTERS}
+    for facet, pk, count in get_facets_queryset(filterset, filters):
+        counts[facet][pk] = count
+    facets = {facet: [] for facet in FACET_FILTERS}
+    titles = Category.objects.filter(pk__in=counts['category']).annotate(
+        facet=Value('category', output_field=CharField())
+    ).values_list('facet', 'pk', 'title').order_by().union(
+        Tag.objects.filter(pk__in=counts['tags']).annotate(
+            facet=Value('tags', output_field=CharField())
+        ).values_list('facet', 'pk', 'title').order_by(),
+        all=True
+    )
+    for facet, pk, title in titles:
+        facets[facet].append({'pk': pk, 'title': title, 'count': counts[facet][pk]})
+    for options in facets.values():
+        options.sort(key=lambda option: (-option['count'], option['title']))
+    return facets
+
+
+def get_facets(filterset) -> dict:
+    """
+    Кол-во опубликованных тестов по категориям и тегам для текущего состояния фильтра.
+    Кэшируется по нормализованной сигнатуре фильтра; кэш сбрасывается сменой версии при изменении тестов.
+    """
+    filters = get_cleaned_filters(filterset)
+    cache_key = FACETS_CACHE_KEY.format(version=get_facets_version(), signature=get_filters_signature(filters))
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = count_facets(filterset, filters)
+        cache.set(cache_key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -1,5 +1,9 @@
 import django_filters
+from django.urls import reverse_lazy
+
 from .models import Test, Tag, Category
+from .search import search_tests
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 from users_app.models import User
 
 
@@ -13,12 +17,25 @@ class TestsFilter(django_filters.FilterSet):
         ('-title', 'По названию по убыванию'),
     ]
 
+    search = django_filters.CharFilter(label='Поиск', method='filter_search')
     title = django_filters.CharFilter(field_name='title', lookup_expr='icontains')
-    author = django_filters.ModelChoiceFilter(field_name='author', queryset=User.objects.all())
-    category = django_filters.ModelChoiceFilter(field_name='category', queryset=Category.objects.all())
-    tags = django_filters.ModelMultipleChoiceFilter(field_name='tags', queryset=Tag.objects.all())
+    author = django_filters.ModelChoiceFilter(
+        field_name='author', queryset=User.objects.all(),
+        widget=AutocompleteSelect(url=reverse_lazy('autocomplete', kwargs={'source': 'authors'}))
+    )
+    category = django_filters.ModelChoiceFilter(
+        field_name='category', queryset=Category.objects.all(),
+        widget=AutocompleteSelect(url=reverse_lazy('autocomplete', kwargs={'source': 'categories'}))
+    )
+    tags = django_filters.ModelMultipleChoiceFilter(
+        field_name='tags', queryset=Tag.objects.all(),
+        widget=AutocompleteSelectMultiple(url=reverse_lazy('autocomplete', kwargs={'source': 'tags'}))
+    )
     ordering = django_filters.OrderingFilter(choices=ORDERING_LIST, field_name='ordering')
 
     class Meta:
         model = Test
         fields = {'title', 'author', 'category', 'tags'}
+
+    def filter_search(self, queryset, name, value):
+        return search_tests(queryset, value)
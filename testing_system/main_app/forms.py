@@ -11,11 +11,12 @@ class TestForm(forms.ModelForm):
 
     class Meta:
         model = Test
-        fields = ['title', 'description', 'category', 'tags']
+        fields = ['title', 'description', 'category', 'tags', 'is_adaptive']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control'}),
-            'category': forms.Select(attrs={'class': 'form-control'})
+            'category': forms.Select(attrs={'class': 'form-control'}),
+            'is_adaptive': forms.CheckboxInput()
         }
 
 
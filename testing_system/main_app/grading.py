@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+from .models import TestQuestions, TestAnswers
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """
+    Скомпилированный ключ ответов теста: pk вопроса -> frozenset pk правильных ответов.
+    answer_pks - все ответы теста в порядке (вопрос, ответ), по которому строится лист ответов попытки
+    """
+    answers: dict
+    question_count: int
+    answer_pks: tuple = ()
+
+    def grade(self, questions_resp: dict) -> list:
+        """
+        Возвращает pk вопросов, на которые пользователь ответил правильно.
+        questions_resp - словарь вида {pk вопроса: [pk выбранных ответов]}
+        """
+        return [
+            quest_pk for quest_pk, right_answers in self.answers.items()
+            if quest_pk in questions_resp and frozenset(questions_resp[quest_pk]) == right_answers
+        ]
+
+    @property
+    def question_pks(self) -> tuple:
+        """
+        Вопросы теста по возрастанию pk - порядок битов TestResults.right_questions
+        """
+        return tuple(self.answers)
+
+    def score(self, rights_answers: list) -> int:
+        if not self.question_count:
+            return 0
+        return len(rights_answers) * 100 // self.question_count
+
+
+def build_answer_key(test_pk: int) -> AnswerKey:
+    answers = {
+        quest_pk: set()
+        for quest_pk in TestQuestions.objects.filter(test_id=test_pk).order_by('pk').values_list('pk', flat=True)
+    }
+    test_answers = TestAnswers.objects.filter(question__test_id=test_pk).order_by('question_id', 'pk')\
+        .values_list('question_id', 'pk', 'is_right')
+    answer_pks = []
+    for quest_pk, answer_pk, is_right in test_answers:
+        answer_pks.append(answer_pk)
+        if is_right:
+            answers[quest_pk].add(answer_pk)
+    return AnswerKey(
+        answers={quest_pk: frozenset(answer_pks) for quest_pk, answer_pks in answers.items()},
+        question_count=len(answers),
+        answer_pks=tuple(answer_pks)
+    )
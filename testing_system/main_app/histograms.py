@@ -0,0 +1,108 @@
+import random
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import TestResults, TestScoreHistogram
+
+HISTOGRAM_BUCKETS = 101
+SCORE_HISTOGRAM_SHARDS = getattr(settings, 'SCORE_HISTOGRAM_SHARDS', 8)
+HISTOGRAM_REBUILD_CHUNK_SIZE = 1000
+DISTRIBUTION_BINS = 10
+
+
+def add_score(test_pk: int, score: int) -> None:
+    """
+    Учитывает результат в распределении баллов теста одним UPSERT в случайный шард,
+    поэтому параллельные прохождения одного теста не ждут друг друга на одной строке.
+    Вызывается в той же транзакции, что и создание TestResults.
+    """
+    bucket = min(max(score, 0), HISTOGRAM_BUCKETS - 1)
+    buckets = [0] * HISTOGRAM_BUCKETS
+    buckets[bucket] = 1
+    table = TestScoreHistogram._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (test_id, shard, buckets) VALUES (%s, %s, %s)
+            ON CONFLICT (test_id, shard) DO UPDATE
+            SET buckets[%s] = {table}.buckets[%s] + 1
+            """,
+            [test_pk, random.randrange(SCORE_HISTOGRAM_SHARDS), buckets, bucket + 1, bucket + 1]
+        )
+
+
+def sum_buckets(rows) -> list:
+    histogram = [0] * HISTOGRAM_BUCKETS
+    for buckets in rows:
+        for score, count in enumerate(buckets):
+            histogram[score] += count
+    return histogram
+
+
+def get_histograms(test_pks) -> dict:
+    """
+    Распределения баллов тестов одним запросом: pk теста -> список из 101 кол-ва результатов
+    """
+    rows = dict()
+    for test_pk, buckets in TestScoreHistogram.objects.filter(test_id__in=test_pks).values_list('test_id', 'buckets'):
+        rows.setdefault(test_pk, []).append(buckets)
+    return {test_pk: sum_buckets(rows.get(test_pk, [])) for test_pk in test_pks}
+
+
+def get_histogram(test_pk: int) -> list:
+    return get_histograms([test_pk])[test_pk]
+
+
+def get_percentile(histogram: list, score: int) -> int:
+    """
+    Процент прохождений теста с баллом ниже score
+    """
+    total = sum(histogram)
+    if not total:
+        return 0
+    return sum(histogram[:min(max(score, 0), HISTOGRAM_BUCKETS)]) * 100 // total
+
+
+def get_distribution(histogram: list, bins: int = DISTRIBUTION_BINS) -> list:
+    """
+    Распределение баллов по интервалам для карточек тестов автора.
+    Последний интервал включает 100 баллов, percent - доля от самого заполненного интервала.
+    """
+    width = (HISTOGRAM_BUCKETS - 1) // bins
+    counts = [sum(histogram[num * width:(num + 1) * width]) for num in range(bins)]
+    counts[-1] += sum(histogram[bins * width:])
+    top = max(counts) or 1
+    return [
+        dict(start=num * width, end=HISTOGRAM_BUCKETS - 1 if num == bins - 1 else (num + 1) * width - 1,
+             count=count, percent=count * 100 // top)
+        for num, count in enumerate(counts)
+    ]
+
+
+def rebuild_histograms(test_pks: list) -> int:
+    """
+    Пересобирает распределения баллов тестов по всем их результатам.
+    Таблица распределений блокируется до конца транзакции, поэтому прохождения, завершающиеся во время
+    пересборки, будут учтены ровно один раз. Возвращает кол-во тестов, у которых есть результаты.
+    """
+    table = TestScoreHistogram._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {table} WHERE test_id = ANY(%s)', [test_pks])
+        cursor.execute(
+            f"""
+            WITH counts AS (
+                SELECT test_id, LEAST(GREATEST(score, 0), %s) AS score, count(*) AS count
+                FROM {TestResults._meta.db_table} WHERE test_id = ANY(%s) GROUP BY 1, 2
+            )
+            INSERT INTO {table} (test_id, shard, buckets)
+            SELECT tests.test_id, 0, array_agg(coalesce(counts.count, 0)::integer ORDER BY buckets.score)
+            FROM (SELECT DISTINCT test_id FROM counts) tests
+            CROSS JOIN generate_series(0, %s) AS buckets(score)
+            LEFT JOIN counts ON counts.test_id = tests.test_id AND counts.score = buckets.score
+            GROUP BY tests.test_id
+            """,
+            [HISTOGRAM_BUCKETS - 1, test_pks, HISTOGRAM_BUCKETS - 1]
+        )
+        return cursor.rowcount
@@ -0,0 +1,131 @@
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Test, TestResults, TestBestAttempt, CategoryBestAttempt
+
+LEADERBOARD_ORDERING = ['-score', 'completed_at']
+LEADERBOARD_REBUILD_CHUNK_SIZE = 1000
+
+
+def upsert_best_attempt(model, board_field: str, board_pk: int, extra: dict, user_pk: int, score: int,
+                        completed_at) -> None:
+    """
+    Запоминает попытку, если она лучше сохранённой: балл выше, а при равном балле остаётся более ранняя
+    """
+    table = model._meta.db_table
+    columns = [f'{board_field}_id', 'user_id', 'score', 'completed_at', *extra]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})
+            ON CONFLICT ({board_field}_id, user_id) DO UPDATE
+            SET {', '.join(f'{column} = EXCLUDED.{column}' for column in columns[2:])}
+            WHERE EXCLUDED.score > {table}.score
+               OR (EXCLUDED.score = {table}.score AND EXCLUDED.completed_at < {table}.completed_at)
+            """,
+            [board_pk, user_pk, score, completed_at, *extra.values()]
+        )
+
+
+def record_attempt(result: TestResults, category_pk: int) -> None:
+    """
+    Обновляет таблицы лидеров теста и категории. Вызывается в той же транзакции, что и создание результата
+    """
+    upsert_best_attempt(TestBestAttempt, 'test', result.test_id, {}, result.user_id, result.score,
+                        result.completed_at)
+    upsert_best_attempt(CategoryBestAttempt, 'category', category_pk, {'test_id': result.test_id},
+                        result.user_id, result.score, result.completed_at)
+
+
+def get_board_queryset(model, **board):
+    return model.objects.filter(**board).order_by(*LEADERBOARD_ORDERING, 'pk')
+
+
+def get_rank(entry) -> int:
+    """
+    Место записи в таблице лидеров: кол-во записей выше неё по индексу рейтинга плюс один
+    """
+    model = type(entry)
+    board = {'test_id': entry.test_id} if model is TestBestAttempt else {'category_id': entry.category_id}
+    return model.objects.filter(**board).filter(
+        Q(score__gt=entry.score)
+        | Q(score=entry.score, completed_at__lt=entry.completed_at)
+        | Q(score=entry.score, completed_at=entry.completed_at, pk__lt=entry.pk)
+    ).count() + 1
+
+
+def remove_category_best_attempts(test_pks: list) -> int:
+    """
+    Убирает лучшие попытки скрытых тестов из таблиц лидеров их категорий и выбирает этим пользователям
+    лучшую попытку среди оставшихся тестов категории. Блокируются только строки этих пользователей,
+    поэтому прохождения других тестов не ждут. Возвращает кол-во убранных записей
+    """
+    if not TestBestAttempt.objects.filter(test_id__in=test_pks).exists():
+        return 0
+    test_table, category_table = TestBestAttempt._meta.db_table, CategoryBestAttempt._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {category_table} WHERE test_id = ANY(%s) RETURNING category_id, user_id', [test_pks]
+        )
+        removed = cursor.fetchall()
+        if not removed:
+            return 0
+        # Параллельное прохождение могло уже вставить строку пользователя, тогда остаётся лучшая из двух
+        cursor.execute(
+            f"""
+            INSERT INTO {category_table} (category_id, user_id, test_id, score, completed_at)
+            SELECT DISTINCT ON (r.category_id, r.user_id) r.category_id, r.user_id, b.test_id, b.score, b.completed_at
+            FROM unnest(%s::bigint[], %s::bigint[]) AS r(category_id, user_id)
+            JOIN {Test._meta.db_table} t ON t.category_id = r.category_id AND NOT t.is_deleted
+            JOIN {test_table} b ON b.test_id = t.id AND b.user_id = r.user_id
+            ORDER BY r.category_id, r.user_id, b.score DESC, b.completed_at
+            ON CONFLICT (category_id, user_id) DO UPDATE
+            SET test_id = EXCLUDED.test_id, score = EXCLUDED.score, completed_at = EXCLUDED.completed_at
+            WHERE EXCLUDED.score > {category_table}.score
+               OR (EXCLUDED.score = {category_table}.score AND EXCLUDED.completed_at < {category_table}.completed_at)
+            """,
+            [[category_pk for category_pk, _ in removed], [user_pk for _, user_pk in removed]]
+        )
+    return len(removed)
+
+
+def rebuild_category_leaderboards(category_pks: list) -> None:
+    """
+    Пересобирает таблицы лидеров категорий по лучшим попыткам их неудалённых тестов
+    """
+    test_table, category_table = TestBestAttempt._meta.db_table, CategoryBestAttempt._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {test_table}, {category_table} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {category_table} WHERE category_id = ANY(%s)', [category_pks])
+        cursor.execute(
+            f"""
+            INSERT INTO {category_table} (category_id, user_id, test_id, score, completed_at)
+            SELECT DISTINCT ON (t.category_id, b.user_id) t.category_id, b.user_id, b.test_id, b.score, b.completed_at
+            FROM {test_table} b JOIN {Test._meta.db_table} t ON t.id = b.test_id
+            WHERE t.category_id = ANY(%s) AND NOT t.is_deleted
+            ORDER BY t.category_id, b.user_id, b.score DESC, b.completed_at
+            """,
+            [category_pks]
+        )
+
+
+def rebuild_leaderboards(test_pks: list) -> None:
+    """
+    Пересобирает таблицы лидеров тестов по всем их результатам, а затем таблицы лидеров их категорий
+    по лучшим попыткам всех тестов категории
+    """
+    test_table, category_table = TestBestAttempt._meta.db_table, CategoryBestAttempt._meta.db_table
+    category_pks = list(Test.all_objects.filter(pk__in=test_pks).values_list('category_id', flat=True).distinct())
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {test_table}, {category_table} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {test_table} WHERE test_id = ANY(%s)', [test_pks])
+        cursor.execute(
+            f"""
+            INSERT INTO {test_table} (test_id, user_id, score, completed_at)
+            SELECT DISTINCT ON (test_id, user_id) test_id, user_id, score, completed_at
+            FROM {TestResults._meta.db_table} WHERE test_id = ANY(%s)
+            ORDER BY test_id, user_id, score DESC, completed_at
+            """,
+            [test_pks]
+        )
+        rebuild_category_leaderboards(category_pks)
@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from main_app.bitsets import encode_bitsets
+from main_app.models import Category, Test, TestQuestions, TestAnswers, TestResults
+from users_app.models import User
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+@contextmanager
+def rollback_atomic():
+    """
+    Выполняет бенчмарк в транзакции и откатывает все созданные данные
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise BenchmarkRollback
+    except BenchmarkRollback:
+        pass
+
+
+def measure(func, repeat: int = 5) -> tuple:
+    """
+    Возвращает кол-во запросов к БД за один вызов и среднее время выполнения в мс
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    queries = len(ctx.captured_queries)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return queries, (time.perf_counter() - started) / repeat * 1000
+
+
+def create_benchmark_test(question_count: int, answers_per_question: int = 4, prefix: str = 'bench') -> Test:
+    author, _ = User.objects.get_or_create(username=f'{prefix}_author')
+    category, _ = Category.objects.get_or_create(title=f'{prefix}_category')
+    test = Test.objects.create(
+        title=f'{prefix} {question_count}', author=author, category=category, is_published=True, is_created=True
+    )
+    questions = TestQuestions.objects.bulk_create(
+        TestQuestions(test=test, question=f'Question {num}') for num in range(question_count)
+    )
+    TestAnswers.objects.bulk_create(
+        TestAnswers(question=quest, answer=f'Answer {num}', is_right=num == 0)
+        for quest in questions for num in range(answers_per_question)
+    )
+    return test
+
+
+def create_synthetic_results(test: Test, attempts: int, difficulties: np.ndarray, discriminations: np.ndarray = None,
+                             chunk_size: int = 50000, seed: int = 0) -> None:
+    """
+    Создаёт попытки теста по модели 2PL: вероятность правильного ответа 1 / (1 + exp(-a * (theta - b))),
+    способности проходящих theta ~ N(0, 1). Попытки генерируются и вставляются пачками по chunk_size.
+    """
+    rng = np.random.default_rng(seed)
+    if discriminations is None:
+        discriminations = np.ones_like(difficulties)
+    question_count = len(difficulties)
+    for start in range(0, attempts, chunk_size):
+        abilities = rng.standard_normal(min(chunk_size, attempts - start))
+        probability = 1 / (1 + np.exp(-discriminations * (abilities[:, None] - difficulties)))
+        correct = rng.random(probability.shape) < probability
+        scores = correct.sum(axis=1) * 100 // question_count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {TestResults._meta.db_table} (test_id, user_id, score, completed_at, right_questions)
+                SELECT %s, %s, score, now(), right_questions FROM unnest(%s::integer[], %s::bytea[])
+                AS results(score, right_questions)
+                """,
+                [test.pk, test.author_id, scores.tolist(), encode_bitsets(correct)]
+            )
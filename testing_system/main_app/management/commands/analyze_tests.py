@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.analytics import analyze_test, ANALYTICS_CHUNK_SIZE
+from main_app.models import Test
+
+
+class Command(BaseCommand):
+    help = 'Рассчитывает трудность и различающую способность вопросов и альфу Кронбаха тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_pks', nargs='*', type=int)
+        parser.add_argument('--all', action='store_true', help='Проанализировать все тесты с результатами')
+        parser.add_argument('--chunk-size', type=int, default=ANALYTICS_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            test_pks = Test.objects.filter(results__isnull=False).distinct().values_list('pk', flat=True)
+        elif options['test_pks']:
+            test_pks = options['test_pks']
+        else:
+            raise CommandError('Specify test ids or --all')
+        for test_pk in test_pks:
+            started = time.perf_counter()
+            statistics = analyze_test(test_pk, options['chunk_size'])
+            self.stdout.write(
+                f'Test #{test_pk}: {statistics.attempts} attempts, alpha {statistics.alpha:.3f} '
+                f'in {time.perf_counter() - started:.2f}s'
+            )
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from main_app.adaptive import build_item_bank, is_finished
+
+
+class Command(BaseCommand):
+    help = 'Замеряет выбор вопросов адаптивного режима и кол-во вопросов на попытку на синтетическом банке'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=10000)
+        parser.add_argument('--sessions', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        question_count = options['questions']
+        difficulties = rng.normal(0, 1.5, question_count)
+        discriminations = rng.lognormal(0, 0.3, question_count)
+        started = time.perf_counter()
+        bank = build_item_bank(list(range(1, question_count + 1)), difficulties, discriminations)
+        self.stdout.write(f'Built lookup table for {question_count} questions in '
+                          f'{(time.perf_counter() - started) * 1000:.0f} ms ({bank.order.nbytes / 1024 / 1024:.1f} MB)')
+
+        abilities = rng.standard_normal(options['sessions'])
+        select_times, estimate_times, lengths, errors = [], [], [], []
+        for ability in abilities:
+            asked, correct, estimate, standard_error = [], [], 0.0, 1.0
+            while not is_finished(bank, asked, standard_error):
+                started = time.perf_counter()
+                quest_pk = bank.next_question(estimate, set(asked))
+                select_times.append(time.perf_counter() - started)
+                num = bank.positions[quest_pk]
+                probability = 1 / (1 + np.exp(-discriminations[num] * (ability - difficulties[num])))
+                asked.append(quest_pk)
+                correct.append(bool(rng.random() < probability))
+                started = time.perf_counter()
+                estimate, standard_error = bank.estimate(asked, correct)
+                estimate_times.append(time.perf_counter() - started)
+            lengths.append(len(asked))
+            errors.append(estimate - ability)
+        select_times, estimate_times = np.array(select_times) * 1e6, np.array(estimate_times) * 1e6
+        self.stdout.write(f'Select question: mean {select_times.mean():.0f} us, '
+                          f'p99 {np.percentile(select_times, 99):.0f} us')
+        self.stdout.write(f'Estimate ability: mean {estimate_times.mean():.0f} us, '
+                          f'p99 {np.percentile(estimate_times, 99):.0f} us')
+        self.stdout.write(f'Questions per session: mean {np.mean(lengths):.1f}, max {max(lengths)} '
+                          f'of {question_count}; ability RMSE {np.sqrt(np.mean(np.square(errors))):.3f}')
@@ -0,0 +1,71 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main_app.bitsets import encode_bitset
+from main_app.grading import build_answer_key
+from main_app.models import TestResults
+
+from ._benchmark import rollback_atomic, create_benchmark_test
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер листа ответов попытки: битовая карта, массив int[] и промежуточная таблица M2M'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 50, 200])
+        parser.add_argument('--attempts', type=int, default=1000)
+
+    def measure_sizes(self, test, attempts: int) -> tuple:
+        answer_key = build_answer_key(test.pk)
+        answers_per_question = len(answer_key.answer_pks) // answer_key.question_count
+        selections = [
+            [
+                answer_key.answer_pks[num * answers_per_question + random.randrange(answers_per_question)]
+                for num in range(answer_key.question_count)
+            ] for _ in range(attempts)
+        ]
+        results = TestResults.objects.bulk_create(
+            TestResults(
+                test=test, user=test.author, score=0,
+                answer_sheet=encode_bitset(answer_key.answer_pks, selected)
+            ) for selected in selections
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT avg(pg_column_size(answer_sheet)) FROM {TestResults._meta.db_table} WHERE test_id = %s',
+                [test.pk]
+            )
+            bitmap = cursor.fetchone()[0]
+            # Так же устроена промежуточная таблица, которую Django создаёт для M2M на ответы
+            cursor.execute(
+                'CREATE TEMP TABLE bench_selected_answers (id bigserial PRIMARY KEY, testresults_id bigint NOT NULL, '
+                'testanswers_id bigint NOT NULL, UNIQUE (testresults_id, testanswers_id))'
+            )
+            cursor.execute('CREATE INDEX ON bench_selected_answers (testanswers_id)')
+            cursor.execute(
+                'INSERT INTO bench_selected_answers (testresults_id, testanswers_id) '
+                'SELECT * FROM unnest(%s::bigint[], %s::bigint[])',
+                [
+                    [result.pk for result, selected in zip(results, selections) for _ in selected],
+                    [answer_pk for selected in selections for answer_pk in selected],
+                ]
+            )
+            cursor.execute(
+                'SELECT avg(pg_column_size(answers)) FROM (SELECT array_agg(testanswers_id::integer) AS answers '
+                'FROM bench_selected_answers GROUP BY testresults_id) AS sheets'
+            )
+            array = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_total_relation_size('bench_selected_answers')")
+            m2m = cursor.fetchone()[0] / attempts
+            cursor.execute('DROP TABLE bench_selected_answers')
+        return bitmap, array, m2m
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"questions":>10} {"bitmap B":>10} {"int[] B":>10} {"m2m B":>10}')
+        with rollback_atomic():
+            for size in options['sizes']:
+                test = create_benchmark_test(size)
+                bitmap, array, m2m = self.measure_sizes(test, options['attempts'])
+                self.stdout.write(f'{size:>10} {bitmap:>10.0f} {array:>10.0f} {m2m:>10.0f}')
@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from main_app.calibration import Responses, calibrate, CALIBRATION_MODELS
+
+
+def simulate_responses(abilities: np.ndarray, difficulties: np.ndarray, discriminations: np.ndarray, tests: int,
+                       tests_per_person: int, rng) -> Responses:
+    """
+    Вопросы делятся на tests тестов поровну, каждый проходящий отвечает на вопросы tests_per_person случайных тестов
+    """
+    test_items = np.array_split(np.arange(len(difficulties)), tests)
+    persons, items = [], []
+    for person_tests in range(tests_per_person):
+        taken = rng.integers(0, tests, len(abilities)) if person_tests else np.arange(len(abilities)) % tests
+        for test, quest_indexes in enumerate(test_items):
+            takers = np.flatnonzero(taken == test)
+            persons.append(np.repeat(takers, len(quest_indexes)))
+            items.append(np.tile(quest_indexes, len(takers)))
+    persons, items = np.concatenate(persons).astype(np.int32), np.concatenate(items).astype(np.int32)
+    probability = 1 / (1 + np.exp(-discriminations[items] * (abilities[persons] - difficulties[items])))
+    return Responses(
+        persons=persons, items=items, correct=rng.random(len(persons)) < probability,
+        person_count=len(abilities), item_count=len(difficulties)
+    )
+
+
+def to_scale(difficulties: np.ndarray, discriminations: np.ndarray) -> tuple:
+    """
+    Переводит истинные параметры на шкалу калибровки: средняя трудность 0, средний логарифм дискриминации 0
+    """
+    scale = np.exp(np.log(discriminations).mean())
+    return scale * (difficulties - difficulties.mean()), discriminations / scale
+
+
+class Command(BaseCommand):
+    help = 'Проверяет сходимость и время калибровки Раша/2PL на синтетических ответах с известными параметрами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persons', type=int, default=100000)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--tests', type=int, default=25)
+        parser.add_argument('--tests-per-person', type=int, default=2)
+        parser.add_argument('--new-persons', type=float, default=0.05,
+                            help='Доля новых проходящих для проверки инкрементального пересчёта')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        abilities = rng.standard_normal(options['persons'])
+        difficulties = rng.standard_normal(options['items'])
+        known_count = int(options['persons'] * (1 - options['new_persons']))
+        self.stdout.write(f'{"model":>6} {"start":>6} {"responses":>10} {"iters":>6} {"s":>7} '
+                          f'{"rmse b":>7} {"rmse a":>7} {"corr theta":>10}')
+        for model in CALIBRATION_MODELS:
+            discriminations = rng.lognormal(0, 0.3, options['items']) if model == '2pl' \
+                else np.ones(options['items'])
+            true_b, true_a = to_scale(difficulties, discriminations)
+            responses = simulate_responses(abilities, difficulties, discriminations, options['tests'],
+                                           options['tests_per_person'], rng)
+            known = responses.persons < known_count
+            previous = Responses(responses.persons[known], responses.items[known], responses.correct[known],
+                                 responses.person_count, responses.item_count)
+            first = calibrate(previous, model)
+            runs = [('cold', previous, None, None), ('cold', responses, None, None),
+                    ('warm', responses, first.difficulties, first.discriminations)]
+            for start, data, start_b, start_a in runs:
+                started = time.perf_counter()
+                calibration = calibrate(data, model, start_b, start_a)
+                elapsed = time.perf_counter() - started
+                fitted = ~np.isnan(calibration.abilities)
+                self.stdout.write(
+                    f'{model:>6} {start:>6} {len(data.correct):>10} {calibration.iterations:>6} {elapsed:>7.2f} '
+                    f'{np.sqrt(np.nanmean((calibration.difficulties - true_b) ** 2)):>7.3f} '
+                    f'{np.sqrt(np.nanmean((calibration.discriminations - true_a) ** 2)):>7.3f} '
+                    f'{np.corrcoef(calibration.abilities[fitted], abilities[fitted])[0, 1]:>10.3f}'
+                    + ('' if calibration.converged else ' not converged')
+                )
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+
+from main_app.facets import count_facets, get_cleaned_filters
+from main_app.filters import TestsFilter
+from main_app.models import Category, Tag, Test, CATALOG_FILTER
+from users_app.models import User
+
+from ._benchmark import rollback_atomic, measure
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает подсчёт фасетов каталога отдельными COUNT на каждое значение с одним сгруппированным запросом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100000, 1000000])
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def create_tests(self, size: int, category_count: int, tag_count: int) -> tuple:
+        author = User.objects.create(username='bench_facets_author')
+        categories = Category.objects.bulk_create(
+            Category(title=f'bench_facets_category {num}') for num in range(category_count)
+        )
+        tags = Tag.objects.bulk_create(Tag(title=f'bench_facets_tag {num}') for num in range(tag_count))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO main_app_test (slug, title, description, author_id, category_id, passed_times,
+                                           is_published, created_at, published_at, is_created,
+                                           question_count, tags_label, author_name)
+                SELECT 'bench-facets-' || i, 'Тест ' || i, '', %(author)s,
+                       (%(categories)s)[1 + i %% %(category_count)s], 0, i %% 10 <> 0, now(), now(), true,
+                       0, '', ''
+                FROM generate_series(1, %(size)s) AS i
+                """,
+                {'author': author.pk, 'categories': [category.pk for category in categories],
+                 'category_count': category_count, 'size': size}
+            )
+            cursor.execute(
+                """
+                INSERT INTO main_app_test_tags (test_id, tag_id)
+                SELECT DISTINCT t.id, (%(tags)s)[1 + (t.id * k) %% %(tag_count)s]
+                FROM main_app_test t, generate_series(1, 3) AS k
+                WHERE t.author_id = %(author)s
+                """,
+                {'tags': [tag.pk for tag in tags], 'tag_count': tag_count, 'author': author.pk}
+            )
+            cursor.execute('ANALYZE main_app_test')
+            cursor.execute('ANALYZE main_app_test_tags')
+        return categories, tags
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"tests":>10} {"filter":>10} {"method":>10} {"queries":>8} {"ms":>10}')
+        for size in options['sizes']:
+            with rollback_atomic():
+                categories, tags = self.create_tests(size, options['categories'], options['tags'])
+                filters = [
+                    ('none', ''),
+                    ('category', f'category={categories[0].pk}'),
+                    ('tags', f'tags={tags[0].pk}&tags={tags[1].pk}'),
+                ]
+                for filter_name, query in filters:
+                    filterset = TestsFilter(QueryDict(query), queryset=Test.objects.filter(CATALOG_FILTER))
+                    cleaned = get_cleaned_filters(filterset)
+                    queryset = filterset.qs.order_by()
+
+                    def per_facet():
+                        return (
+                            [queryset.filter(category=category).count() for category in categories],
+                            [queryset.filter(tags=tag).count() for tag in tags],
+                        )
+
+                    methods = [
+                        ('per-facet', per_facet),
+                        ('grouped', lambda: count_facets(filterset, cleaned)),
+                    ]
+                    for name, func in methods:
+                        queries, elapsed = measure(func, options['repeat'])
+                        self.stdout.write(f'{size:>10} {filter_name:>10} {name:>10} {queries:>8} {elapsed:>10.2f}')
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from main_app.grading import build_answer_key
+from main_app.models import TestQuestions, TestAnswers
+from main_app.snapshots import get_snapshot, get_version_cache_key
+
+from ._benchmark import rollback_atomic, measure, create_benchmark_test
+
+
+def legacy_grade(test_pk: int, questions_resp: dict) -> list:
+    rights_answers = []
+    for quest in TestQuestions.objects.filter(test__pk=test_pk).prefetch_related('answers'):
+        if questions_resp.get(quest.pk) == list(quest.answers.filter(is_right=True).values_list('id', flat=True)):
+            rights_answers.append(quest)
+    return rights_answers
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает проверку ответов по ключу ответов с проверкой запросом на каждый вопрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"questions":>10} {"method":>12} {"queries":>8} {"ms":>10}')
+        with rollback_atomic():
+            for size in options['sizes']:
+                test = create_benchmark_test(size)
+                questions_resp = {
+                    quest_pk: [answer_pk] for answer_pk, quest_pk in
+                    TestAnswers.objects.filter(question__test=test, is_right=True).values_list('pk', 'question_id')
+                }
+                methods = [
+                    ('legacy', lambda: legacy_grade(test.pk, questions_resp)),
+                    ('key cold', lambda: build_answer_key(test.pk).grade(questions_resp)),
+                    ('snapshot', lambda: get_snapshot(test.pk).answer_key.grade(questions_resp)),
+                ]
+                for name, func in methods:
+                    queries, elapsed = measure(func, options['repeat'])
+                    self.stdout.write(f'{size:>10} {name:>12} {queries:>8} {elapsed:>10.2f}')
+                # Тест откатится вместе с транзакцией, а номер его версии остался бы в кеше
+                cache.delete(get_version_cache_key(test.pk))
@@ -0,0 +1,48 @@
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from main_app.analytics import analyze_test, ANALYTICS_CHUNK_SIZE
+from main_app.models import QuestionAnalytics
+
+from ._benchmark import rollback_atomic, create_benchmark_test, create_synthetic_results
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время и пиковую память анализа вопросов теста с большим кол-вом прохождений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=1000000)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--chunk-size', type=int, default=ANALYTICS_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            test = create_benchmark_test(options['questions'], prefix='bench_analysis')
+            difficulties = np.linspace(-2, 2, options['questions'])
+            discriminations = np.ones(options['questions'])
+            # Первый вопрос с ошибкой в ключе: правильно отвечают в основном слабые
+            discriminations[0] = -1
+            started = time.perf_counter()
+            create_synthetic_results(test, options['attempts'], difficulties, discriminations)
+            self.stdout.write(f'Created {options["attempts"]} attempts in {time.perf_counter() - started:.1f}s')
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            statistics = analyze_test(test.pk, options['chunk_size'])
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f'Analyzed {statistics.attempts} attempts in {elapsed:.1f}s, '
+                f'peak memory {peak / 1024 / 1024:.1f} MB, alpha {statistics.alpha:.3f}'
+            )
+            flagged = QuestionAnalytics.objects.filter(question__test=test).order_by('question_id')
+            for num, analytics in enumerate(flagged):
+                if analytics.verdict:
+                    self.stdout.write(
+                        f'Question {num}: p={analytics.difficulty:.2f} r={analytics.discrimination:.2f} '
+                        f'{analytics.verdict}'
+                    )
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main_app.leaderboards import get_board_queryset, get_rank, rebuild_leaderboards
+from main_app.models import TestResults, TestBestAttempt
+from users_app.models import User
+
+from ._benchmark import rollback_atomic, measure, create_benchmark_test
+
+LIVE_TOP_SQL = f"""
+    SELECT user_id, score, completed_at FROM (
+        SELECT DISTINCT ON (user_id) user_id, score, completed_at FROM {TestResults._meta.db_table}
+        WHERE test_id = %s ORDER BY user_id, score DESC, completed_at
+    ) best ORDER BY score DESC, completed_at LIMIT %s
+"""
+LIVE_RANK_SQL = f"""
+    SELECT rank FROM (
+        SELECT user_id, rank() OVER (ORDER BY score DESC, completed_at) AS rank FROM (
+            SELECT DISTINCT ON (user_id) user_id, score, completed_at FROM {TestResults._meta.db_table}
+            WHERE test_id = %s ORDER BY user_id, score DESC, completed_at
+        ) best
+    ) ranks WHERE user_id = %s
+"""
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает таблицу лидеров по лучшим попыткам с расчётом оконными функциями по TestResults'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--results', type=int, default=10000000)
+        parser.add_argument('--tests', type=int, default=100)
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--top', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def create_results(self, options) -> list:
+        users = User.objects.bulk_create(
+            (User(username=f'bench_leader_{num}', password='') for num in range(options['users'])), batch_size=5000
+        )
+        test_pks = [create_benchmark_test(10, prefix='bench_leader').pk for _ in range(options['tests'])]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {TestResults._meta.db_table} (test_id, user_id, score, completed_at, right_questions)
+                SELECT (%(tests)s::bigint[])[1 + i %% %(test_count)s],
+                       (%(users)s::bigint[])[1 + (random() * (%(user_count)s - 1))::integer],
+                       (random() * 100)::integer, now() - random() * interval '365 days', ''::bytea
+                FROM generate_series(1, %(size)s) AS i
+                """,
+                {'tests': test_pks, 'test_count': len(test_pks), 'users': [user.pk for user in users],
+                 'user_count': len(users), 'size': options['results']}
+            )
+        return test_pks
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            started = time.perf_counter()
+            test_pks = self.create_results(options)
+            self.stdout.write(f'Created {options["results"]} results in {time.perf_counter() - started:.1f}s')
+            started = time.perf_counter()
+            rebuild_leaderboards(test_pks)
+            self.stdout.write(f'Built best attempts in {time.perf_counter() - started:.1f}s')
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {TestResults._meta.db_table}')
+                cursor.execute(f'ANALYZE {TestBestAttempt._meta.db_table}')
+
+            test_pk = test_pks[0]
+            board = get_board_queryset(TestBestAttempt, test_id=test_pk)
+            entry = board[board.count() // 2]
+
+            def live(sql: str, params: list):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    return cursor.fetchall()
+
+            methods = [
+                ('live top', lambda: live(LIVE_TOP_SQL, [test_pk, options['top']])),
+                ('table top', lambda: list(board[:options['top']])),
+                ('live rank', lambda: live(LIVE_RANK_SQL, [test_pk, entry.user_id])),
+                ('table rank', lambda: get_rank(entry)),
+            ]
+            self.stdout.write(f'{"method":>12} {"queries":>8} {"ms":>10}')
+            for name, func in methods:
+                queries, elapsed = measure(func, options['repeat'])
+                self.stdout.write(f'{name:>12} {queries:>8} {elapsed:>10.2f}')
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from main_app.counters import increment_passed_times, flush_passed_times, get_passed_times
+from main_app.models import Test
+
+from ._benchmark import create_benchmark_test
+
+
+def legacy_increment(test_pk: int) -> None:
+    test = Test.objects.get(pk=test_pk)
+    test.passed_times = F('passed_times') + 1
+    test.save()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает блокировки при одновременных прохождениях одного теста: '
+            'UPDATE строки теста и шардированный счётчик')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--submissions', type=int, default=50, help='Прохождений на одного воркера')
+        parser.add_argument('--hold-ms', type=float, default=5, help='Время транзакции после инкремента')
+
+    def run_workers(self, increment, test_pk: int, options: dict) -> tuple:
+        waits = []
+        lock = threading.Lock()
+
+        def worker():
+            worker_waits = []
+            try:
+                for _ in range(options['submissions']):
+                    with transaction.atomic():
+                        started = time.perf_counter()
+                        increment(test_pk)
+                        worker_waits.append(time.perf_counter() - started)
+                        time.sleep(options['hold_ms'] / 1000)
+            finally:
+                connection.close()
+            with lock:
+                waits.extend(worker_waits)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        waits.sort()
+        return elapsed, waits[len(waits) // 2] * 1000, waits[int(len(waits) * 0.99)] * 1000
+
+    def handle(self, *args, **options):
+        test = create_benchmark_test(1, prefix='bench_passed_times')
+        total = options['workers'] * options['submissions']
+        self.stdout.write(f'{"method":>10} {"total s":>8} {"subm/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"value":>6}')
+        try:
+            for name, increment in [('legacy', legacy_increment), ('sharded', increment_passed_times)]:
+                Test.objects.filter(pk=test.pk).update(passed_times=0)
+                elapsed, p50, p99 = self.run_workers(increment, test.pk, options)
+                flush_passed_times()
+                self.stdout.write(
+                    f'{name:>10} {elapsed:>8.2f} {total / elapsed:>8.0f} {p50:>8.2f} {p99:>8.2f} '
+                    f'{get_passed_times(test.pk):>6}'
+                )
+        finally:
+            test.author.delete()
+            test.category.delete()
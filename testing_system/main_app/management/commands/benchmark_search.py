@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main_app.models import Category, Test
+from main_app.search import search_tests, update_search_vector
+from users_app.models import User
+
+from ._benchmark import rollback_atomic, measure
+
+WORDS = [
+    'история', 'математика', 'физика', 'химия', 'биология', 'география', 'литература', 'python', 'django',
+    'алгебра', 'геометрия', 'экономика', 'право', 'музыка', 'искусство', 'астрономия', 'информатика',
+    'философия', 'психология', 'социология', 'статистика', 'анатомия', 'генетика', 'экология',
+]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск тестов через icontains с полнотекстовым и триграммным поиском'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def create_tests(self, size: int) -> None:
+        author = User.objects.create(username='bench_search_author')
+        category = Category.objects.create(title='bench_search_category')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO main_app_test (slug, title, description, author_id, category_id, passed_times,
+                                           is_published, created_at, published_at, is_created)
+                SELECT 'bench-search-' || i,
+                       (%(words)s)[1 + i %% %(count)s] || ' ' || (%(words)s)[1 + (i * 7) %% %(count)s] || ' ' || i,
+                       'Тест по теме ' || (%(words)s)[1 + (i * 13) %% %(count)s],
+                       %(author)s, %(category)s, 0, true, now(), now(), true
+                FROM generate_series(1, %(size)s) AS i
+                """,
+                {'words': WORDS, 'count': len(WORDS), 'author': author.pk, 'category': category.pk, 'size': size}
+            )
+        update_search_vector(Test.objects.filter(author=author))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE main_app_test')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"tests":>10} {"method":>10} {"found":>8} {"ms":>10}')
+        for size in options['sizes']:
+            with rollback_atomic():
+                self.create_tests(size)
+                queryset = Test.objects.filter(is_published=True, is_created=True)
+                methods = [
+                    ('icontains', lambda: queryset.filter(title__icontains='физика')),
+                    ('fts', lambda: search_tests(queryset, 'физика')),
+                    ('trigram', lambda: search_tests(queryset, 'фезика')),
+                ]
+                for name, get_queryset in methods:
+                    def run():
+                        tests = get_queryset()
+                        return tests.count(), list(tests.values_list('pk', flat=True)[:20])
+                    found = run()[0]
+                    _, elapsed = measure(run, options['repeat'])
+                    self.stdout.write(f'{size:>10} {name:>10} {found:>8} {elapsed:>10.2f}')
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from main_app.snapshots import get_snapshot
+from main_app.views import TestingBeginningView
+
+from ._benchmark import rollback_atomic, measure, create_benchmark_test
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает рендер страницы прохождения теста с кешированным фрагментом вопросов и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 200, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"questions":>10} {"method":>12} {"queries":>8} {"ms":>10} {"kb":>8}')
+        view = TestingBeginningView.as_view()
+        with rollback_atomic():
+            for size in options['sizes']:
+                test = create_benchmark_test(size, prefix='bench_start')
+                snapshot = get_snapshot(test.pk)
+                fragment_key = make_template_fragment_key('start_test_questions', [test.pk, snapshot.version])
+
+                def render():
+                    request = RequestFactory().get(f'/tests/start/{test.pk}/')
+                    request.user = test.author
+                    return view(request, test_pk=test.pk).render()
+
+                def uncached():
+                    cache.delete(fragment_key)
+                    return render()
+
+                methods = [('no fragment', uncached), ('fragment', render)]
+                for name, func in methods:
+                    queries, elapsed = measure(func, options['repeat'])
+                    size_kb = len(func().content) / 1024
+                    self.stdout.write(f'{size:>10} {name:>12} {queries:>8} {elapsed:>10.2f} {size_kb:>8.0f}')
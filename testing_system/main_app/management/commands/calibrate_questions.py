@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.calibration import (calibrate_questions, CALIBRATION_MODELS, CALIBRATION_MAX_ITERATIONS,
+                                  CALIBRATION_TOLERANCE)
+
+
+class Command(BaseCommand):
+    help = 'Калибрует трудность и различающую способность вопросов по модели Раша или 2PL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_pks', nargs='*', type=int, help='По умолчанию калибруется весь банк вопросов')
+        parser.add_argument('--model', choices=CALIBRATION_MODELS, default='rasch')
+        parser.add_argument('--cold', action='store_true', help='Не использовать предыдущие параметры')
+        parser.add_argument('--max-iterations', type=int, default=CALIBRATION_MAX_ITERATIONS)
+        parser.add_argument('--tolerance', type=float, default=CALIBRATION_TOLERANCE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        calibration = calibrate_questions(
+            options['test_pks'] or None, options['model'], not options['cold'],
+            options['max_iterations'], options['tolerance']
+        )
+        self.stdout.write(
+            f'Calibrated {int(calibration.calibrated.sum())} of {len(calibration.calibrated)} questions '
+            f'in {calibration.iterations} iterations ({time.perf_counter() - started:.2f}s)'
+            + ('' if calibration.converged else ', not converged')
+        )
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.counters import flush_passed_times
+
+
+class Command(BaseCommand):
+    help = 'Переносит накопленные счётчики прохождений в Test.passed_times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Повторять перенос каждые N секунд')
+
+    def handle(self, *args, **options):
+        while True:
+            updated = flush_passed_times()
+            self.stdout.write(f'Flushed passed_times for {updated} tests')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
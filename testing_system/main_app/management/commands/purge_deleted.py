@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.purge import (purge_deleted, purge_abandoned_questions, ABANDONED_DRAFT_DAYS, PURGE_CHUNK_SIZE,
+                            PURGE_MODELS)
+
+
+class Command(BaseCommand):
+    help = 'Окончательно удаляет помеченные на удаление тесты, теги и категории и вопросы брошенных тестов пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+        parser.add_argument('--interval', type=float, default=0, help='Повторять удаление каждые N секунд')
+        parser.add_argument('--abandoned-days', type=int, default=ABANDONED_DRAFT_DAYS,
+                            help='Через сколько дней без изменений незавершённый тест считается брошенным')
+
+    def progress(self, model, purged: int, rows: int) -> None:
+        self.stdout.write(f'{model._meta.verbose_name_plural}: purged {purged} ({rows} rows with related)')
+
+    def handle(self, *args, **options):
+        while True:
+            for model in PURGE_MODELS:
+                purge_deleted(model, options['chunk_size'], self.progress)
+            purged = purge_abandoned_questions(options['abandoned_days'], options['chunk_size'])
+            if purged:
+                self.stdout.write(f'Abandoned questions: purged {purged}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.histograms import rebuild_histograms, HISTOGRAM_REBUILD_CHUNK_SIZE
+from main_app.models import Test
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает распределения баллов тестов по сохранённым результатам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_pks', nargs='*', type=int)
+        parser.add_argument('--all', action='store_true', help='Пересобрать распределения всех тестов')
+        parser.add_argument('--chunk-size', type=int, default=HISTOGRAM_REBUILD_CHUNK_SIZE)
+
+    def iter_chunks(self, chunk_size: int):
+        last_pk = 0
+        while True:
+            test_pks = list(
+                Test.all_objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not test_pks:
+                return
+            last_pk = test_pks[-1]
+            yield test_pks
+
+    def handle(self, *args, **options):
+        if options['all']:
+            chunks = self.iter_chunks(options['chunk_size'])
+        elif options['test_pks']:
+            chunks = [options['test_pks']]
+        else:
+            raise CommandError('Specify test ids or --all')
+        total = 0
+        for test_pks in chunks:
+            total += rebuild_histograms(test_pks)
+            self.stdout.write(f'Rebuilt histograms up to test #{test_pks[-1]}: {total} tests with results')
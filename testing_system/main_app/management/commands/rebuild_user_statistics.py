@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.user_statistics import rebuild_user_statistics, USER_STATISTICS_REBUILD_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает статистику пользователей по сохранённым результатам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_pks', nargs='*', type=int)
+        parser.add_argument('--all', action='store_true', help='Пересобрать статистику всех пользователей')
+        parser.add_argument('--chunk-size', type=int, default=USER_STATISTICS_REBUILD_CHUNK_SIZE)
+
+    def iter_chunks(self, chunk_size: int):
+        last_pk = 0
+        while True:
+            user_pks = list(
+                get_user_model().objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_pks:
+                return
+            last_pk = user_pks[-1]
+            yield user_pks
+
+    def handle(self, *args, **options):
+        if options['all']:
+            chunks = self.iter_chunks(options['chunk_size'])
+        elif options['user_pks']:
+            chunks = [options['user_pks']]
+        else:
+            raise CommandError('Specify user ids or --all')
+        total = 0
+        for user_pks in chunks:
+            total += rebuild_user_statistics(user_pks)
+            self.stdout.write(f'Rebuilt statistics up to user #{user_pks[-1]}: {total} users with results')
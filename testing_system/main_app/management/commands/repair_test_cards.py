@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main_app.cards import repair_test_cards, CARD_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные поля карточек тестов (кол-во вопросов, теги, автор)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CARD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        updated = repair_test_cards(options['chunk_size'])
+        self.stdout.write(f'Repaired {updated} tests')
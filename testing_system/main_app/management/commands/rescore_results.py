@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.models import Test
+from main_app.scoring import rescore_test, RESCORE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает результаты прохождения тестов по текущему ключу ответов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('test_pks', nargs='*', type=int)
+        parser.add_argument('--all', action='store_true', help='Пересчитать результаты всех тестов')
+        parser.add_argument('--chunk-size', type=int, default=RESCORE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            test_pks = Test.objects.filter(results__isnull=False).distinct().values_list('pk', flat=True)
+        elif options['test_pks']:
+            test_pks = options['test_pks']
+        else:
+            raise CommandError('Specify test ids or --all')
+        for test_pk in test_pks:
+            started = time.perf_counter()
+            stats = rescore_test(test_pk, options['chunk_size'])
+            self.stdout.write(
+                f'Test #{test_pk}: {stats["results"]} results, {stats["changed"]} changed '
+                f'in {time.perf_counter() - started:.2f}s'
+            )
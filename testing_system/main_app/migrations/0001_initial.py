@@ -0,0 +1,111 @@
+# Generated by Django 4.1.3 on 2026-10-18 10:57
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import main_app.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255, verbose_name='Слаг')),
+                ('title', models.CharField(max_length=255, unique=True, verbose_name='Название')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлен')),
+            ],
+            options={
+                'verbose_name': 'Категория теста',
+                'verbose_name_plural': 'Категории тестов',
+                'ordering': ['title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255, verbose_name='Слаг')),
+                ('title', models.CharField(max_length=255, unique=True, verbose_name='Название')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлен')),
+            ],
+            options={
+                'verbose_name': 'Тег теста',
+                'verbose_name_plural': 'Теги тестов',
+                'ordering': ['title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Test',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255, verbose_name='Слаг')),
+                ('title', models.CharField(max_length=255, verbose_name='Название')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('passed_times', models.PositiveIntegerField(default=0, verbose_name='Раз пройдено')),
+                ('is_published', models.BooleanField(default=False, verbose_name='Опубликовано')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('published_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата публикации')),
+                ('is_created', models.BooleanField(default=False, verbose_name='Создан')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tests', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tests', to='main_app.category', verbose_name='Категория')),
+                ('tags', models.ManyToManyField(blank=True, related_name='tests', to='main_app.tag', verbose_name='Теги')),
+            ],
+            options={
+                'verbose_name': 'Тест',
+                'verbose_name_plural': 'Тесты',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TestQuestions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField(max_length=500, verbose_name='Вопрос')),
+                ('image', models.ImageField(blank=True, null=True, upload_to=main_app.models.question_image_path, verbose_name='Изображение')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Вопрос теста',
+                'verbose_name_plural': 'Вопросы тестов',
+            },
+        ),
+        migrations.CreateModel(
+            name='TestResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(validators=[django.core.validators.MaxLengthValidator(100), django.core.validators.MinLengthValidator(0)], verbose_name='Результат')),
+                ('completed_at', models.DateTimeField(auto_now_add=True, verbose_name='Пройден')),
+                ('right_answers', models.ManyToManyField(related_name='results', to='main_app.testquestions', verbose_name='Правильные ответы')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='main_app.test', verbose_name='Тест')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Результат теста',
+                'verbose_name_plural': 'Результаты тестов',
+                'ordering': ['-completed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TestAnswers',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.TextField(verbose_name='Ответ')),
+                ('is_right', models.BooleanField(default=False, verbose_name='Правильный')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='main_app.testquestions', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Ответ теста',
+                'verbose_name_plural': 'Ответы тестов',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestPassedCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Шард')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Не учтённые прохождения')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passed_counters', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Счётчик прохождений теста',
+                'verbose_name_plural': 'Счётчики прохождений тестов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testpassedcounter',
+            constraint=models.UniqueConstraint(fields=('test', 'shard'), name='unique_test_passed_counter_shard'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0002_testpassedcounter'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='test',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='test_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='test_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE main_app_test t SET search_vector =
+                    setweight(to_tsvector('russian', coalesce(t.title, '')), 'A') ||
+                    setweight(to_tsvector('russian', coalesce(t.description, '')), 'B') ||
+                    setweight(to_tsvector('russian', coalesce(
+                        (SELECT c.title FROM main_app_category c WHERE c.id = t.category_id), ''
+                    )), 'C') ||
+                    setweight(to_tsvector('russian', coalesce(
+                        (SELECT string_agg(tg.title, ' ') FROM main_app_test_tags tt
+                         JOIN main_app_tag tg ON tg.id = tt.tag_id WHERE tt.test_id = t.id), ''
+                    )), 'C')
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
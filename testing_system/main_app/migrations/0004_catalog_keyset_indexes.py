@@ -0,0 +1,37 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0003_test_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_created', True)), fields=['created_at', 'id'], name='test_catalog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_created', True)), fields=['published_at', 'id'], name='test_catalog_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_created', True)), fields=['passed_times', 'id'], name='test_catalog_passed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_created', True)), fields=['title', 'id'], name='test_catalog_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='test_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testresults',
+            index=models.Index(fields=['user', 'completed_at', 'id'], name='result_user_completed_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0004_catalog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='author_name',
+            field=models.CharField(blank=True, editable=False, max_length=150, verbose_name='Имя автора'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кол-во вопросов'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='tags_label',
+            field=models.TextField(blank=True, editable=False, verbose_name='Список тегов'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE main_app_test t SET
+                    question_count = (SELECT count(*) FROM main_app_testquestions q WHERE q.test_id = t.id),
+                    tags_label = coalesce((SELECT string_agg(tg.title, ', ' ORDER BY tg.title) FROM main_app_test_tags tt
+                                           JOIN main_app_tag tg ON tg.id = tt.tag_id WHERE tt.test_id = t.id), ''),
+                    author_name = (SELECT u.username FROM users_app_user u WHERE u.id = t.author_id)
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
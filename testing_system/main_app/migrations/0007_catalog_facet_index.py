@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0006_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_created', True)), fields=['category', 'id'], name='test_catalog_category_idx'),
+        ),
+    ]
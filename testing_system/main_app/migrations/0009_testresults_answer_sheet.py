@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0008_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testresults',
+            name='answer_sheet',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Выбранные ответы'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0009_testresults_answer_sheet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testresults',
+            name='right_questions',
+            field=models.BinaryField(blank=True, default=b'', verbose_name='Правильные ответы'),
+        ),
+        # Бит i - i-й вопрос теста по возрастанию pk, старший бит байта - первый
+        migrations.RunSQL(
+            sql="""
+                UPDATE main_app_testresults r SET right_questions = coalesce((
+                    SELECT decode(string_agg(lpad(to_hex(b.value), 2, '0'), '' ORDER BY b.num), 'hex')
+                    FROM (
+                        SELECT q.ord / 8 AS num,
+                               sum(CASE WHEN ra.id IS NULL THEN 0 ELSE 128 >> (q.ord % 8)::integer END)::integer AS value
+                        FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS ord
+                              FROM main_app_testquestions WHERE test_id = r.test_id) q
+                        LEFT JOIN main_app_testresults_right_answers ra
+                            ON ra.testquestions_id = q.id AND ra.testresults_id = r.id
+                        GROUP BY q.ord / 8
+                    ) b
+                ), '\\x'::bytea)
+            """,
+            reverse_sql="""
+                INSERT INTO main_app_testresults_right_answers (testresults_id, testquestions_id)
+                SELECT r.id, q.id FROM main_app_testresults r
+                JOIN LATERAL (SELECT id, row_number() OVER (ORDER BY id) - 1 AS ord
+                              FROM main_app_testquestions WHERE test_id = r.test_id) q ON true
+                WHERE q.ord / 8 < length(r.right_questions)
+                  AND get_bit(r.right_questions, (q.ord / 8 * 8 + 7 - q.ord % 8)::integer) = 1
+            """
+        ),
+        migrations.RemoveField(
+            model_name='testresults',
+            name='right_answers',
+        ),
+    ]
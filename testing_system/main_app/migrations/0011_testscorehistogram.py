@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:45
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0010_testresults_right_questions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestScoreHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Шард')),
+                ('buckets', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), size=101, verbose_name='Кол-во результатов по баллам')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_histograms', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Распределение баллов теста',
+                'verbose_name_plural': 'Распределения баллов тестов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testscorehistogram',
+            constraint=models.UniqueConstraint(fields=('test', 'shard'), name='unique_test_score_histogram_shard'),
+        ),
+    ]
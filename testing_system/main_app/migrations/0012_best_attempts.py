@@ -0,0 +1,61 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main_app', '0011_testscorehistogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestBestAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(verbose_name='Лучший результат')),
+                ('completed_at', models.DateTimeField(verbose_name='Пройден')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_attempts', to='main_app.test', verbose_name='Тест')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Лучший результат по тесту',
+                'verbose_name_plural': 'Лучшие результаты по тестам',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryBestAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(verbose_name='Лучший результат')),
+                ('completed_at', models.DateTimeField(verbose_name='Пройден')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_attempts', to='main_app.category', verbose_name='Категория')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_best_attempts', to='main_app.test', verbose_name='Тест')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Лучший результат по категории',
+                'verbose_name_plural': 'Лучшие результаты по категориям',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='testbestattempt',
+            index=models.Index(models.F('test'), models.OrderBy(models.F('score'), descending=True), models.F('completed_at'), models.F('id'), name='test_best_attempt_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='testbestattempt',
+            constraint=models.UniqueConstraint(fields=('test', 'user'), name='unique_test_best_attempt'),
+        ),
+        migrations.AddIndex(
+            model_name='categorybestattempt',
+            index=models.Index(models.F('category'), models.OrderBy(models.F('score'), descending=True), models.F('completed_at'), models.F('id'), name='category_best_attempt_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='categorybestattempt',
+            constraint=models.UniqueConstraint(fields=('category', 'user'), name='unique_category_best_attempt'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0012_best_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(verbose_name='Учтено прохождений')),
+                ('mean_score', models.FloatField(verbose_name='Средний балл')),
+                ('alpha', models.FloatField(blank=True, null=True, verbose_name='Альфа Кронбаха')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Рассчитано')),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Анализ теста',
+                'verbose_name_plural': 'Анализ тестов',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(verbose_name='Учтено прохождений')),
+                ('difficulty', models.FloatField(verbose_name='Доля правильных ответов')),
+                ('discrimination', models.FloatField(blank=True, null=True, verbose_name='Точечно-бисериальная корреляция')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Рассчитано')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='main_app.testquestions', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Анализ вопроса',
+                'verbose_name_plural': 'Анализ вопросов',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0013_item_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testquestions',
+            name='irt_calibrated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата калибровки'),
+        ),
+        migrations.AddField(
+            model_name='testquestions',
+            name='irt_difficulty',
+            field=models.FloatField(blank=True, null=True, verbose_name='Трудность (IRT)'),
+        ),
+        migrations.AddField(
+            model_name='testquestions',
+            name='irt_discrimination',
+            field=models.FloatField(blank=True, null=True, verbose_name='Различающая способность (IRT)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0014_testquestions_irt_params'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='is_adaptive',
+            field=models.BooleanField(default=False, help_text='Вопросы выдаются по одному с подбором трудности под проходящего', verbose_name='Адаптивный режим'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0015_test_is_adaptive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='0 - тест изменён после последней сборки снимка', verbose_name='Версия снимка'),
+        ),
+        migrations.AddField(
+            model_name='testresults',
+            name='test_version',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Версия теста'),
+        ),
+        migrations.CreateModel(
+            name='TestSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Версия')),
+                ('payload', models.JSONField(verbose_name='Содержимое')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата сборки')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Снимок теста',
+                'verbose_name_plural': 'Снимки тестов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testsnapshot',
+            constraint=models.UniqueConstraint(fields=('test', 'version'), name='unique_test_snapshot_version'),
+        ),
+    ]
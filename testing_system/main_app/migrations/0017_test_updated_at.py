@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-18 15:40
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_updated_at(apps, schema_editor):
+    Test = apps.get_model('main_app', 'Test')
+    Test.objects.update(updated_at=Coalesce('published_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0016_test_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Queryset.update() не обновляет поле, его задают явно', verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-18 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main_app', '0017_test_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Кол-во попыток')),
+                ('score_sum', models.PositiveBigIntegerField(default=0, verbose_name='Сумма баллов')),
+                ('best_score', models.PositiveIntegerField(default=0, verbose_name='Лучший балл')),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя попытка')),
+                ('categories', models.JSONField(default=dict, help_text='pk категории -> {"title", "attempts", "score_sum"}', verbose_name='По категориям')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0018_user_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testresults',
+            name='asked_questions',
+            field=models.BinaryField(blank=True, help_text='Только у адаптивных попыток, в обычной попытке заданы все вопросы версии теста', null=True, verbose_name='Заданные вопросы'),
+        ),
+    ]
@@ -1,10 +1,29 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.db import models
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django.utils.timezone import now
 from django_unique_slugify import slugify, unique_slugify
 from unidecode import unidecode
 
+from .bitsets import decode_bitset, complement_bitset, count_bitset, has_bit
+
+
+CATALOG_FILTER = models.Q(is_published=True) & models.Q(is_created=True)
+
+
+class SoftDeleteManager(models.Manager):
+    """
+    Менеджер по умолчанию скрывает помеченные на удаление записи.
+    Сами записи позже удаляет команда purge_deleted, для неё используется all_objects.
+    """
+
+    def get_queryset(self):
+        return super(SoftDeleteManager, self).get_queryset().filter(is_deleted=False)
+
 
 def question_image_path(instance, filename):
     return f'img/{instance.test}/questions_img/{filename}'
@@ -25,10 +44,22 @@ class Category(models.Model):
         auto_now_add=True
     )
 
+    is_deleted = models.BooleanField(
+        verbose_name='Удалено',
+        default=False
+    )
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = 'Категория теста'
         verbose_name_plural = 'Категории тестов'
         ordering = ['title']
+        indexes = [
+            # Поиск по префиксу без учёта регистра (istartswith) для автодополнения
+            models.Index(OpClass(Upper('title'), name='text_pattern_ops'), name='category_title_prefix_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.pk:
@@ -54,10 +85,22 @@ class Tag(models.Model):
         auto_now_add=True
     )
 
+    is_deleted = models.BooleanField(
+        verbose_name='Удалено',
+        default=False
+    )
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = 'Тег теста'
         verbose_name_plural = 'Теги тестов'
         ordering = ['title']
+        indexes = [
+            # Поиск по префиксу без учёта регистра (istartswith) для автодополнения
+            models.Index(OpClass(Upper('title'), name='text_pattern_ops'), name='tag_title_prefix_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.pk:
@@ -108,6 +151,21 @@ class TestQuestions(models.Model):
         blank=True,
         null=True
     )
+    irt_difficulty = models.FloatField(
+        verbose_name='Трудность (IRT)',
+        blank=True,
+        null=True
+    )
+    irt_discrimination = models.FloatField(
+        verbose_name='Различающая способность (IRT)',
+        blank=True,
+        null=True
+    )
+    irt_calibrated_at = models.DateTimeField(
+        verbose_name='Дата калибровки',
+        blank=True,
+        null=True
+    )
 
     class Meta:
         verbose_name = 'Вопрос теста'
@@ -165,15 +223,73 @@ class Test(models.Model):
         blank=True,
         null=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        help_text='Queryset.update() не обновляет поле, его задают явно'
+    )
     is_created = models.BooleanField(
         verbose_name='Создан',
         default=False
     )
+    is_adaptive = models.BooleanField(
+        verbose_name='Адаптивный режим',
+        default=False,
+        help_text='Вопросы выдаются по одному с подбором трудности под проходящего'
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        editable=False,
+        null=True
+    )
+    question_count = models.PositiveIntegerField(
+        verbose_name='Кол-во вопросов',
+        editable=False,
+        default=0
+    )
+    tags_label = models.TextField(
+        verbose_name='Список тегов',
+        editable=False,
+        blank=True
+    )
+    author_name = models.CharField(
+        verbose_name='Имя автора',
+        max_length=150,
+        editable=False,
+        blank=True
+    )
+    snapshot_version = models.PositiveIntegerField(
+        verbose_name='Версия снимка',
+        editable=False,
+        default=0,
+        help_text='0 - тест изменён после последней сборки снимка'
+    )
+
+    is_deleted = models.BooleanField(
+        verbose_name='Удалено',
+        default=False
+    )
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Тест'
         verbose_name_plural = 'Тесты'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='test_search_vector_idx'),
+            GinIndex(fields=['title'], name='test_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['created_at', 'id'], name='test_catalog_created_idx', condition=CATALOG_FILTER),
+            models.Index(fields=['published_at', 'id'], name='test_catalog_published_idx', condition=CATALOG_FILTER),
+            models.Index(fields=['passed_times', 'id'], name='test_catalog_passed_idx', condition=CATALOG_FILTER),
+            models.Index(fields=['title', 'id'], name='test_catalog_title_idx', condition=CATALOG_FILTER),
+            # Фасетные счётчики по категориям: GROUP BY category_id через index-only scan
+            models.Index(fields=['category', 'id'], name='test_catalog_category_idx', condition=CATALOG_FILTER),
+            models.Index(fields=['author', 'created_at', 'id'], name='test_author_created_idx'),
+            # Очередь команды purge_deleted
+            models.Index(fields=['id'], name='test_deleted_idx', condition=models.Q(is_deleted=True)),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.pk:
@@ -189,6 +305,39 @@ class Test(models.Model):
         return self.title
 
 
+class TestSnapshot(models.Model):
+    """
+    Неизменяемая версия теста: вопросы, ответы, изображения и ключ ответов одним JSON.
+    Прохождение и проверка читают только снимок, поэтому правки теста не влияют на начатые попытки
+    """
+    test = models.ForeignKey(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия'
+    )
+    payload = models.JSONField(
+        verbose_name='Содержимое'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата сборки',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Снимок теста'
+        verbose_name_plural = 'Снимки тестов'
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'version'], name='unique_test_snapshot_version'),
+        ]
+
+    def __str__(self):
+        return f'{self.test} v{self.version}'
+
+
 class TestResults(models.Model):
     test = models.ForeignKey(
         verbose_name='Тест',
@@ -206,20 +355,333 @@ class TestResults(models.Model):
         verbose_name='Результат',
         validators=[MaxLengthValidator(100), MinLengthValidator(0)]
     )
-    right_answers = models.ManyToManyField(
+    right_questions = models.BinaryField(
         verbose_name='Правильные ответы',
-        to=TestQuestions,
-        related_name='results'
+        blank=True,
+        default=b''
     )
     completed_at = models.DateTimeField(
         verbose_name='Пройден',
         auto_now_add=True
     )
+    answer_sheet = models.BinaryField(
+        verbose_name='Выбранные ответы',
+        blank=True,
+        null=True
+    )
+    test_version = models.PositiveIntegerField(
+        verbose_name='Версия теста',
+        blank=True,
+        null=True
+    )
+    asked_questions = models.BinaryField(
+        verbose_name='Заданные вопросы',
+        help_text='Только у адаптивных попыток, в обычной попытке заданы все вопросы версии теста',
+        blank=True,
+        null=True
+    )
 
     class Meta:
         verbose_name = 'Результат теста'
         verbose_name_plural = 'Результаты тестов'
         ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['user', 'completed_at', 'id'], name='result_user_completed_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user}: Test-{self.test}'
+
+    def get_test_questions(self) -> tuple:
+        """
+        Вопросы версии теста, по которой пройдена попытка, в порядке битов right_questions.
+        Снимок читается из кеша процесса, попытки без версии - по текущей версии теста
+        """
+        # snapshots импортирует модели, поэтому импорт здесь
+        from .snapshots import get_snapshot
+        return get_snapshot(self.test_id, self.test_version).questions
+
+    def get_asked_questions(self) -> list:
+        questions = self.get_test_questions()
+        if self.asked_questions is None:
+            return list(questions)
+        return decode_bitset(questions, self.asked_questions)
+
+    def get_right_questions(self) -> list:
+        return decode_bitset(self.get_test_questions(), self.right_questions)
+
+    def get_wrong_questions(self) -> list:
+        if self.asked_questions is None:
+            return complement_bitset(self.get_test_questions(), self.right_questions)
+        # Вопросы, не заданные в адаптивной попытке, не считаются неверными
+        asked_questions, right_questions = bytes(self.asked_questions), bytes(self.right_questions or b'')
+        return [
+            quest for num, quest in enumerate(self.get_test_questions())
+            if has_bit(asked_questions, num) and not has_bit(right_questions, num)
+        ]
+
+    @property
+    def right_count(self) -> int:
+        return count_bitset(self.right_questions)
+
+
+class TestPassedCounter(models.Model):
+    test = models.ForeignKey(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='passed_counters'
+    )
+    shard = models.PositiveSmallIntegerField(
+        verbose_name='Шард'
+    )
+    count = models.PositiveIntegerField(
+        verbose_name='Не учтённые прохождения',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Счётчик прохождений теста'
+        verbose_name_plural = 'Счётчики прохождений тестов'
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'shard'], name='unique_test_passed_counter_shard')
+        ]
+
+    def __str__(self):
+        return f'{self.test} shard: #{self.shard}'
+
+
+class TestScoreHistogram(models.Model):
+    test = models.ForeignKey(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='score_histograms'
+    )
+    shard = models.PositiveSmallIntegerField(
+        verbose_name='Шард'
+    )
+    buckets = ArrayField(
+        models.PositiveIntegerField(),
+        verbose_name='Кол-во результатов по баллам',
+        size=101
+    )
+
+    class Meta:
+        verbose_name = 'Распределение баллов теста'
+        verbose_name_plural = 'Распределения баллов тестов'
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'shard'], name='unique_test_score_histogram_shard')
+        ]
+
+    def __str__(self):
+        return f'{self.test} shard: #{self.shard}'
+
+
+class BestAttempt(models.Model):
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to='users_app.User',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.PositiveIntegerField(
+        verbose_name='Лучший результат'
+    )
+    completed_at = models.DateTimeField(
+        verbose_name='Пройден'
+    )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f'{self.user_id}: {self.score}'
+
+
+class TestBestAttempt(BestAttempt):
+    test = models.ForeignKey(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='best_attempts'
+    )
+
+    class Meta:
+        verbose_name = 'Лучший результат по тесту'
+        verbose_name_plural = 'Лучшие результаты по тестам'
+        constraints = [
+            models.UniqueConstraint(fields=['test', 'user'], name='unique_test_best_attempt')
+        ]
+        indexes = [
+            # Таблица лидеров теста: лучший балл, затем более раннее прохождение
+            models.Index(
+                'test', models.F('score').desc(), 'completed_at', 'id', name='test_best_attempt_rank_idx'
+            ),
+        ]
+
+
+class CategoryBestAttempt(BestAttempt):
+    category = models.ForeignKey(
+        verbose_name='Категория',
+        to=Category,
+        on_delete=models.CASCADE,
+        related_name='best_attempts'
+    )
+    test = models.ForeignKey(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='category_best_attempts'
+    )
+
+    class Meta:
+        verbose_name = 'Лучший результат по категории'
+        verbose_name_plural = 'Лучшие результаты по категориям'
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'user'], name='unique_category_best_attempt')
+        ]
+        indexes = [
+            models.Index(
+                'category', models.F('score').desc(), 'completed_at', 'id', name='category_best_attempt_rank_idx'
+            ),
+        ]
+
+
+class TestAnalytics(models.Model):
+    test = models.OneToOneField(
+        verbose_name='Тест',
+        to=Test,
+        on_delete=models.CASCADE,
+        related_name='analytics'
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Учтено прохождений'
+    )
+    mean_score = models.FloatField(
+        verbose_name='Средний балл'
+    )
+    alpha = models.FloatField(
+        verbose_name='Альфа Кронбаха',
+        blank=True,
+        null=True
+    )
+    computed_at = models.DateTimeField(
+        verbose_name='Рассчитано',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Анализ теста'
+        verbose_name_plural = 'Анализ тестов'
+
+    def __str__(self):
+        return f'{self.test} analytics'
+
+
+class QuestionAnalytics(models.Model):
+    TRIVIAL_DIFFICULTY = 0.95
+    HARD_DIFFICULTY = 0.2
+    LOW_DISCRIMINATION = 0.1
+
+    question = models.OneToOneField(
+        verbose_name='Вопрос',
+        to=TestQuestions,
+        on_delete=models.CASCADE,
+        related_name='analytics'
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Учтено прохождений'
+    )
+    difficulty = models.FloatField(
+        verbose_name='Доля правильных ответов'
+    )
+    discrimination = models.FloatField(
+        verbose_name='Точечно-бисериальная корреляция',
+        blank=True,
+        null=True
+    )
+    computed_at = models.DateTimeField(
+        verbose_name='Рассчитано',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Анализ вопроса'
+        verbose_name_plural = 'Анализ вопросов'
+
+    def __str__(self):
+        return f'{self.question} analytics'
+
+    @property
+    def verdict(self) -> str:
+        """
+        Вопросы с отрицательной или низкой корреляцией с остальным тестом скорее всего сформулированы
+        неоднозначно или имеют неверный ключ, слишком лёгкие и слишком трудные почти не различают проходящих
+        """
+        if self.discrimination is not None and self.discrimination < self.LOW_DISCRIMINATION:
+            return 'Не различает проходящих'
+        if self.difficulty >= self.TRIVIAL_DIFFICULTY:
+            return 'Слишком лёгкий'
+        if self.difficulty <= self.HARD_DIFFICULTY:
+            return 'Слишком трудный'
+        return ''
+
+
+class UserStatistics(models.Model):
+    """
+    Сводная статистика пользователя по всем его попыткам. Обновляется при сохранении каждой попытки,
+    поэтому профиль читает одну строку вместо просмотра результатов
+    """
+    user = models.OneToOneField(
+        verbose_name='Пользователь',
+        to='users_app.User',
+        on_delete=models.CASCADE,
+        related_name='statistics'
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Кол-во попыток',
+        default=0
+    )
+    score_sum = models.PositiveBigIntegerField(
+        verbose_name='Сумма баллов',
+        default=0
+    )
+    best_score = models.PositiveIntegerField(
+        verbose_name='Лучший балл',
+        default=0
+    )
+    last_activity_at = models.DateTimeField(
+        verbose_name='Последняя попытка',
+        blank=True,
+        null=True
+    )
+    categories = models.JSONField(
+        verbose_name='По категориям',
+        default=dict,
+        help_text='pk категории -> {"title", "attempts", "score_sum"}'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'{self.user} statistics'
+
+    @property
+    def average_score(self) -> float:
+        return self.score_sum / self.attempts if self.attempts else 0.0
+
+    def get_categories(self) -> list:
+        """
+        Средний балл по категориям, названия - на момент последней попытки в категории
+        """
+        return sorted(
+            (
+                dict(title=category['title'], attempts=category['attempts'],
+                     average_score=category['score_sum'] / category['attempts'])
+                for category in self.categories.values()
+            ),
+            key=lambda category: category['title']
+        )
@@ -0,0 +1,182 @@
+import base64
+import datetime
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+APPROXIMATE_COUNT_THRESHOLD = 1000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    В отличие от DjangoJSONEncoder сохраняет микросекунды, иначе условие по дате не совпадёт с записью
+    """
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super(CursorJSONEncoder, self).default(o)
+
+
+def approximate_count(queryset, threshold: int = APPROXIMATE_COUNT_THRESHOLD) -> int:
+    """
+    Точное кол-во записей, если их меньше threshold, иначе оценка планировщика PostgreSQL.
+    Оба варианта не сканируют всю выборку.
+    """
+    exact = queryset.order_by()[:threshold].count()
+    if exact < threshold:
+        return exact
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]['Plan']['Plan Rows']), threshold)
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Пагинация по курсору (keyset): страница выбирается условием по полям сортировки
+    последней/первой записи соседней страницы, поэтому её стоимость не зависит от глубины.
+    Сортировка всегда дополняется pk, чтобы порядок был однозначным.
+    Поля сортировки не должны содержать NULL.
+    """
+
+    def __init__(self, queryset, per_page: int, ordering: list = None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = self.get_ordering(ordering or list(queryset.query.order_by) or
+                                          list(queryset.model._meta.ordering))
+
+    @staticmethod
+    def get_ordering(ordering: list) -> list:
+        ordering = [field for field in ordering if isinstance(field, str)]
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            descending = ordering[0].startswith('-') if ordering else False
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    @cached_property
+    def count(self) -> int:
+        return approximate_count(self.queryset)
+
+    def get_field_value(self, obj, field: str):
+        return getattr(obj, field.lstrip('-'))
+
+    def to_python(self, field: str, value):
+        name = field.lstrip('-')
+        try:
+            model_field = self.queryset.model._meta.pk if name == 'pk' else self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        try:
+            return model_field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor
+
+    def encode_cursor(self, obj, direction: str) -> str:
+        payload = [direction, [self.get_field_value(obj, field) for field in self.ordering]]
+        data = json.dumps(payload, cls=CursorJSONEncoder, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(data)
+        except (ValueError, TypeError):
+            raise InvalidCursor
+        if direction not in ('next', 'prev') or len(values) != len(self.ordering):
+            raise InvalidCursor
+        return direction, [self.to_python(field, value) for field, value in zip(self.ordering, values)]
+
+    def get_keyset_filter(self, values: list, reverse: bool) -> Q:
+        """
+        (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... с учётом направления сортировки каждого поля
+        """
+        keyset_filter = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            keyset_filter |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{name: value})
+        return keyset_filter
+
+    def get_page(self, cursor: str = None) -> KeysetPage:
+        direction, values = ('next', None)
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = ('next', None)
+        reverse = direction == 'prev'
+        ordering = self.ordering
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_filter(values, reverse))
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+        page = KeysetPage(object_list=object_list)
+        if not object_list:
+            return page
+        if reverse or has_more:
+            page.next_cursor = self.encode_cursor(object_list[-1], 'next')
+        if (reverse and has_more) or (not reverse and values is not None):
+            page.previous_cursor = self.encode_cursor(object_list[0], 'prev')
+        return page
+
+
+class KeysetPaginationMixin:
+    """
+    Миксин для ListView: заменяет постраничную пагинацию на пагинацию по курсору
+    """
+    paginate_by = 24
+    cursor_kwarg = 'cursor'
+    keyset_ordering: list = None
+
+    def get_keyset_ordering(self) -> list:
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.get_keyset_ordering())
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
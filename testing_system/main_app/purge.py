@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.utils.timezone import now
+
+from .detail_cache import invalidate_test_details
+from .facets import invalidate_facets
+from .leaderboards import remove_category_best_attempts
+from .models import Category, CategoryBestAttempt, Tag, Test, TestQuestions
+from .search import get_search_vector
+from .snapshots import forget_snapshot_versions
+from .user_statistics import subtract_test_statistics
+from .cards import get_card_fields, invalidate_catalog, update_test_cards
+
+PURGE_CHUNK_SIZE = 1000
+# Тесты удалённой категории помечаются вместе с ней, поэтому они удаляются раньше категории
+# отдельными пачками, а не одной транзакцией вместе с категорией
+PURGE_MODELS = (Test, Tag, Category)
+# Незавершённый тест, который не менялся столько дней, считается брошенным
+ABANDONED_DRAFT_DAYS = 30
+
+
+def soft_delete_tests(queryset) -> int:
+    """
+    Скрывает тесты одним UPDATE. Вопросы, ответы и результаты удалит purge_deleted,
+    а лучшие попытки и результаты скрытых тестов сразу вычитаются из таблиц лидеров их категорий
+    и статистики пользователей без пересборки.
+    """
+    invalidate_test_details(queryset.values_list('slug', flat=True))
+    with transaction.atomic():
+        test_pks = list(queryset.filter(is_deleted=False).values_list('pk', flat=True))
+        deleted = queryset.update(is_deleted=True, updated_at=now())
+        forget_snapshot_versions(test_pks)
+        remove_category_best_attempts(test_pks)
+        subtract_test_statistics(test_pks)
+        invalidate_catalog()
+    invalidate_facets()
+    return deleted
+
+
+def soft_delete_category(category) -> None:
+    with transaction.atomic():
+        Category.all_objects.filter(pk=category.pk).update(is_deleted=True)
+        invalidate_test_details(Test.all_objects.filter(category=category).values_list('slug', flat=True))
+        # Результаты тестов, скрытых раньше категории, уже вычтены из статистики
+        test_pks = list(Test.objects.filter(category=category).values_list('pk', flat=True))
+        Test.all_objects.filter(category=category).update(is_deleted=True, updated_at=now())
+        forget_snapshot_versions(Test.all_objects.filter(category=category).values_list('pk', flat=True))
+        CategoryBestAttempt.objects.filter(category_id=category.pk).delete()
+        subtract_test_statistics(test_pks)
+        invalidate_catalog()
+    invalidate_facets()
+
+
+def soft_delete_tag(tag) -> None:
+    """
+    Тег скрывается сразу, а теги в карточках и поисковом векторе тестов пересчитываются без него.
+    Строки связи с тестами удалит purge_deleted.
+    """
+    with transaction.atomic():
+        Tag.all_objects.filter(pk=tag.pk).update(is_deleted=True)
+        Test.all_objects.filter(tags=tag).update(
+            search_vector=get_search_vector(), tags_label=get_card_fields()['tags_label'], updated_at=now()
+        )
+        invalidate_test_details(Test.all_objects.filter(tags=tag).values_list('slug', flat=True))
+        invalidate_catalog()
+    invalidate_facets()
+
+
+def get_cascade_relations(model) -> list:
+    """
+    Обратные связи ForeignKey/OneToOne на модель, включая промежуточные таблицы M2M
+    """
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if (field.one_to_many or field.one_to_one) and field.auto_created and not field.concrete
+    ]
+
+
+def execute(sql: str, params: list) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def delete_rows(model, pks: list, chunk_size: int = PURGE_CHUNK_SIZE) -> int:
+    """
+    Удаляет строки model с указанными pk и всё, что на них ссылается, запросами
+    DELETE ... WHERE pk = ANY(...), не загружая объекты в память.
+    Дочерние строки выбираются пачками по chunk_size, поэтому в памяти не больше chunk_size ключей на уровень.
+    """
+    deleted = 0
+    for relation in get_cascade_relations(model):
+        child, field = relation.related_model, relation.field
+        if relation.on_delete == models.DO_NOTHING:
+            continue
+        if relation.on_delete == models.SET_NULL:
+            deleted += execute(
+                f'UPDATE {child._meta.db_table} SET {field.column} = NULL WHERE {field.column} = ANY(%s)', [pks]
+            )
+            continue
+        while True:
+            child_pks = list(
+                child._base_manager.filter(**{f'{field.name}__in': pks}).values_list('pk', flat=True)[:chunk_size]
+            )
+            if not child_pks:
+                break
+            deleted += delete_rows(child, child_pks, chunk_size)
+    deleted += execute(f'DELETE FROM {model._meta.db_table} WHERE {model._meta.pk.column} = ANY(%s)', [pks])
+    return deleted
+
+
+def purge_deleted(model, chunk_size: int = PURGE_CHUNK_SIZE, progress=None) -> int:
+    """
+    Окончательно удаляет помеченные записи model пачками по chunk_size, каждая пачка в своей транзакции,
+    чтобы блокировки держались недолго. progress(model, удалено записей model, удалено строк всего)
+    вызывается после каждой пачки.
+    """
+    purged, rows = 0, 0
+    while True:
+        with transaction.atomic():
+            pks = list(
+                model.all_objects.filter(is_deleted=True).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not pks:
+                return purged
+            rows += delete_rows(model, pks, chunk_size)
+        purged += len(pks)
+        if progress is not None:
+            progress(model, purged, rows)
+
+
+def purge_abandoned_questions(days: int = ABANDONED_DRAFT_DAYS, chunk_size: int = PURGE_CHUNK_SIZE) -> int:
+    """
+    Мастер создания теста сохраняет вопросы и ответы на разных шагах: вопросы остаются в базе, чтобы создание
+    можно было продолжить из профиля, а картинки вопросов не хранятся в сессии. Вопросы без ответов
+    у незавершённых тестов, не менявшихся days дней, удаляются пачками, и такой тест снова продолжается
+    с шага вопросов. Возвращает кол-во удалённых вопросов.
+    """
+    cutoff = now() - timedelta(days=days)
+    purged = 0
+    while True:
+        with transaction.atomic():
+            questions = list(
+                TestQuestions.objects.filter(
+                    test__is_created=False, test__updated_at__lt=cutoff, answers__isnull=True
+                ).order_by('pk').values_list('pk', 'test_id')[:chunk_size]
+            )
+            if not questions:
+                return purged
+            delete_rows(TestQuestions, [quest_pk for quest_pk, _ in questions], chunk_size)
+            update_test_cards(
+                Test.all_objects.filter(pk__in={test_pk for _, test_pk in questions}), 'question_count'
+            )
+        purged += len(questions)
@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+
+import numpy as np
+from django.utils.timezone import now
+
+from .models import Test, TestQuestions, TestAnswers, TestResults
+from .bitsets import decode_bitsets, encode_bitsets
+from .histograms import rebuild_histograms
+from .leaderboards import rebuild_leaderboards
+from .snapshots import get_snapshot
+from .user_statistics import refresh_test_users
+
+RESCORE_CHUNK_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class AnswerKeyMatrix:
+    """
+    Ключ ответов теста в виде векторов NumPy.
+    Ответы упорядочены по вопросам, поэтому ответы одного вопроса занимают непрерывный диапазон столбцов,
+    который начинается с question_starts[i].
+    """
+    question_pks: np.ndarray
+    answer_pks: np.ndarray
+    answer_questions: np.ndarray
+    key: np.ndarray
+
+    @property
+    def question_count(self) -> int:
+        return len(self.question_pks)
+
+    @property
+    def question_starts(self) -> np.ndarray:
+        return np.searchsorted(self.answer_questions, np.arange(self.question_count))
+
+    @property
+    def gradable_questions(self) -> np.ndarray:
+        """
+        Маска вопросов, у которых есть хотя бы один правильный ответ
+        """
+        return np.bincount(self.answer_questions[self.key], minlength=self.question_count) > 0
+
+
+def load_answer_key_matrix(test_pk: int) -> AnswerKeyMatrix:
+    question_pks = np.fromiter(
+        TestQuestions.objects.filter(test_id=test_pk).order_by('pk').values_list('pk', flat=True), dtype=np.int64
+    )
+    answers = np.array(
+        list(TestAnswers.objects.filter(question__test_id=test_pk).values_list('question_id', 'pk', 'is_right')),
+        dtype=np.int64
+    ).reshape(-1, 3)
+    answers = answers[np.lexsort((answers[:, 1], answers[:, 0]))]
+    return AnswerKeyMatrix(
+        question_pks=question_pks,
+        answer_pks=answers[:, 1],
+        answer_questions=np.searchsorted(question_pks, answers[:, 0]),
+        key=answers[:, 2].astype(bool)
+    )
+
+
+def grade_selections(selected: np.ndarray, key_matrix: AnswerKeyMatrix) -> np.ndarray:
+    """
+    Проверяет матрицу выбранных ответов (попытки x ответы) за один векторный проход.
+    Возвращает матрицу правильности (попытки x вопросы): вопрос засчитан, если набор
+    выбранных ответов совпадает с набором правильных.
+    """
+    correct = np.zeros((selected.shape[0], key_matrix.question_count), dtype=bool)
+    answered = np.flatnonzero(np.bincount(key_matrix.answer_questions, minlength=key_matrix.question_count))
+    if not len(answered):
+        return correct
+    mismatch = np.logical_xor(selected, key_matrix.key)
+    wrong = np.logical_or.reduceat(mismatch, key_matrix.question_starts[answered], axis=1)
+    correct[:, answered] = ~wrong
+    correct &= key_matrix.gradable_questions
+    return correct
+
+
+def compute_scores(correct: np.ndarray) -> np.ndarray:
+    question_count = correct.shape[1]
+    if not question_count:
+        return np.zeros(correct.shape[0], dtype=np.int64)
+    return correct.sum(axis=1) * 100 // question_count
+
+
+def load_right_answers_matrix(right_questions: list, question_count: int) -> np.ndarray:
+    """
+    Распаковывает сохранённые битовые карты правильных ответов попыток в матрицу (попытки x вопросы)
+    """
+    return decode_bitsets(right_questions, question_count)
+
+
+@dataclass(frozen=True)
+class VersionKey:
+    """
+    Текущий ключ ответов в координатах версии теста, по которой пройдены попытки.
+    key_matrix построен по вопросам версии, оставшимся в тесте, и их ответам из версии;
+    question_columns и answer_columns - номера этих вопросов и ответов среди всех вопросов и ответов версии
+    """
+    key_matrix: AnswerKeyMatrix
+    question_columns: np.ndarray
+    answer_columns: np.ndarray
+    question_count: int
+    answer_count: int
+
+
+def load_version_key(snapshot, key_matrix: AnswerKeyMatrix) -> VersionKey:
+    """
+    Сопоставляет вопросы и ответы снимка с текущим ключом по pk. Правильность ответа берётся из текущего ключа,
+    удалённые ответы неправильные. Вопросы и ответы, добавленные после попытки, ей не предъявлялись и не учитываются
+    """
+    current_questions = set(key_matrix.question_pks.tolist())
+    right_answers = set(key_matrix.answer_pks[key_matrix.key].tolist())
+    question_columns, answer_columns, answer_pks, answer_questions, key = [], [], [], [], []
+    column = 0
+    for num, quest in enumerate(snapshot.questions):
+        kept = quest.pk in current_questions
+        if kept:
+            question_columns.append(num)
+        for answer in quest.answers:
+            if kept:
+                answer_columns.append(column)
+                answer_pks.append(answer.pk)
+                answer_questions.append(len(question_columns) - 1)
+                key.append(answer.pk in right_answers)
+            column += 1
+    return VersionKey(
+        key_matrix=AnswerKeyMatrix(
+            question_pks=np.array([snapshot.questions[num].pk for num in question_columns], dtype=np.int64),
+            answer_pks=np.array(answer_pks, dtype=np.int64),
+            answer_questions=np.array(answer_questions, dtype=np.int64),
+            key=np.array(key, dtype=bool)
+        ),
+        question_columns=np.array(question_columns, dtype=np.int64),
+        answer_columns=np.array(answer_columns, dtype=np.int64),
+        question_count=len(snapshot.questions),
+        answer_count=column
+    )
+
+
+def iter_result_chunks(test_pk: int, chunk_size: int = RESCORE_CHUNK_SIZE):
+    last_pk = 0
+    while True:
+        rows = list(
+            TestResults.objects.filter(
+                test_id=test_pk, asked_questions__isnull=True, pk__gt=last_pk
+            ).order_by('pk').values_list(
+                'pk', 'score', 'test_version', 'right_questions', 'answer_sheet'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        versions = {}
+        for row in rows:
+            versions.setdefault(row[2], []).append(row)
+        for version, version_rows in versions.items():
+            yield (
+                version,
+                np.array([row[0] for row in version_rows], dtype=np.int64),
+                np.array([row[1] for row in version_rows], dtype=np.int64),
+                [row[3] for row in version_rows],
+                [row[4] for row in version_rows]
+            )
+
+
+def write_results(result_pks: np.ndarray, scores: np.ndarray, correct: np.ndarray) -> None:
+    TestResults.objects.bulk_update(
+        [
+            TestResults(pk=pk, score=score, right_questions=right_questions) for pk, score, right_questions in
+            zip(result_pks.tolist(), scores.tolist(), encode_bitsets(correct))
+        ],
+        ['score', 'right_questions']
+    )
+
+
+def rescore_chunk(version_key: VersionKey, right_questions: list, sheets: list) -> tuple:
+    """
+    Матрица правильности попыток одной версии (попытки x вопросы версии) по текущему ключу и их баллы
+    по вопросам версии, оставшимся в тесте
+    """
+    key_matrix, columns = version_key.key_matrix, version_key.question_columns
+    old_correct = load_right_answers_matrix(right_questions, version_key.question_count)
+    kept = old_correct[:, columns] & key_matrix.gradable_questions
+    has_sheet = np.array([sheet is not None for sheet in sheets], dtype=bool)
+    if has_sheet.any():
+        selected = decode_bitsets([sheet for sheet in sheets if sheet is not None], version_key.answer_count)
+        kept[has_sheet] = grade_selections(selected[:, version_key.answer_columns], key_matrix)
+    correct = np.zeros_like(old_correct)
+    correct[:, columns] = kept
+    return old_correct, correct, compute_scores(kept)
+
+
+def rescore_test(test_pk: int, chunk_size: int = RESCORE_CHUNK_SIZE) -> dict:
+    """
+    Пересчитывает score и right_questions всех результатов теста по текущему ключу ответов.
+    Биты попытки позиционны по вопросам и ответам её версии теста, поэтому ключ переводится в координаты
+    каждой версии (load_version_key), а балл считается по вопросам версии, оставшимся в тесте.
+    Попытки с сохранённым листом ответов проверяются заново через grade_selections, у старых попыток
+    без листа только снимаются вопросы, у которых не осталось правильных ответов.
+    Записываются только попытки, у которых изменился балл или набор правильных ответов,
+    после чего по новым баллам пересобираются распределение баллов и таблицы лидеров теста
+    и статистика проходивших его пользователей, а время изменения теста сдвигается, чтобы страницы
+    результатов не отдали 304 со старыми баллами.
+    Адаптивные попытки не пересчитываются: их балл - оценка по модели IRT на момент прохождения,
+    а не доля правильных ответов по ключу.
+    """
+    key_matrix = load_answer_key_matrix(test_pk)
+    version_keys = dict()
+    stats = dict(results=0, changed=0)
+    for version, result_pks, old_scores, right_questions, sheets in iter_result_chunks(test_pk, chunk_size):
+        if version not in version_keys:
+            version_keys[version] = load_version_key(get_snapshot(test_pk, version), key_matrix)
+        old_correct, correct, scores = rescore_chunk(version_keys[version], right_questions, sheets)
+        changed = (scores != old_scores) | (correct != old_correct).any(axis=1)
+        if changed.any():
+            write_results(result_pks[changed], scores[changed], correct[changed])
+        stats['results'] += len(result_pks)
+        stats['changed'] += int(changed.sum())
+    if stats['changed']:
+        Test.objects.filter(pk=test_pk).update(updated_at=now())
+        rebuild_histograms([test_pk])
+        rebuild_leaderboards([test_pk])
+        refresh_test_users([test_pk])
+    return stats
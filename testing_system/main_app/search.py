@@ -0,0 +1,44 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Category, Test
+
+SEARCH_CONFIG = 'russian'
+
+
+def get_search_vector() -> SearchVector:
+    """
+    Поисковый вектор теста: название (A), описание (B), категория и теги (C).
+    Категория и теги берутся подзапросами, т.к. UPDATE не поддерживает join.
+    """
+    category_title = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('title'))
+    tag_titles = Subquery(
+        Test.tags.through.objects.filter(test_id=OuterRef('pk'), tag__is_deleted=False).values('test_id').annotate(
+            titles=StringAgg('tag__title', ' ')
+        ).values('titles')
+    )
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(category_title, weight='C', config=SEARCH_CONFIG)
+        + SearchVector(tag_titles, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset) -> int:
+    return queryset.update(search_vector=get_search_vector())
+
+
+def search_tests(queryset, value: str):
+    """
+    Полнотекстовый поиск с ранжированием. Если ничего не найдено,
+    используется поиск по похожести названия (pg_trgm), устойчивый к опечаткам.
+    """
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    found = queryset.filter(search_vector=query)
+    if found.exists():
+        return found.annotate(rank=SearchRank(F('search_vector'), query)).order_by('-rank', '-pk')
+    return queryset.filter(title__trigram_word_similar=value).annotate(
+        similarity=TrigramWordSimilarity(value, 'title')
+    ).order_by('-similarity', '-pk')
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .cards import get_card_fields, update_test_cards, invalidate_catalog
+from .detail_cache import invalidate_test_details
+from .facets import (
+    invalidate_facets, get_facet_state, is_in_catalog, is_catalog_change, is_facet_change, FACET_TEST_FIELDS
+)
+from .models import Category, Tag, Test, TestQuestions, TestAnswers, CATALOG_FILTER
+from .search import get_search_vector
+from .snapshots import invalidate_snapshot
+
+
+def update_tags_dependent_fields(queryset) -> None:
+    queryset.update(search_vector=get_search_vector(), tags_label=get_card_fields()['tags_label'], updated_at=now())
+    invalidate_test_details(queryset.values_list('slug', flat=True))
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=TestQuestions)
+def question_saved(sender, instance, created, **kwargs):
+    invalidate_snapshot(instance.test_id)
+    if created:
+        update_test_cards(Test.objects.filter(pk=instance.test_id), 'question_count')
+
+
+@receiver(post_delete, sender=TestQuestions)
+def question_deleted(sender, instance, **kwargs):
+    invalidate_snapshot(instance.test_id)
+    update_test_cards(Test.objects.filter(pk=instance.test_id), 'question_count')
+
+
+@receiver([post_save, post_delete], sender=TestAnswers)
+def answer_changed(sender, instance, **kwargs):
+    test_pk = TestQuestions.objects.filter(pk=instance.question_id).values_list('test_id', flat=True).first()
+    if test_pk is not None:
+        invalidate_snapshot(test_pk)
+
+
+@receiver(pre_save, sender=Test)
+def test_saving(sender, instance, **kwargs):
+    instance.facet_state = None
+    if instance.pk is not None:
+        instance.facet_state = Test.all_objects.filter(pk=instance.pk).values(*FACET_TEST_FIELDS).first()
+
+
+@receiver(post_save, sender=Test)
+def test_saved(sender, instance, **kwargs):
+    Test.objects.filter(pk=instance.pk).update(search_vector=get_search_vector(), **get_card_fields())
+    invalidate_snapshot(instance.pk)
+    invalidate_test_details([instance.slug])
+    old_state, state = getattr(instance, 'facet_state', None), get_facet_state(instance)
+    if is_catalog_change(old_state, state):
+        invalidate_catalog()
+    if is_facet_change(old_state, state):
+        invalidate_facets()
+
+
+@receiver(post_delete, sender=Test)
+def test_deleted(sender, instance, **kwargs):
+    invalidate_test_details([instance.slug])
+    if is_in_catalog(get_facet_state(instance)):
+        invalidate_catalog()
+        invalidate_facets()
+
+
+@receiver(m2m_changed, sender=Test.tags.through)
+def test_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_tags_dependent_fields(Test.objects.filter(pk=instance.pk))
+        if is_in_catalog(get_facet_state(instance)):
+            invalidate_facets()
+    elif pk_set:
+        update_tags_dependent_fields(Test.objects.filter(pk__in=pk_set))
+        if Test.objects.filter(CATALOG_FILTER, pk__in=pk_set).exists():
+            invalidate_facets()
+    elif action == 'post_clear':
+        # При очистке тестов тега их состав неизвестен
+        invalidate_facets()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    if not created:
+        Test.objects.filter(category=instance).update(search_vector=get_search_vector(), updated_at=now())
+        invalidate_test_details(Test.objects.filter(category=instance).values_list('slug', flat=True))
+        invalidate_catalog()
+        invalidate_facets()
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        update_tags_dependent_fields(Test.objects.filter(tags=instance))
+        invalidate_facets()
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance.search_test_pks = list(instance.tests.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    if getattr(instance, 'search_test_pks', None):
+        update_tags_dependent_fields(Test.objects.filter(pk__in=instance.search_test_pks))
+        invalidate_facets()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def author_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    update_test_cards(Test.objects.filter(author=instance), 'author_name')
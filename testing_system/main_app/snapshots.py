@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from functools import lru_cache, cached_property
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .bitsets import decode_bitsets
+from .grading import AnswerKey
+from .models import Test, TestQuestions, TestAnswers, TestSnapshot
+
+SNAPSHOT_VERSION_CACHE_KEY = 'main_app:test_snapshot_version:{test_pk}'
+SNAPSHOT_VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+SNAPSHOT_CACHE_SIZE = 256
+SNAPSHOT_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class SnapshotAnswer:
+    pk: int
+    answer: str
+    is_right: bool
+
+
+@dataclass(frozen=True)
+class SnapshotQuestion:
+    pk: int
+    question: str
+    image_url: str
+    answers: tuple
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Собранная версия теста в памяти процесса. Вопросы упорядочены по pk, ответы - по (вопрос, pk),
+    как и в ключе ответов, так что биты right_questions и answer_sheet попытки соответствуют её версии
+    """
+    test_pk: int
+    version: int
+    title: str
+    slug: str
+    category_pk: int
+    is_adaptive: bool
+    questions: tuple
+    answer_key: AnswerKey
+
+    @cached_property
+    def question_map(self) -> dict:
+        return {quest.pk: quest for quest in self.questions}
+
+    def get_questions(self, question_pks) -> list:
+        question_pks = set(question_pks)
+        return [quest for quest in self.questions if quest.pk in question_pks]
+
+
+def build_payload(test_pk: int) -> dict:
+    test = Test.objects.filter(pk=test_pk).values('title', 'slug', 'category_id', 'is_adaptive').get()
+    questions = {
+        quest.pk: {'pk': quest.pk, 'question': quest.question, 'image_url': quest.image.url if quest.image else '',
+                   'answers': []}
+        for quest in TestQuestions.objects.filter(test_id=test_pk).order_by('pk').only('pk', 'question', 'image')
+    }
+    answers = TestAnswers.objects.filter(question__test_id=test_pk).order_by('question_id', 'pk').values_list(
+        'question_id', 'pk', 'answer', 'is_right'
+    )
+    for quest_pk, answer_pk, answer, is_right in answers:
+        questions[quest_pk]['answers'].append({'pk': answer_pk, 'answer': answer, 'is_right': is_right})
+    return {
+        'title': test['title'], 'slug': test['slug'], 'category_pk': test['category_id'],
+        'is_adaptive': test['is_adaptive'], 'questions': list(questions.values()),
+    }
+
+
+def load_payload(test_pk: int, version: int, payload: dict) -> Snapshot:
+    questions = tuple(
+        SnapshotQuestion(
+            pk=quest['pk'], question=quest['question'], image_url=quest['image_url'],
+            answers=tuple(SnapshotAnswer(**answer) for answer in quest['answers'])
+        )
+        for quest in payload['questions']
+    )
+    return Snapshot(
+        test_pk=test_pk, version=version, title=payload['title'], slug=payload['slug'],
+        category_pk=payload['category_pk'], is_adaptive=payload['is_adaptive'], questions=questions,
+        answer_key=AnswerKey(
+            answers={
+                quest.pk: frozenset(answer.pk for answer in quest.answers if answer.is_right) for quest in questions
+            },
+            question_count=len(questions),
+            answer_pks=tuple(answer.pk for quest in questions for answer in quest.answers)
+        )
+    )
+
+
+def get_version_cache_key(test_pk: int) -> str:
+    return SNAPSHOT_VERSION_CACHE_KEY.format(test_pk=test_pk)
+
+
+def compile_snapshot(test_pk: int) -> int:
+    """
+    Собирает новую версию теста, если текущая устарела. Строка теста блокируется, поэтому параллельные
+    запросы собирают снимок один раз, а правка теста во время сборки снова пометит его устаревшим
+    """
+    with transaction.atomic():
+        version = Test.objects.select_for_update().filter(pk=test_pk).values_list(
+            'snapshot_version', flat=True
+        ).get()
+        if version:
+            return version
+        version = (TestSnapshot.objects.filter(test_id=test_pk).aggregate(version=Max('version'))['version'] or 0) + 1
+        TestSnapshot.objects.create(test_id=test_pk, version=version, payload=build_payload(test_pk))
+        Test.objects.filter(pk=test_pk).update(snapshot_version=version)
+    return version
+
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_SIZE)
+def load_snapshot(test_pk: int, version: int) -> Snapshot:
+    """
+    Версия снимка неизменяема, поэтому кеш процесса не нужно сбрасывать
+    """
+    payload = TestSnapshot.objects.filter(test_id=test_pk, version=version).values_list('payload', flat=True).get()
+    return load_payload(test_pk, version, payload)
+
+
+def get_snapshot(test_pk: int, version: int = None) -> Snapshot:
+    """
+    Снимок указанной версии или текущий. Номер текущей версии хранится в кеше, так что прохождение
+    теста не обращается к базе, пока тест не изменится.
+    Бросает Test.DoesNotExist или TestSnapshot.DoesNotExist, если теста или версии нет
+    """
+    if version is not None:
+        return load_snapshot(test_pk, version)
+    cache_key = get_version_cache_key(test_pk)
+    version = cache.get(cache_key)
+    if version is None:
+        version = Test.objects.filter(pk=test_pk).values_list('snapshot_version', flat=True).get()
+        if not version:
+            version = compile_snapshot(test_pk)
+        cache.set(cache_key, version, SNAPSHOT_VERSION_CACHE_TIMEOUT)
+    return load_snapshot(test_pk, version)
+
+
+def invalidate_snapshot(test_pk: int) -> None:
+    """
+    Помечает текущий снимок устаревшим: следующее прохождение соберёт новую версию.
+    Ключ кеша удаляется после коммита, иначе параллельная сборка может вернуть в кеш старую версию
+    """
+    Test.objects.filter(pk=test_pk).update(snapshot_version=0, updated_at=now())
+    transaction.on_commit(lambda: cache.delete(get_version_cache_key(test_pk)))
+
+
+def forget_snapshot_versions(test_pks) -> None:
+    """
+    Удаляет из кеша номера текущих версий скрытых тестов после коммита: следующее прохождение
+    прочитает тест из базы и получит 404 вместо закешированной версии
+    """
+    keys = [get_version_cache_key(test_pk) for test_pk in test_pks]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def decode_attempts(test_pk: int, question_pks: list, rows: list) -> tuple:
+    """
+    Матрицы правильности и предъявления (попытки x question_pks) по битам попыток.
+    rows - тройки (test_version, right_questions, asked_questions). Биты попытки позиционны по вопросам
+    её версии теста, поэтому сопоставляются с question_pks по pk; вопрос, которого не было в версии попытки
+    или который не задавали в адаптивной попытке, не предъявлен.
+    Попытки без версии, сохранённые до появления снимков, читаются по текущей версии
+    """
+    positions = {quest_pk: num for num, quest_pk in enumerate(question_pks)}
+    correct = np.zeros((len(rows), len(positions)), dtype=bool)
+    presented = np.zeros_like(correct)
+    versions = {}
+    for num, (version, _, _) in enumerate(rows):
+        versions.setdefault(version, []).append(num)
+    for version, nums in versions.items():
+        questions = get_snapshot(test_pk, version).questions
+        source = [num for num, quest in enumerate(questions) if quest.pk in positions]
+        target = [positions[questions[num].pk] for num in source]
+        rights = decode_bitsets([rows[num][1] for num in nums], len(questions))
+        asked = np.ones_like(rights)
+        adaptive = [num for num, row_num in enumerate(nums) if rows[row_num][2] is not None]
+        if adaptive:
+            asked[adaptive] = decode_bitsets([rows[nums[num]][2] for num in adaptive], len(questions))
+        correct[np.ix_(nums, target)] = rights[:, source]
+        presented[np.ix_(nums, target)] = asked[:, source]
+    return correct, presented
@@ -36,3 +36,32 @@ def continue_test_create_modal(test_slug, test_title, test_questions):
     context['continue_type'] = 'answer'
     context['quest_pk'] = ', '.join(str(obj.get('pk')) for obj in test_questions.values('pk'))
     return context
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor: str) -> str:
+    query = context['request'].GET.copy()
+    query['cursor'] = cursor
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag(takes_context=True)
+def facet_url(context, name: str, value) -> str:
+    query = context['request'].GET.copy()
+    query.pop('cursor', None)
+    if name == 'tags':
+        values = query.getlist(name)
+        if str(value) not in values:
+            query.setlist(name, values + [str(value)])
+    else:
+        query[name] = value
+    return f'?{query.urlencode()}'
+
+
+@register.inclusion_tag('main_app/cursor_pagination.html', takes_context=True)
+def cursor_pagination(context):
+    return {
+        'request': context['request'],
+        'page_obj': context.get('page_obj'),
+        'is_paginated': context.get('is_paginated'),
+    }
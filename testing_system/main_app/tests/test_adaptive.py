@@ -0,0 +1,131 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from users_app.models import User
+from ..adaptive import build_item_bank, get_item_bank, invalidate_item_banks, is_finished, ADAPTIVE_SESSION_KEY
+from ..analytics import analyze_test
+from ..bitsets import encode_bitset
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults, TestBestAttempt
+from ..scoring import rescore_test
+from ..snapshots import get_snapshot, load_snapshot
+
+
+class AdaptiveTestingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category,
+                                       is_created=True, is_published=True, is_adaptive=True)
+        cls.questions, cls.right_answers = [], {}
+        for num in range(8):
+            quest = TestQuestions.objects.create(test=cls.test, question=f'Question {num}', irt_difficulty=num - 4)
+            cls.right_answers[quest.pk] = TestAnswers.objects.create(question=quest, answer='Right', is_right=True)
+            TestAnswers.objects.create(question=quest, answer='Wrong', is_right=False)
+            cls.questions.append(quest)
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def test_most_informative_question(self):
+        bank = build_item_bank([10, 20, 30], [-2, 0, 2], [1, 1, None])
+        self.assertEqual(bank.next_question(0.1, set()), 20)
+        self.assertEqual(bank.next_question(1.8, set()), 30)
+        self.assertEqual(bank.next_question(1.8, {30}), 20)
+        self.assertIsNone(bank.next_question(0, {10, 20, 30}))
+
+    def test_estimate(self):
+        bank = build_item_bank([10, 20, 30], [-2, 0, 2], [1, 1, 1])
+        prior_ability, prior_error = bank.estimate([], [])
+        self.assertAlmostEqual(prior_ability, 0)
+        ability, standard_error = bank.estimate([10, 20, 30], [True, True, True])
+        self.assertGreater(ability, 0)
+        self.assertLess(standard_error, prior_error)
+        self.assertLess(bank.estimate([10, 20, 30], [False, False, False])[0], 0)
+        self.assertGreater(bank.expected_score(ability), bank.expected_score(prior_ability))
+
+    def test_stop_rules(self):
+        bank = build_item_bank(list(range(40)), [0] * 40, [1] * 40)
+        self.assertFalse(is_finished(bank, [1, 2], 0.1))
+        self.assertTrue(is_finished(bank, list(range(5)), 0.2))
+        self.assertFalse(is_finished(bank, list(range(5)), 0.5))
+        self.assertTrue(is_finished(bank, list(range(30)), 0.5))
+        self.assertTrue(is_finished(build_item_bank([1, 2], [0, 0], [1, 1]), [1, 2], 0.9))
+
+    def test_item_bank_follows_calibration(self):
+        snapshot = get_snapshot(self.test.pk)
+        bank = get_item_bank(snapshot)
+        with self.assertNumQueries(0):
+            self.assertIs(get_item_bank(snapshot), bank)
+        TestQuestions.objects.filter(pk=self.questions[0].pk).update(irt_difficulty=3, irt_calibrated_at=now())
+        invalidate_item_banks()
+        self.assertEqual(get_item_bank(snapshot).difficulties[0], 3)
+
+    def test_question_deleted_during_attempt(self):
+        url = reverse('test_adaptive', args=[self.test.pk])
+        first = self.client.get(url).context['quest']
+        self.client.post(url, {str(self.right_answers[first.pk].pk): str(first.pk)})
+        with self.captureOnCommitCallbacks(execute=True):
+            TestQuestions.objects.filter(pk=first.pk).delete()
+        # Попытка продолжается по своей версии теста, удалённый вопрос остаётся в её банке
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['question_number'], 2)
+        self.assertNotEqual(resp.context['quest'].pk, first.pk)
+
+    def test_start_redirects_to_adaptive(self):
+        resp = self.client.get(reverse('test_start', args=[self.test.pk]))
+        self.assertRedirects(resp, reverse('test_adaptive', args=[self.test.pk]))
+        self.test.is_adaptive = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test.save()
+        self.assertEqual(self.client.get(reverse('test_adaptive', args=[self.test.pk])).status_code, 404)
+
+    def test_adaptive_session(self):
+        url = reverse('test_adaptive', args=[self.test.pk])
+        asked = []
+        for _ in range(len(self.questions)):
+            resp = self.client.get(url)
+            quest = resp.context['quest']
+            self.assertEqual(resp.context['question_number'], len(asked) + 1)
+            self.assertNotIn(quest.pk, asked)
+            self.assertEqual(self.client.get(url).context['quest'], quest)
+            asked.append(quest.pk)
+            resp = self.client.post(url, {str(self.right_answers[quest.pk].pk): str(quest.pk)})
+            if resp.status_code == 200:
+                break
+        # Первый вопрос - средней трудности, после правильных ответов - всё труднее
+        self.assertEqual(asked[:2], [self.questions[4].pk, self.questions[5].pk])
+        self.assertTemplateUsed(resp, 'main_app/finish_test_page.html')
+        self.assertEqual(sorted(resp.context['rights_answers']), sorted(asked))
+        result = TestResults.objects.get(test=self.test, user=self.user)
+        self.assertEqual(result.score, resp.context['results'].score)
+        self.assertGreater(result.score, 50)
+        self.assertEqual(sorted(quest.pk for quest in result.get_right_questions()), sorted(asked))
+        self.assertEqual(sorted(quest.pk for quest in result.get_asked_questions()), sorted(asked))
+        self.assertEqual(result.get_wrong_questions(), [])
+        self.assertTrue(TestBestAttempt.objects.filter(test=self.test, user=self.user).exists())
+        self.assertNotIn(ADAPTIVE_SESSION_KEY.format(test_pk=self.test.pk), self.client.session)
+
+    def test_unasked_questions_masked(self):
+        question_pks = [quest.pk for quest in self.questions]
+        result = TestResults.objects.create(
+            test=self.test, user=self.user, score=40, test_version=get_snapshot(self.test.pk).version,
+            right_questions=encode_bitset(question_pks, question_pks[:1]),
+            asked_questions=encode_bitset(question_pks, question_pks[:2])
+        )
+        self.assertEqual([quest.pk for quest in result.get_wrong_questions()], question_pks[1:2])
+        resp = self.client.get(reverse('test_result', args=[result.pk]))
+        self.assertEqual([quest.pk for quest in resp.context['questions']], question_pks[:2])
+
+        # Балл адаптивной попытки - оценка по IRT, по ключу он не пересчитывается
+        self.assertEqual(rescore_test(self.test.pk), dict(results=0, changed=0))
+        self.assertEqual(TestResults.objects.get(pk=result.pk).score, 40)
+
+        statistics = analyze_test(self.test.pk)
+        self.assertEqual(statistics.item_attempts.tolist(), [1, 1] + [0] * 6)
+        self.assertEqual(statistics.difficulty[:2].tolist(), [1, 0])
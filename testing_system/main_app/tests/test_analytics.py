@@ -0,0 +1,105 @@
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..analytics import ItemStatistics, analyze_test
+from ..bitsets import encode_bitsets
+from ..models import Category, Test, TestQuestions, TestResults, TestAnalytics, QuestionAnalytics
+from ..snapshots import get_snapshot, load_snapshot
+
+
+class ItemAnalysisTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword', is_moder=True)
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category,
+                                       is_created=True, is_published=True)
+        cls.questions = [TestQuestions.objects.create(test=cls.test, question=f'Question {num}') for num in range(4)]
+        rng = np.random.default_rng(1)
+        abilities = rng.standard_normal(40)
+        cls.correct = rng.random((40, 4)) < 1 / (1 + np.exp(-(abilities[:, None] - np.array([-3, -1, 0, 1]))))
+        # Второй вопрос с ошибкой в ключе: правильно отвечают те, кто ошибся в остальных
+        cls.correct[:, 1] = cls.correct[:, [0, 2, 3]].sum(axis=1) < 2
+        TestResults.objects.bulk_create(
+            TestResults(test=cls.test, user=cls.user, score=int(row.sum() * 25), right_questions=right_questions)
+            for row, right_questions in zip(cls.correct, encode_bitsets(cls.correct))
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def test_statistics_match_direct_computation(self):
+        statistics = ItemStatistics(question_count=4)
+        statistics.update(self.correct, self.correct.sum(axis=1) * 25)
+        matrix = self.correct.astype(float)
+        totals = matrix.sum(axis=1)
+        np.testing.assert_allclose(statistics.difficulty, matrix.mean(axis=0))
+        np.testing.assert_allclose(
+            statistics.discrimination,
+            [np.corrcoef(matrix[:, num], totals - matrix[:, num])[0, 1] for num in range(4)]
+        )
+        alpha = 4 / 3 * (1 - matrix.var(axis=0).sum() / totals.var())
+        self.assertAlmostEqual(statistics.alpha, alpha)
+
+    def test_constant_answers(self):
+        statistics = ItemStatistics(question_count=2)
+        statistics.update(np.ones((5, 2), dtype=bool), np.full(5, 100))
+        self.assertTrue(np.isnan(statistics.discrimination).all())
+        self.assertTrue(np.isnan(statistics.alpha))
+
+    def test_unpresented_questions_skipped(self):
+        presented = np.ones(self.correct.shape, dtype=bool)
+        presented[::3, 2] = False
+        statistics = ItemStatistics(question_count=4)
+        statistics.update(self.correct, self.correct.sum(axis=1) * 25, presented)
+        matrix = (self.correct & presented).astype(float)
+        totals = matrix.sum(axis=1)
+        rows = presented[:, 2]
+        self.assertEqual(statistics.item_attempts.tolist(), [40, 40, rows.sum(), 40])
+        self.assertAlmostEqual(statistics.difficulty[2], matrix[rows, 2].mean())
+        self.assertAlmostEqual(
+            statistics.discrimination[2], np.corrcoef(matrix[rows, 2], (totals - matrix[:, 2])[rows])[0, 1]
+        )
+        self.assertTrue(np.isnan(statistics.alpha))
+
+    def test_questions_added_after_attempts(self):
+        TestResults.objects.update(test_version=get_snapshot(self.test.pk).version)
+        with self.captureOnCommitCallbacks(execute=True):
+            question = TestQuestions.objects.create(test=self.test, question='Question 4')
+        statistics = analyze_test(self.test.pk)
+        self.assertEqual(statistics.item_attempts.tolist(), [40, 40, 40, 40, 0])
+        self.assertFalse(QuestionAnalytics.objects.filter(question=question).exists())
+
+    def test_chunks_match_single_pass(self):
+        whole = analyze_test(self.test.pk, chunk_size=1000)
+        chunked = analyze_test(self.test.pk, chunk_size=7)
+        self.assertEqual(chunked.attempts, 40)
+        np.testing.assert_allclose(chunked.discrimination, whole.discrimination)
+        self.assertAlmostEqual(chunked.alpha, whole.alpha)
+
+    def test_saved_analytics(self):
+        call_command('analyze_tests', all=True, stdout=StringIO())
+        self.assertEqual(TestAnalytics.objects.get(test=self.test).attempts, 40)
+        analytics = QuestionAnalytics.objects.get(question=self.questions[1])
+        self.assertLess(analytics.discrimination, 0)
+        self.assertTrue(analytics.verdict)
+        self.assertEqual(QuestionAnalytics.objects.count(), 4)
+        call_command('analyze_tests', self.test.pk, stdout=StringIO())
+        self.assertEqual(QuestionAnalytics.objects.count(), 4)
+
+    def test_views_show_analytics(self):
+        analyze_test(self.test.pk)
+        analytics = QuestionAnalytics.objects.get(question=self.questions[1])
+        resp = self.client.get(reverse('moder_test_detail', args=[self.test.slug]))
+        self.assertContains(resp, analytics.verdict)
+        resp = self.client.get(reverse('test_answers', args=[self.test.slug]))
+        self.assertEqual(resp.context['test_analytics'].attempts, 40)
+        self.assertContains(resp, analytics.verdict)
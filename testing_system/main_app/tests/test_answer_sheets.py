@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..bitsets import encode_bitset, decode_bitset
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults
+from ..scoring import rescore_test
+from ..snapshots import load_snapshot
+
+
+class AnswerSheetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category, is_created=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 2', is_right=False)
+        cls.answer_3 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 3', is_right=False)
+        cls.answer_4 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 4', is_right=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def test_sheet_saved_and_reviewed(self):
+        self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            str(self.answer_1.pk): str(self.quest_1.pk), str(self.answer_3.pk): str(self.quest_2.pk)
+        })
+        result = TestResults.objects.get()
+        self.assertEqual(bytes(result.answer_sheet), bytes([0b10100000]))
+        self.assertEqual(bytes(result.right_questions), bytes([0b10000000]))
+        resp = self.client.get(reverse('test_result', args=[result.pk]))
+        self.assertEqual(resp.context['user_answers'], [self.answer_1.pk, self.answer_3.pk])
+        self.assertEqual(resp.context['rights_answers'], [self.quest_1.pk])
+        self.assertContains(resp, '50/100')
+
+    def test_review_other_user_result(self):
+        other = User.objects.create_user(username='OtherUser', password='somehardpassword')
+        result = TestResults.objects.create(test=self.test, user=other, score=0)
+        self.assertEqual(self.client.get(reverse('test_result', args=[result.pk])).status_code, 404)
+
+    def test_rescore_from_sheets(self):
+        result = TestResults.objects.create(
+            test=self.test, user=self.user, score=50,
+            right_questions=encode_bitset((self.quest_1.pk, self.quest_2.pk), [self.quest_1.pk]),
+            answer_sheet=encode_bitset((self.answer_1.pk, self.answer_2.pk, self.answer_3.pk, self.answer_4.pk),
+                                       [self.answer_1.pk, self.answer_3.pk])
+        )
+        TestAnswers.objects.filter(pk=self.answer_3.pk).update(is_right=True)
+        TestAnswers.objects.filter(pk=self.answer_4.pk).update(is_right=False)
+        self.assertEqual(rescore_test(self.test.pk), dict(results=1, changed=1))
+        result.refresh_from_db()
+        self.assertEqual(result.score, 100)
+        self.assertEqual(decode_bitset((self.quest_1.pk, self.quest_2.pk), result.right_questions),
+                         [self.quest_1.pk, self.quest_2.pk])
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..autocomplete import find_options
+from ..filters import TestsFilter
+from ..models import Category, Tag, Test
+
+
+class AutocompleteViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Алексей', password='somehardpassword')
+        cls.draft_author = User.objects.create_user(username='Алёна', password='somehardpassword')
+        User.objects.create_user(username='Александр', password='somehardpassword')
+        cls.category = Category.objects.create(title='Математика')
+        Category.objects.create(title='Механика')
+        cls.tags = [Tag.objects.create(title=title) for title in ('python', 'Postgres', 'Django')]
+        Test.objects.create(
+            title='Published', author=cls.author, category=cls.category, is_published=True, is_created=True
+        )
+        Test.objects.create(title='Draft', author=cls.draft_author, category=cls.category, is_created=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_results(self, source: str, term: str) -> list:
+        resp = self.client.get(reverse('autocomplete', kwargs={'source': source}), {'term': term})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()['results']
+
+    def test_prefix_search_ignores_case(self):
+        self.assertEqual(
+            [item['text'] for item in self.get_results('tags', 'P')], ['Postgres', 'python']
+        )
+        self.assertEqual(self.get_results('categories', 'мат'), [{'id': self.category.pk, 'text': 'Математика'}])
+
+    def test_authors_with_published_tests_only(self):
+        self.assertEqual(self.get_results('authors', 'Ал'), [{'id': self.author.pk, 'text': 'Алексей'}])
+
+    def test_like_wildcards_escaped(self):
+        self.assertEqual(self.get_results('tags', '%'), [])
+
+    def test_unknown_source(self):
+        resp = self.client.get(reverse('autocomplete', kwargs={'source': 'users'}))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_results_cached(self):
+        self.get_results('tags', 'py')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.get_results('tags', ' PY ')), 1)
+
+    def test_limit(self):
+        self.assertEqual(len(find_options('tags', '', limit=2)), 2)
+
+    def test_filter_form_renders_selected_options_only(self):
+        data = {'category': self.category.pk, 'tags': [self.tags[0].pk]}
+        with self.assertNumQueries(4):
+            html = str(TestsFilter(data, queryset=Test.objects.all()).form)
+        self.assertIn('data-autocomplete-url="%s"' % reverse('autocomplete', kwargs={'source': 'tags'}), html)
+        self.assertIn('Математика', html)
+        self.assertNotIn('Механика', html)
+        self.assertIn('python', html)
+        self.assertNotIn('Django', html)
+        self.assertNotIn('Алексей', html)
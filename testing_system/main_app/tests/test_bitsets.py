@@ -0,0 +1,28 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..bitsets import (encode_bitset, decode_bitset, complement_bitset, count_bitset, decode_bitsets,
+                       encode_bitsets)
+
+
+class BitsetTestCase(SimpleTestCase):
+    keys = tuple(range(1, 11))
+
+    def test_encode_decode(self):
+        bitset = encode_bitset(self.keys, [1, 8, 10, 99])
+        self.assertEqual(bitset, bytes([0b10000001, 0b01000000]))
+        self.assertEqual(decode_bitset(self.keys, bitset), [1, 8, 10])
+        self.assertEqual(complement_bitset(self.keys, bitset), [2, 3, 4, 5, 6, 7, 9])
+        self.assertEqual(count_bitset(bitset), 3)
+
+    def test_empty_bitset(self):
+        self.assertEqual(decode_bitset(self.keys, None), [])
+        self.assertEqual(complement_bitset(self.keys, b''), list(self.keys))
+        self.assertEqual(count_bitset(b''), 0)
+
+    def test_matrix(self):
+        bitset = encode_bitset(self.keys, [1, 8, 10])
+        matrix = decode_bitsets([bitset, b''], len(self.keys))
+        self.assertEqual(np.flatnonzero(matrix[0]).tolist(), [0, 7, 9])
+        self.assertFalse(matrix[1].any())
+        self.assertEqual(encode_bitsets(matrix), [bitset, bytes(2)])
@@ -0,0 +1,94 @@
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+
+from users_app.models import User
+from ..bitsets import encode_bitsets
+from ..calibration import Responses, calibrate, drop_extreme, load_responses
+from ..management.commands.benchmark_calibration import simulate_responses, to_scale
+from ..models import Category, Test, TestQuestions, TestResults
+
+
+class CalibrationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(2)
+        cls.users = User.objects.bulk_create(User(username=f'User{num}', password='') for num in range(300))
+        category = Category.objects.create(title='TestCategory')
+        cls.tests = [
+            Test.objects.create(title=f'Test {num}', author=cls.users[0], category=category,
+                                is_created=True, is_published=True)
+            for num in range(2)
+        ]
+        cls.questions = [
+            [TestQuestions.objects.create(test=test, question=f'Question {num}') for num in range(5)]
+            for test in cls.tests
+        ]
+        abilities = rng.standard_normal(len(cls.users))
+        difficulties = np.linspace(-1, 1, 5)
+        for test in cls.tests:
+            correct = rng.random((len(cls.users), 5)) < 1 / (1 + np.exp(-(abilities[:, None] - difficulties)))
+            TestResults.objects.bulk_create(
+                TestResults(test=test, user=user, score=0, right_questions=right_questions)
+                for user, right_questions in zip(cls.users, encode_bitsets(correct))
+            )
+
+    def simulate(self, model: str, persons: int = 3000, items: int = 30, seed: int = 0) -> tuple:
+        rng = np.random.default_rng(seed)
+        abilities, difficulties = rng.standard_normal(persons), rng.standard_normal(items)
+        discriminations = rng.lognormal(0, 0.3, items) if model == '2pl' else np.ones(items)
+        responses = simulate_responses(abilities, difficulties, discriminations, 3, 2, rng)
+        return responses, *to_scale(difficulties, discriminations)
+
+    def test_rasch_recovers_known_difficulties(self):
+        responses, difficulties, _ = self.simulate('rasch')
+        calibration = calibrate(responses)
+        self.assertTrue(calibration.converged)
+        self.assertAlmostEqual(calibration.difficulties.mean(), 0)
+        self.assertLess(np.sqrt(np.mean((calibration.difficulties - difficulties) ** 2)), 0.15)
+
+    def test_2pl_recovers_known_discriminations(self):
+        responses, difficulties, discriminations = self.simulate('2pl')
+        calibration = calibrate(responses, '2pl')
+        self.assertTrue(calibration.converged)
+        self.assertGreater(np.corrcoef(calibration.discriminations, discriminations)[0, 1], 0.8)
+        self.assertGreater(np.corrcoef(calibration.difficulties, difficulties)[0, 1], 0.95)
+
+    def test_warm_start(self):
+        responses, _, _ = self.simulate('rasch')
+        cold = calibrate(responses)
+        difficulties = cold.difficulties + 0.5
+        warm = calibrate(responses, difficulties=difficulties)
+        self.assertLess(warm.iterations, cold.iterations)
+        # Шкала привязана к предыдущим параметрам, а не к нулю
+        np.testing.assert_allclose(warm.difficulties, difficulties, atol=1e-3)
+
+    def test_extreme_scores_dropped(self):
+        responses = Responses(
+            persons=np.array([0, 0, 1, 1, 2, 2]), items=np.array([0, 1, 0, 1, 0, 1]),
+            correct=np.array([True, True, True, False, False, True]), person_count=3, item_count=2
+        )
+        self.assertEqual(drop_extreme(responses).tolist(), [False, False, True, True, True, True])
+        calibration = calibrate(responses)
+        self.assertTrue(np.isnan(calibration.abilities[0]))
+        self.assertEqual(calibration.calibrated.tolist(), [True, True])
+
+    def test_latest_attempt_per_user(self):
+        TestResults.objects.create(test=self.tests[0], user=self.users[0], score=0,
+                                   right_questions=encode_bitsets(np.ones((1, 5), dtype=bool))[0])
+        responses, question_pks = load_responses([test.pk for test in self.tests])
+        self.assertEqual(question_pks, [quest.pk for questions in self.questions for quest in questions])
+        self.assertEqual((responses.person_count, len(responses.correct)), (300, 3000))
+        self.assertTrue(responses.correct[(responses.persons == 0) & (responses.items < 5)].all())
+
+    def test_command_stores_parameters(self):
+        call_command('calibrate_questions', stdout=StringIO())
+        difficulties = list(TestQuestions.objects.order_by('pk').values_list('irt_difficulty', flat=True))
+        self.assertAlmostEqual(sum(difficulties), 0)
+        self.assertLess(difficulties[0], difficulties[4])
+        self.assertEqual(set(TestQuestions.objects.values_list('irt_discrimination', flat=True)), {1.0})
+        call_command('calibrate_questions', model='2pl', stdout=StringIO())
+        self.assertAlmostEqual(sum(TestQuestions.objects.values_list('irt_difficulty', flat=True)), 0)
+        self.assertFalse(TestQuestions.objects.filter(irt_calibrated_at__isnull=True).exists())
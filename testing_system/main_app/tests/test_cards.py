@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users_app.models import User
+from ..models import Category, Tag, Test, TestQuestions
+
+
+class TestCardFieldsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestAuthor', password='somehardpassword')
+        cls.tag_1 = Tag.objects.create(title='python')
+        cls.tag_2 = Tag.objects.create(title='django')
+        cls.test = Test.objects.create(
+            title='TestTitle', author=cls.user, category=Category.objects.create(title='Category'),
+            is_published=True, is_created=True
+        )
+        cls.test.tags.add(cls.tag_1, cls.tag_2)
+        TestQuestions.objects.create(test=cls.test, question='Question 1')
+        TestQuestions.objects.create(test=cls.test, question='Question 2')
+
+    def test_card_fields(self):
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.question_count, 2)
+        self.assertEqual(self.test.tags_label, 'django, python')
+        self.assertEqual(self.test.author_name, 'TestAuthor')
+
+    def test_question_count_on_delete(self):
+        self.test.questions.first().delete()
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.question_count, 1)
+
+    def test_tags_label_on_tag_changes(self):
+        self.tag_1.title = 'flask'
+        self.tag_1.save()
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.tags_label, 'django, flask')
+        self.tag_2.delete()
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.tags_label, 'flask')
+
+    def test_author_name_on_username_change(self):
+        self.user.username = 'NewName'
+        self.user.save()
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.author_name, 'NewName')
+
+    def test_repair_command(self):
+        Test.objects.filter(pk=self.test.pk).update(question_count=0, tags_label='', author_name='')
+        call_command('repair_test_cards', stdout=StringIO())
+        self.test.refresh_from_db()
+        self.assertEqual(
+            (self.test.question_count, self.test.tags_label, self.test.author_name), (2, 'django, python', 'TestAuthor')
+        )
+
+    def test_tests_list_view_queries(self):
+        with CaptureQueriesContext(connection) as single_card:
+            self.client.get(reverse('main'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for num in range(5):
+                Test.objects.create(
+                    title=f'Test {num}', author=self.user, category=self.test.category, is_published=True,
+                    is_created=True
+                )
+        with CaptureQueriesContext(connection) as many_cards:
+            resp = self.client.get(reverse('main'))
+        self.assertEqual(len(single_card.captured_queries), len(many_cards.captured_queries))
+        self.assertContains(resp, 'Вопросов: 2')
+        self.assertContains(resp, 'Теги: django, python')
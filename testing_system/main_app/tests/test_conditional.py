@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..counters import increment_passed_times, flush_passed_times
+from ..models import Category, Test, TestQuestions, TestResults
+from ..purge import soft_delete_tests
+from ..scoring import rescore_test
+
+
+class ConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        cls.other = User.objects.create_user(username='OtherUser', password='somehardpassword')
+        cls.category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=cls.category,
+                                       is_created=True, is_published=True)
+        cls.other_test = Test.objects.create(title='OtherTitle', author=cls.user, category=cls.category,
+                                             is_created=True, is_published=True)
+        TestQuestions.objects.create(test=cls.test, question='Question 1')
+        TestResults.objects.create(test=cls.test, user=cls.user, score=100, right_questions=b'\x80')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def edit(self, func) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            func()
+
+    def get(self, url, resp=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': resp['ETag']} if resp is not None else {}
+        return self.client.get(url, params, **headers)
+
+    def test_detail_not_modified(self):
+        url = reverse('test_detail', args=[self.test.slug])
+        resp = self.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('no-cache', resp['Cache-Control'])
+        self.assertIn('private', resp['Cache-Control'])
+        # Сессия, пользователь и версия страницы
+        with self.assertNumQueries(3):
+            not_modified = self.get(url, resp)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        increment_passed_times(self.test.pk)
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['passed_times'], 1)
+        self.assertEqual(self.get(url, resp).status_code, 304)
+        # Перенос счётчика не меняет число на странице, но меняет время изменения теста
+        flush_passed_times()
+        self.assertEqual(self.get(url, resp).status_code, 200)
+
+    def test_detail_changed(self):
+        url = reverse('test_detail', args=[self.test.slug])
+        resp = self.get(url)
+        self.edit(lambda: TestQuestions.objects.create(test=self.test, question='Question 2'))
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['test']['question_count'], 2)
+        self.edit(lambda: soft_delete_tests(Test.objects.filter(pk=self.test.pk)))
+        self.assertEqual(self.get(url, resp).status_code, 404)
+
+    def test_etag_per_user(self):
+        url = reverse('test_detail', args=[self.test.slug])
+        resp = self.get(url)
+        self.client.login(username='OtherUser', password='somehardpassword')
+        self.assertEqual(self.get(url, resp).status_code, 200)
+
+    def test_last_modified(self):
+        url = reverse('test_detail', args=[self.test.slug])
+        resp = self.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified']).status_code, 304
+        )
+
+    def test_catalog_version(self):
+        url = reverse('main')
+        resp = self.get(url)
+        filtered = self.get(url, search='TestTitle')
+        # Сессия и пользователь, версия каталога и фасетов читается из кеша
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get(url, resp).status_code, 304)
+        self.assertEqual(self.get(url, filtered, search='TestTitle').status_code, 304)
+
+        # Черновик в каталоге не виден и версию не меняет
+        draft = Test.objects.create(title='Draft', author=self.user, category=self.category)
+        self.edit(lambda: draft.save())
+        self.assertEqual(self.get(url, resp).status_code, 304)
+
+        increment_passed_times(self.test.pk)
+        self.edit(flush_passed_times)
+        resp = self.get(url, filtered, search='TestTitle')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['tests'][0].passed_times, 1)
+
+    def test_catalog_test_removed(self):
+        url = reverse('main')
+        resp = self.get(url)
+        self.edit(lambda: soft_delete_tests(Test.objects.filter(pk=self.other_test.pk)))
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['tests']), 1)
+
+    def test_results(self):
+        url = reverse('my_results')
+        resp = self.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.get(url, resp).status_code, 304)
+
+        # Процентиль зависит от прохождений других пользователей
+        increment_passed_times(self.test.pk)
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        TestResults.objects.create(test=self.other_test, user=self.user, score=0, right_questions=b'\x00')
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['results']), 2)
+        self.assertEqual(self.get(url, resp).status_code, 304)
+
+    def test_results_after_rescore(self):
+        url = reverse('my_results')
+        resp = self.get(url)
+        self.assertEqual(self.get(url, resp).status_code, 304)
+        # У вопроса нет правильных ответов, поэтому пересчёт снимает его и меняет балл
+        self.assertEqual(rescore_test(self.test.pk)['changed'], 1)
+        resp = self.get(url, resp)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['results'][0].score, 0)
+        self.assertEqual(self.get(url, resp).status_code, 304)
@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from users_app.models import User
+from ..counters import increment_passed_times, get_passed_times, flush_passed_times, PASSED_TIMES_SHARDS
+from ..models import Category, Test, TestPassedCounter
+
+
+class PassedTimesCounterTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='TestAuthor', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=author, category=category, passed_times=3)
+
+    def test_increment_passed_times(self):
+        for _ in range(20):
+            increment_passed_times(self.test.pk)
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.passed_times, 3)
+        self.assertLessEqual(TestPassedCounter.objects.filter(test=self.test).count(), PASSED_TIMES_SHARDS)
+        self.assertEqual(get_passed_times(self.test.pk), 23)
+
+    def test_flush_passed_times(self):
+        for _ in range(5):
+            increment_passed_times(self.test.pk)
+        self.assertEqual(flush_passed_times(), 1)
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.passed_times, 8)
+        self.assertFalse(TestPassedCounter.objects.filter(count__gt=0).exists())
+        self.assertEqual(get_passed_times(self.test.pk), 8)
+        self.assertEqual(flush_passed_times(), 0)
+
+    def test_get_passed_times_missing_test(self):
+        self.assertEqual(get_passed_times(0), 0)
@@ -0,0 +1,109 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..detail_cache import (get_test_detail, get_detail_cache_stats, get_cache_key, TEST_DETAIL_LOCK_KEY,
+                            TEST_DETAIL_REFRESH_AFTER)
+from ..cards import repair_test_cards
+from ..models import Category, Tag, Test, TestQuestions
+
+
+class TestDetailCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        cls.category = Category.objects.create(title='TestCategory')
+        cls.tag = Tag.objects.create(title='python')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=cls.category,
+                                       is_created=True, is_published=True)
+        cls.test.tags.add(cls.tag)
+        TestQuestions.objects.create(test=cls.test, question='Question 1')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+        self.url = reverse('test_detail', args=[self.test.slug])
+
+    def edit(self, func) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            func()
+
+    def test_read_through(self):
+        resp = self.client.get(self.url)
+        self.assertContains(resp, 'Всего вопросов: 1')
+        self.assertContains(resp, 'Теги: python')
+        # Сессия, пользователь и счётчик прохождений
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.context['test']['category']['title'], 'TestCategory')
+        self.assertEqual(get_detail_cache_stats()['misses'], 1)
+        self.assertEqual(get_detail_cache_stats()['hits'], 1)
+        self.assertEqual(self.client.get(reverse('test_detail', args=['missing'])).status_code, 404)
+
+    def test_payload_is_plain_dict(self):
+        test = get_test_detail(self.test.slug)
+        self.assertEqual(cache.get(get_cache_key(self.test.slug))['test'], test)
+        self.assertIsInstance(test, dict)
+        self.assertEqual(test['author_name'], 'TestUser')
+
+    def test_invalidation(self):
+        self.client.get(self.url)
+        self.tag.title = 'django'
+        self.edit(self.tag.save)
+        self.assertContains(self.client.get(self.url), 'Теги: django')
+        self.category.title = 'Renamed'
+        self.edit(self.category.save)
+        self.assertContains(self.client.get(self.url), 'Renamed')
+        self.edit(lambda: TestQuestions.objects.create(test=self.test, question='Question 2'))
+        self.assertContains(self.client.get(self.url), 'Всего вопросов: 2')
+        self.edit(lambda: self.test.tags.add(Tag.objects.create(title='web')))
+        self.assertContains(self.client.get(self.url), 'django, web')
+        self.test.description = 'New description'
+        self.edit(self.test.save)
+        self.assertContains(self.client.get(self.url), 'New description')
+
+    def test_author_renamed(self):
+        self.assertEqual(get_test_detail(self.test.slug)['author_name'], 'TestUser')
+        self.user.username = 'RenamedUser'
+        self.edit(self.user.save)
+        self.assertEqual(get_test_detail(self.test.slug)['author_name'], 'RenamedUser')
+        # UPDATE без сигналов: имя в карточках и кеше исправляет repair_test_cards
+        User.objects.filter(pk=self.user.pk).update(username='RepairedUser')
+        self.assertEqual(get_test_detail(self.test.slug)['author_name'], 'RenamedUser')
+        self.edit(repair_test_cards)
+        self.assertEqual(get_test_detail(self.test.slug)['author_name'], 'RepairedUser')
+
+    def test_stale_entry_served_while_refreshing(self):
+        stale = {'test': {'pk': self.test.pk, 'title': 'Stale'}, 'refresh_at': time.time() - 1}
+        cache.set(get_cache_key(self.test.slug), stale)
+        cache.add(TEST_DETAIL_LOCK_KEY.format(slug=self.test.slug), 1)
+        self.assertEqual(get_test_detail(self.test.slug)['title'], 'Stale')
+        self.assertEqual(get_detail_cache_stats()['stale_hits'], 1)
+        cache.delete(TEST_DETAIL_LOCK_KEY.format(slug=self.test.slug))
+        self.assertEqual(get_test_detail(self.test.slug)['title'], 'TestTitle')
+        self.assertGreater(cache.get(get_cache_key(self.test.slug))['refresh_at'],
+                           time.time() + TEST_DETAIL_REFRESH_AFTER - 5)
+
+    def test_miss_waits_for_lock_holder(self):
+        cache.add(TEST_DETAIL_LOCK_KEY.format(slug=self.test.slug), 1)
+        built = {'test': {'pk': self.test.pk, 'title': 'Built'}, 'refresh_at': time.time() + 60}
+
+        def sleep(_):
+            cache.set(get_cache_key(self.test.slug), built)
+
+        with mock.patch('main_app.detail_cache.time.sleep', sleep), self.assertNumQueries(0):
+            self.assertEqual(get_test_detail(self.test.slug)['title'], 'Built')
+        cache.delete(get_cache_key(self.test.slug))
+        with mock.patch('main_app.detail_cache.time.sleep'):
+            self.assertEqual(get_test_detail(self.test.slug)['title'], 'TestTitle')
+
+    def test_stats_view(self):
+        self.assertEqual(self.client.get(reverse('test_detail_cache_stats')).status_code, 403)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.get(self.url)
+        resp = self.client.get(reverse('test_detail_cache_stats'))
+        self.assertEqual(resp.json()['misses'], 1)
@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..facets import get_facets, get_facets_version, count_facets, get_cleaned_filters
+from ..filters import TestsFilter
+from ..models import Category, Tag, Test, CATALOG_FILTER
+
+
+class FacetsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        cls.math = Category.objects.create(title='Математика')
+        cls.physics = Category.objects.create(title='Физика')
+        cls.easy = Tag.objects.create(title='easy')
+        cls.hard = Tag.objects.create(title='hard')
+        tests = [
+            ('Алгебра', cls.math, [cls.easy]),
+            ('Геометрия', cls.math, [cls.easy, cls.hard]),
+            ('Механика', cls.physics, [cls.hard]),
+        ]
+        for title, category, tags in tests:
+            test = Test.objects.create(
+                title=title, author=cls.user, category=category, is_published=True, is_created=True
+            )
+            test.tags.add(*tags)
+        draft = Test.objects.create(title='Черновик', author=cls.user, category=cls.physics, is_created=True)
+        draft.tags.add(cls.easy)
+        cls.draft = draft
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get_filterset(self, query: str = '') -> TestsFilter:
+        return TestsFilter(QueryDict(query), queryset=Test.objects.filter(CATALOG_FILTER))
+
+    def get_counts(self, facets: dict) -> dict:
+        return {name: {option['title']: option['count'] for option in options} for name, options in facets.items()}
+
+    def test_counts_in_one_aggregate_query(self):
+        filterset = self.get_filterset()
+        filters = get_cleaned_filters(filterset)
+        with self.assertNumQueries(2):
+            # Сгруппированные счётчики и названия найденных категорий и тегов
+            facets = count_facets(filterset, filters)
+        self.assertEqual(self.get_counts(facets), {
+            'category': {'Математика': 2, 'Физика': 1},
+            'tags': {'easy': 2, 'hard': 2},
+        })
+
+    def test_facet_ignores_own_filter(self):
+        facets = get_facets(self.get_filterset(f'category={self.math.pk}&tags={self.hard.pk}'))
+        self.assertEqual(self.get_counts(facets), {
+            'category': {'Математика': 1, 'Физика': 1},
+            'tags': {'easy': 2, 'hard': 1},
+        })
+
+    def test_multiple_tags_counted_once(self):
+        facets = get_facets(self.get_filterset(f'tags={self.easy.pk}&tags={self.hard.pk}'))
+        self.assertEqual(self.get_counts(facets)['category'], {'Математика': 2, 'Физика': 1})
+
+    def test_search_filter(self):
+        facets = get_facets(self.get_filterset('search=механика'))
+        self.assertEqual(self.get_counts(facets), {'category': {'Физика': 1}, 'tags': {'hard': 1}})
+
+    def test_cached_by_normalized_signature(self):
+        get_facets(self.get_filterset(f'title=Алг&category={self.math.pk}&ordering=title'))
+        with self.assertNumQueries(1):
+            # Единственный запрос - валидация выбранной категории формой фильтра
+            get_facets(self.get_filterset(f'category={self.math.pk}&title=  алг '))
+
+    def test_invalidated_on_publish_and_delete(self):
+        self.assertEqual(self.get_counts(get_facets(self.get_filterset()))['category']['Физика'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.is_published = True
+            self.draft.save()
+        counts = self.get_counts(get_facets(self.get_filterset()))
+        self.assertEqual(counts['category']['Физика'], 2)
+        self.assertEqual(counts['tags']['easy'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.delete()
+        self.assertEqual(self.get_counts(get_facets(self.get_filterset()))['category']['Физика'], 1)
+
+    def test_invalidated_only_by_catalog_changes(self):
+        version = get_facets_version()
+        published = Test.objects.get(title='Алгебра')
+        with self.captureOnCommitCallbacks(execute=True):
+            published.save()
+            self.draft.title = 'Новый черновик'
+            self.draft.save()
+            self.draft.tags.add(self.hard)
+            self.hard.tests.add(self.draft)
+        self.assertEqual(get_facets_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            published.tags.add(self.hard)
+            # До коммита версия не меняется
+            self.assertEqual(get_facets_version(), version)
+        self.assertNotEqual(get_facets_version(), version)
+        version = get_facets_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            published.category = self.physics
+            published.save()
+        self.assertNotEqual(get_facets_version(), version)
+        version = get_facets_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            published.is_published = False
+            published.save()
+        self.assertNotEqual(get_facets_version(), version)
+
+    def test_catalog_page(self):
+        resp = self.client.get(reverse('main'), {'tags': self.easy.pk})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.get_counts(resp.context['facets'])['category'], {'Математика': 2})
+        self.assertContains(resp, f'?tags={self.easy.pk}&amp;tags={self.hard.pk}')
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..grading import build_answer_key
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults
+from ..snapshots import get_snapshot, load_snapshot
+
+
+class AnswerKeyTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='TestAuthor', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=author, category=category, is_created=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 2', is_right=True)
+        cls.answer_3 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 3', is_right=False)
+        cls.answer_4 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 4', is_right=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+
+    def test_build_answer_key(self):
+        with self.assertNumQueries(2):
+            answer_key = build_answer_key(self.test.pk)
+        self.assertEqual(answer_key.question_count, 2)
+        self.assertEqual(answer_key.answers, {
+            self.quest_1.pk: frozenset([self.answer_1.pk, self.answer_2.pk]),
+            self.quest_2.pk: frozenset([self.answer_4.pk]),
+        })
+        self.assertEqual(
+            answer_key.answer_pks, (self.answer_1.pk, self.answer_2.pk, self.answer_3.pk, self.answer_4.pk)
+        )
+
+    def test_grade(self):
+        answer_key = build_answer_key(self.test.pk)
+        questions_resp = {
+            self.quest_1.pk: [self.answer_2.pk, self.answer_1.pk],
+            self.quest_2.pk: [self.answer_3.pk, self.answer_4.pk],
+        }
+        rights_answers = answer_key.grade(questions_resp)
+        self.assertEqual(rights_answers, [self.quest_1.pk])
+        self.assertEqual(answer_key.score(rights_answers), 50)
+
+    def test_grade_unanswered(self):
+        answer_key = build_answer_key(self.test.pk)
+        self.assertEqual(answer_key.grade({}), [])
+        self.assertEqual(answer_key.score([]), 0)
+
+    def test_answer_key_cached(self):
+        get_snapshot(self.test.pk)
+        with self.assertNumQueries(0):
+            get_snapshot(self.test.pk).answer_key
+
+    def test_answer_key_invalidated_on_answer_change(self):
+        get_snapshot(self.test.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.answer_3.is_right = True
+            self.answer_3.save()
+        answer_key = get_snapshot(self.test.pk).answer_key
+        self.assertEqual(answer_key.answers[self.quest_2.pk], frozenset([self.answer_3.pk, self.answer_4.pk]))
+
+    def test_answer_key_invalidated_on_question_change(self):
+        get_snapshot(self.test.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            quest = TestQuestions.objects.create(test=self.test, question='Question 3')
+        answer_key = get_snapshot(self.test.pk).answer_key
+        self.assertEqual(answer_key.question_count, 3)
+        self.assertEqual(answer_key.answers[quest.pk], frozenset())
+        with self.captureOnCommitCallbacks(execute=True):
+            quest.delete()
+        self.assertEqual(get_snapshot(self.test.pk).answer_key.question_count, 2)
+
+
+class TestingFinishingViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category, is_created=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 2', is_right=True)
+        cls.answer_3 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 3', is_right=False)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def test_view_post_method(self):
+        data = {str(self.answer_1.pk): self.quest_1.pk, str(self.answer_3.pk): self.quest_2.pk}
+        resp = self.client.post(reverse('test_finish', kwargs={'test_pk': self.test.pk}), data=data)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'main_app/finish_test_page.html')
+        self.assertEqual(resp.context['rights_answers'], [self.quest_1.pk])
+        result = TestResults.objects.get(test=self.test, user=self.user)
+        self.assertEqual(result.score, 50)
+        self.assertEqual([quest.pk for quest in result.get_right_questions()], [self.quest_1.pk])
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..histograms import add_score, get_histogram, get_percentile, get_distribution, rebuild_histograms
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults, TestScoreHistogram
+
+
+class ScoreHistogramTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category,
+                                       is_created=True, is_published=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 2', is_right=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def test_add_score(self):
+        for score in (0, 50, 50, 100):
+            add_score(self.test.pk, score)
+        histogram = get_histogram(self.test.pk)
+        self.assertEqual(len(histogram), 101)
+        self.assertEqual((histogram[0], histogram[50], histogram[100], sum(histogram)), (1, 2, 1, 4))
+        self.assertEqual(get_percentile(histogram, 50), 25)
+        self.assertEqual(get_percentile(histogram, 100), 75)
+        self.assertEqual(get_percentile(get_histogram(0), 100), 0)
+
+    def test_distribution(self):
+        histogram = [0] * 101
+        histogram[5], histogram[95], histogram[100] = 1, 1, 3
+        distribution = get_distribution(histogram)
+        self.assertEqual(len(distribution), 10)
+        self.assertEqual(distribution[0], dict(start=0, end=9, count=1, percent=25))
+        self.assertEqual(distribution[-1], dict(start=90, end=100, count=4, percent=100))
+
+    def test_finish_page_percentile(self):
+        add_score(self.test.pk, 0)
+        resp = self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            str(self.answer_1.pk): str(self.quest_1.pk)
+        })
+        self.assertEqual(resp.context['percentile'], 50)
+        self.assertEqual(sum(get_histogram(self.test.pk)), 2)
+        # Сессия, пользователь, два запроса версии страницы, результаты и одно чтение распределений
+        # без COUNT по результатам. Вопросы берутся из снимка в кеше процесса
+        with self.assertNumQueries(6):
+            resp = self.client.get(reverse('my_results'))
+        self.assertEqual(resp.context['results'][0].percentile, 50)
+
+    def test_rebuild(self):
+        for score in (10, 10, 90):
+            TestResults.objects.create(test=self.test, user=self.user, score=score)
+        add_score(self.test.pk, 55)
+        self.assertEqual(rebuild_histograms([self.test.pk]), 1)
+        self.assertEqual(TestScoreHistogram.objects.count(), 1)
+        histogram = get_histogram(self.test.pk)
+        self.assertEqual((histogram[10], histogram[55], histogram[90]), (2, 0, 1))
+        TestScoreHistogram.objects.all().delete()
+        call_command('rebuild_score_histograms', all=True, stdout=StringIO())
+        self.assertEqual(get_histogram(self.test.pk), histogram)
+
+    def test_user_tests_distribution(self):
+        add_score(self.test.pk, 100)
+        resp = self.client.get(reverse('my_tests'))
+        test = resp.context['tests'][0]
+        self.assertEqual(test.results_count, 1)
+        self.assertEqual(test.score_distribution[-1]['count'], 1)
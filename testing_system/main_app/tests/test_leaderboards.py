@@ -0,0 +1,146 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from users_app.models import User
+from ..leaderboards import (record_attempt, get_board_queryset, get_rank, rebuild_leaderboards,
+                            remove_category_best_attempts)
+from ..purge import soft_delete_tests, soft_delete_category
+from ..scoring import rescore_test
+from ..snapshots import load_snapshot
+from ..views import TestLeaderboardView
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults, TestBestAttempt, CategoryBestAttempt
+
+
+class LeaderboardTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'User{num}', password='somehardpassword') for num in range(3)
+        ]
+        cls.category = Category.objects.create(title='TestCategory')
+        cls.tests = [
+            Test.objects.create(title=f'Test {num}', author=cls.users[0], category=cls.category,
+                                is_created=True, is_published=True)
+            for num in range(2)
+        ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+        self.client.login(username='User0', password='somehardpassword')
+
+    def add_result(self, user, test, score: int, minutes_ago: int) -> TestResults:
+        result = TestResults.objects.create(test=test, user=user, score=score)
+        result.completed_at = now() - timedelta(minutes=minutes_ago)
+        TestResults.objects.filter(pk=result.pk).update(completed_at=result.completed_at)
+        record_attempt(result, test.category_id)
+        return result
+
+    def fill(self) -> None:
+        self.add_result(self.users[0], self.tests[0], 50, 10)
+        self.add_result(self.users[0], self.tests[0], 80, 5)
+        self.add_result(self.users[0], self.tests[0], 60, 1)
+        self.add_result(self.users[1], self.tests[0], 80, 7)
+        self.add_result(self.users[2], self.tests[0], 90, 3)
+        self.add_result(self.users[1], self.tests[1], 100, 2)
+
+    def test_best_attempts(self):
+        self.fill()
+        entries = list(get_board_queryset(TestBestAttempt, test=self.tests[0]))
+        self.assertEqual([(entry.user, entry.score) for entry in entries],
+                         [(self.users[2], 90), (self.users[1], 80), (self.users[0], 80)])
+        self.assertEqual([get_rank(entry) for entry in entries], [1, 2, 3])
+        entries = list(get_board_queryset(CategoryBestAttempt, category=self.category))
+        self.assertEqual([(entry.user, entry.score) for entry in entries],
+                         [(self.users[1], 100), (self.users[2], 90), (self.users[0], 80)])
+
+    def test_rebuild(self):
+        self.fill()
+        expected = list(TestBestAttempt.objects.order_by('pk').values_list('test', 'user', 'score', 'completed_at'))
+        expected_category = list(CategoryBestAttempt.objects.order_by('pk').values_list('category', 'user', 'score'))
+        TestBestAttempt.objects.all().delete()
+        CategoryBestAttempt.objects.update(score=0)
+        rebuild_leaderboards([self.tests[0].pk])
+        call_command('rebuild_leaderboards', all=True, stdout=StringIO())
+        self.assertEqual(
+            sorted(TestBestAttempt.objects.values_list('test', 'user', 'score', 'completed_at')), sorted(expected)
+        )
+        self.assertEqual(
+            sorted(CategoryBestAttempt.objects.values_list('category', 'user', 'score')), sorted(expected_category)
+        )
+
+    def test_soft_delete(self):
+        self.fill()
+        expected = dict(CategoryBestAttempt.objects.values_list('user', 'score'))
+        soft_delete_tests(Test.objects.filter(pk=self.tests[1].pk))
+        # Лучшей попыткой в категории становится попытка оставшегося теста
+        entry = CategoryBestAttempt.objects.get(category=self.category, user=self.users[1])
+        self.assertEqual((entry.test_id, entry.score), (self.tests[0].pk, 80))
+        expected[entry.user_id] = 80
+        self.assertEqual(dict(CategoryBestAttempt.objects.values_list('user', 'score')), expected)
+        # Тест без попыток не трогает таблицы лидеров
+        draft = Test.objects.create(title='Draft', author=self.users[0], category=self.category, is_created=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(remove_category_best_attempts([draft.pk]), 0)
+        soft_delete_category(self.category)
+        self.assertFalse(CategoryBestAttempt.objects.exists())
+
+    def test_rescore(self):
+        quest = TestQuestions.objects.create(test=self.tests[0], question='Question')
+        answer = TestAnswers.objects.create(question=quest, answer='Answer', is_right=True)
+        self.client.post(reverse('test_finish', args=[self.tests[0].pk]), {str(answer.pk): str(quest.pk)})
+        TestAnswers.objects.filter(pk=answer.pk).update(is_right=False)
+        rescore_test(self.tests[0].pk)
+        self.assertEqual(TestBestAttempt.objects.get(test=self.tests[0], user=self.users[0]).score, 0)
+        self.assertEqual(CategoryBestAttempt.objects.get(category=self.category, user=self.users[0]).score, 0)
+
+    def test_finish_records_attempt(self):
+        quest = TestQuestions.objects.create(test=self.tests[0], question='Question')
+        answer = TestAnswers.objects.create(question=quest, answer='Answer', is_right=True)
+        self.client.post(reverse('test_finish', args=[self.tests[0].pk]), {str(answer.pk): str(quest.pk)})
+        self.assertEqual(TestBestAttempt.objects.get(test=self.tests[0], user=self.users[0]).score, 100)
+        self.assertEqual(CategoryBestAttempt.objects.get(category=self.category, user=self.users[0]).score, 100)
+
+    def test_leaderboard_views(self):
+        self.fill()
+        resp = self.client.get(reverse('test_leaderboard', args=[self.tests[0].slug]))
+        self.assertEqual([(entry.rank, entry.user) for entry in resp.context['entries']],
+                         [(1, self.users[2]), (2, self.users[1]), (3, self.users[0])])
+        self.assertEqual(resp.context['user_rank'], 3)
+        resp = self.client.get(reverse('category_leaderboard', args=[self.category.slug]))
+        self.assertEqual(resp.context['user_rank'], 3)
+        self.assertContains(resp, 'Ваше место: 3')
+        self.assertEqual(self.client.get(reverse('test_leaderboard', args=['missing'])).status_code, 404)
+        soft_delete_category(self.category)
+        self.assertEqual(self.client.get(reverse('category_leaderboard', args=[self.category.slug])).status_code, 404)
+
+    def test_leaderboard_pagination(self):
+        self.fill()
+        url = reverse('test_leaderboard', args=[self.tests[0].slug])
+        with mock.patch.object(TestLeaderboardView, 'paginate_by', 2):
+            resp = self.client.get(url)
+            resp = self.client.get(url, {'cursor': resp.context['page_obj'].next_cursor})
+        self.assertEqual([(entry.rank, entry.user) for entry in resp.context['entries']], [(3, self.users[0])])
+
+    def test_leaderboard_pagination_ties(self):
+        for user in self.users:
+            self.add_result(user, self.tests[0], 70, 5)
+        TestBestAttempt.objects.update(completed_at=now())
+        url, entries, params = reverse('test_leaderboard', args=[self.tests[0].slug]), [], {}
+        with mock.patch.object(TestLeaderboardView, 'paginate_by', 1):
+            while True:
+                resp = self.client.get(url, params)
+                entries += [(entry.rank, entry.pk) for entry in resp.context['entries']]
+                if not resp.context['page_obj'].next_cursor:
+                    break
+                params = {'cursor': resp.context['page_obj'].next_cursor}
+        # При равных балле и времени страницы идут в порядке индекса рейтинга, как и места
+        expected = get_board_queryset(TestBestAttempt, test=self.tests[0]).values_list('pk', flat=True)
+        self.assertEqual(entries, list(enumerate(expected, 1)))
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from users_app.models import User
+from ..filters import TestsFilter
+from ..models import Category, Test
+from ..pagination import KeysetPaginator, approximate_count
+
+
+class KeysetPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        published_at = now()
+        for num in range(7):
+            test = Test.objects.create(
+                title=f'Test {num % 3}', author=cls.user, category=category, passed_times=num % 2,
+                is_published=True, is_created=True
+            )
+            Test.objects.filter(pk=test.pk).update(published_at=published_at - timedelta(days=num % 4))
+
+    def walk(self, paginator: KeysetPaginator) -> tuple:
+        forward, pages = [], []
+        page = paginator.get_page()
+        pages.append(page)
+        forward.extend(page.object_list)
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append(page)
+            forward.extend(page.object_list)
+        backward = list(page.object_list)
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            backward = page.object_list + backward
+        return forward, backward, pages
+
+    def test_ordering_list(self):
+        for ordering, _ in TestsFilter.ORDERING_LIST:
+            paginator = KeysetPaginator(Test.objects.order_by(ordering), per_page=3)
+            expected = list(Test.objects.order_by(*paginator.ordering))
+            forward, backward, pages = self.walk(paginator)
+            self.assertEqual(forward, expected, ordering)
+            self.assertEqual(backward, expected, ordering)
+            self.assertEqual([len(page) for page in pages], [3, 3, 1])
+            self.assertFalse(pages[0].has_previous())
+
+    def test_default_ordering(self):
+        paginator = KeysetPaginator(Test.objects.all(), per_page=2)
+        self.assertEqual(paginator.ordering, ['-created_at', '-pk'])
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Test.objects.order_by('title'), per_page=3)
+        self.assertEqual(paginator.get_page('broken').object_list, paginator.get_page().object_list)
+
+    def test_approximate_count(self):
+        self.assertEqual(approximate_count(Test.objects.all()), 7)
+        self.assertGreaterEqual(approximate_count(Test.objects.all(), threshold=5), 5)
+
+    def test_tests_list_view(self):
+        resp = self.client.get(reverse('main'), {'ordering': 'title'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['tests']), 7)
+        self.assertEqual(resp.context['paginator'].count, 7)
+        self.assertFalse(resp.context['is_paginated'])
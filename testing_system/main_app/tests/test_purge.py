@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from moder_app.models import ModerationLease
+from users_app.models import User
+from ..models import Category, Tag, Test, TestAnswers, TestPassedCounter, TestQuestions, TestResults
+from ..purge import purge_deleted, soft_delete_category, soft_delete_tag, soft_delete_tests
+
+
+class SoftDeleteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestAuthor', password='somehardpassword', is_moder=True)
+        cls.category = Category.objects.create(title='Category')
+        cls.tag_1 = Tag.objects.create(title='python')
+        cls.tag_2 = Tag.objects.create(title='django')
+        cls.tests = [
+            Test.objects.create(title=f'Test {num}', author=cls.user, category=cls.category,
+                                is_published=True, is_created=True)
+            for num in range(3)
+        ]
+        for test in cls.tests:
+            test.tags.add(cls.tag_1, cls.tag_2)
+            question = TestQuestions.objects.create(test=test, question='Question')
+            TestAnswers.objects.create(question=question, answer='Answer', is_right=True)
+            TestResults.objects.create(test=test, user=cls.user, score=100, right_questions=b'\x80')
+            TestPassedCounter.objects.create(test=test, shard=0, count=1)
+
+    def setUp(self):
+        self.client.login(username='TestAuthor', password='somehardpassword')
+
+    def test_deleted_test_hidden(self):
+        resp = self.client.get(reverse('test_delete'), {'test_slug': self.tests[0].slug})
+        self.assertEqual(resp.status_code, 302)
+        self.assertTrue(Test.all_objects.filter(pk=self.tests[0].pk, is_deleted=True).exists())
+        self.assertTrue(TestQuestions.objects.filter(test=self.tests[0]).exists())
+        resp = self.client.get(reverse('main'))
+        self.assertNotIn(self.tests[0], resp.context['tests'])
+        self.assertEqual(self.client.get(reverse('test_detail', args=[self.tests[0].slug])).status_code, 404)
+        resp = self.client.get(reverse('my_results'))
+        self.assertEqual(len(resp.context['results']), 2)
+
+    def test_deleted_tag_hidden(self):
+        self.client.get(reverse('tag_delete'), {'slug_tag': self.tag_1.slug})
+        self.assertFalse(Tag.objects.filter(pk=self.tag_1.pk).exists())
+        self.tests[0].refresh_from_db()
+        self.assertEqual(self.tests[0].tags_label, 'django')
+        self.assertEqual(list(self.tests[0].tags.all()), [self.tag_2])
+
+    def test_deleted_category_hidden(self):
+        self.client.get(reverse('category_delete'), {'slug_category': self.category.slug})
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(Test.objects.exists())
+
+    def test_purge_test(self):
+        ModerationLease.objects.create(test=self.tests[0], moderator=self.user, expires_at=self.tests[0].created_at)
+        soft_delete_tests(Test.objects.filter(pk__in=[self.tests[0].pk, self.tests[1].pk]))
+        progress = []
+        purged = purge_deleted(Test, chunk_size=1, progress=lambda *args: progress.append(args[1:]))
+        self.assertEqual(purged, 2)
+        self.assertEqual([item[0] for item in progress], [1, 2])
+        self.assertEqual(list(Test.all_objects.values_list('pk', flat=True)), [self.tests[2].pk])
+        self.assertEqual(TestQuestions.objects.count(), 1)
+        self.assertEqual(TestAnswers.objects.count(), 1)
+        self.assertEqual(TestResults.objects.count(), 1)
+        self.assertEqual(Test.tags.through.objects.count(), 2)
+        self.assertEqual(TestPassedCounter.objects.count(), 1)
+        self.assertFalse(ModerationLease.objects.exists())
+
+    def test_purge_tag(self):
+        soft_delete_tag(self.tag_1)
+        self.assertEqual(purge_deleted(Tag), 1)
+        self.assertEqual(list(Tag.all_objects.all()), [self.tag_2])
+        self.assertEqual(Test.tags.through.objects.count(), 3)
+        self.assertEqual(Test.objects.count(), 3)
+
+    def test_purge_command(self):
+        soft_delete_category(self.category)
+        out = StringIO()
+        call_command('purge_deleted', chunk_size=2, stdout=out)
+        self.assertFalse(Category.all_objects.exists())
+        self.assertFalse(Test.all_objects.exists())
+        self.assertFalse(TestResults.objects.exists())
+        self.assertIn('purged 3', out.getvalue())
+
+    def test_purge_abandoned_questions(self):
+        abandoned, fresh = [
+            Test.objects.create(title=title, author=self.user, category=self.category) for title in ('Old', 'New')
+        ]
+        for test in (abandoned, fresh):
+            TestQuestions.objects.create(test=test, question='Question')
+        Test.objects.filter(pk__in=[abandoned.pk, self.tests[0].pk]).update(updated_at=now() - timedelta(days=31))
+        out = StringIO()
+        call_command('purge_deleted', stdout=out)
+        self.assertIn('Abandoned questions: purged 1', out.getvalue())
+        self.assertFalse(abandoned.questions.exists())
+        self.assertEqual(Test.objects.get(pk=abandoned.pk).question_count, 0)
+        self.assertTrue(fresh.questions.exists())
+        self.assertTrue(self.tests[0].questions.exists())
@@ -0,0 +1,100 @@
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.core.management import call_command
+
+from users_app.models import User
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults
+from ..bitsets import encode_bitset, decode_bitset
+from ..histograms import get_histogram
+from ..scoring import load_answer_key_matrix, grade_selections, compute_scores, rescore_test
+from ..snapshots import get_snapshot, load_snapshot
+
+
+class ScoringTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category, is_created=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 2', is_right=True)
+        cls.answer_3 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 3', is_right=False)
+        cls.answer_4 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 4', is_right=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+
+    def test_load_answer_key_matrix(self):
+        key_matrix = load_answer_key_matrix(self.test.pk)
+        self.assertEqual(key_matrix.question_pks.tolist(), [self.quest_1.pk, self.quest_2.pk])
+        self.assertEqual(
+            key_matrix.answer_pks.tolist(), [self.answer_1.pk, self.answer_2.pk, self.answer_3.pk, self.answer_4.pk]
+        )
+        self.assertEqual(key_matrix.answer_questions.tolist(), [0, 0, 1, 1])
+        self.assertEqual(key_matrix.key.tolist(), [True, True, False, True])
+        self.assertEqual(key_matrix.question_starts.tolist(), [0, 2])
+
+    def test_grade_selections(self):
+        key_matrix = load_answer_key_matrix(self.test.pk)
+        selected = np.array([
+            [True, True, False, True],
+            [True, False, False, True],
+            [True, True, True, True],
+            [False, False, False, False],
+        ])
+        correct = grade_selections(selected, key_matrix)
+        self.assertEqual(correct.tolist(), [[True, True], [False, True], [True, False], [False, False]])
+        self.assertEqual(compute_scores(correct).tolist(), [100, 50, 50, 0])
+
+    def test_rescore_test(self):
+        result = TestResults.objects.create(test=self.test, user=self.user, score=100, right_questions=b'\xc0')
+        untouched = TestResults.objects.create(test=self.test, user=self.user, score=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            TestQuestions.objects.create(test=self.test, question='Question 3')
+        TestAnswers.objects.filter(question=self.quest_2).update(is_right=False)
+
+        stats = rescore_test(self.test.pk, chunk_size=1)
+        self.assertEqual(stats, dict(results=2, changed=1))
+        result.refresh_from_db()
+        self.assertEqual(result.score, 33)
+        self.assertEqual([quest.pk for quest in result.get_right_questions()], [self.quest_1.pk])
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.score, 0)
+        # Распределение баллов собрано по новым баллам
+        self.assertEqual(get_histogram(self.test.pk)[33], 1)
+        self.assertEqual(get_histogram(self.test.pk)[100], 0)
+
+    def test_rescore_results_command(self):
+        result = TestResults.objects.create(test=self.test, user=self.user, score=0, right_questions=b'\x80')
+        call_command('rescore_results', self.test.pk, stdout=StringIO())
+        result.refresh_from_db()
+        self.assertEqual(result.score, 50)
+
+    def test_rescore_by_attempt_version(self):
+        snapshot = get_snapshot(self.test.pk)
+        answer_key = snapshot.answer_key
+        result = TestResults.objects.create(
+            test=self.test, user=self.user, score=50, test_version=snapshot.version,
+            right_questions=encode_bitset(answer_key.question_pks, [self.quest_2.pk]),
+            answer_sheet=encode_bitset(answer_key.answer_pks, [self.answer_1.pk, self.answer_4.pk])
+        )
+        # Удалённый вопрос сдвинул бы позиции битов, если читать попытку по текущему тесту
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quest_1.delete()
+            question = TestQuestions.objects.create(test=self.test, question='Question 3')
+            TestAnswers.objects.create(question=question, answer='New', is_right=True)
+        TestAnswers.objects.filter(pk=self.answer_4.pk).update(is_right=False)
+        TestAnswers.objects.filter(pk=self.answer_3.pk).update(is_right=True)
+
+        self.assertEqual(rescore_test(self.test.pk), dict(results=1, changed=1))
+        result.refresh_from_db()
+        # Оценивается только оставшийся в тесте вопрос версии попытки
+        self.assertEqual(result.score, 0)
+        self.assertEqual(decode_bitset(answer_key.question_pks, result.right_questions), [])
+        self.assertEqual(result.get_test_questions(), snapshot.questions)
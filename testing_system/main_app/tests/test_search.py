@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..filters import TestsFilter
+from ..models import Category, Tag, Test
+
+
+class TestSearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        cls.category = Category.objects.create(title='Программирование')
+        cls.tag = Tag.objects.create(title='django')
+        cls.python_test = Test.objects.create(
+            title='Основы Python', description='Переменные и функции', author=cls.user, category=cls.category,
+            is_published=True, is_created=True
+        )
+        cls.python_test.tags.add(cls.tag)
+        cls.history_test = Test.objects.create(
+            title='История России', author=cls.user, category=Category.objects.create(title='История'),
+            is_published=True, is_created=True
+        )
+
+    def search(self, value: str) -> list:
+        return list(TestsFilter({'search': value}, queryset=Test.objects.all()).qs)
+
+    def test_search_vector_filled(self):
+        self.python_test.refresh_from_db()
+        self.assertIn('python', self.python_test.search_vector)
+        self.assertIn('django', self.python_test.search_vector)
+
+    def test_search_by_title_and_description(self):
+        self.assertEqual(self.search('python'), [self.python_test])
+        self.assertEqual(self.search('функция'), [self.python_test])
+
+    def test_search_by_tag_and_category(self):
+        self.assertEqual(self.search('django'), [self.python_test])
+        self.assertEqual(self.search('программирование'), [self.python_test])
+
+    def test_search_vector_updated_on_tag_and_category_change(self):
+        self.tag.title = 'flask'
+        self.tag.save()
+        self.assertEqual(self.search('flask'), [self.python_test])
+        self.category.title = 'Разработка'
+        self.category.save()
+        self.assertEqual(self.search('разработка'), [self.python_test])
+        self.python_test.tags.remove(self.tag)
+        self.assertEqual(self.search('flask'), [])
+
+    def test_search_vector_updated_on_tag_delete(self):
+        self.tag.delete()
+        self.assertEqual(self.search('django'), [])
+
+    def test_search_ranking(self):
+        other = Test.objects.create(
+            title='Тест по истории', description='Python', author=self.user, category=self.category
+        )
+        self.assertEqual(self.search('python'), [self.python_test, other])
+
+    def test_search_trigram_fallback(self):
+        self.assertEqual(self.search('Истрия Росии'), [self.history_test])
+
+    def test_tests_list_view_search(self):
+        resp = self.client.get(reverse('main'), {'search': 'django'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.context['tests']), [self.python_test])
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..grading import build_answer_key
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults, TestSnapshot
+from ..purge import soft_delete_tests
+from ..snapshots import get_snapshot, compile_snapshot, load_snapshot
+
+
+class TestSnapshotTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category,
+                                       is_created=True, is_published=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1', image='img/quest.png')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 2', is_right=True)
+        cls.answer_3 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 3', is_right=False)
+
+    def setUp(self) -> None:
+        cache.clear()
+        # Откат транзакции теста освобождает номера версий, а кеш процесса помнит их содержимое
+        load_snapshot.cache_clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def edit(self, func) -> None:
+        # Ключ версии в кеше сбрасывается после коммита правки
+        with self.captureOnCommitCallbacks(execute=True):
+            func()
+
+    def test_snapshot_contents(self):
+        snapshot = get_snapshot(self.test.pk)
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual((snapshot.title, snapshot.slug), (self.test.title, self.test.slug))
+        self.assertEqual([quest.pk for quest in snapshot.questions], [self.quest_1.pk, self.quest_2.pk])
+        self.assertEqual(snapshot.questions[0].image_url, self.quest_1.image.url)
+        self.assertEqual(snapshot.questions[1].image_url, '')
+        self.assertEqual(snapshot.answer_key, build_answer_key(self.test.pk))
+        self.assertEqual(compile_snapshot(self.test.pk), 1)
+        self.assertEqual(TestSnapshot.objects.filter(test=self.test).count(), 1)
+
+    def test_start_reads_only_snapshot(self):
+        url = reverse('test_start', args=[self.test.pk])
+        self.client.get(url)
+        # Сессия и пользователь: вопросы, ответы и сам тест берутся из снимка
+        with self.assertNumQueries(2):
+            resp = self.client.get(url)
+        self.assertEqual(resp.context['test_version'], 1)
+        self.assertContains(resp, 'Answer 3')
+        self.assertContains(resp, self.quest_1.image.url)
+
+    def test_questions_fragment_follows_version(self):
+        url = reverse('test_start', args=[self.test.pk])
+        self.client.get(url)
+        self.assertIsNotNone(cache.get(make_template_fragment_key('start_test_questions', [self.test.pk, 1])))
+        self.quest_2.question = 'Edited question'
+        self.edit(self.quest_2.save)
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['test_version'], 2)
+        self.assertContains(resp, 'Edited question')
+        self.assertContains(resp, 'csrfmiddlewaretoken')
+
+    def test_edit_during_attempt(self):
+        resp = self.client.get(reverse('test_start', args=[self.test.pk]))
+        version = resp.context['test_version']
+        self.answer_3.is_right = True
+        self.edit(self.answer_3.save)
+        self.edit(lambda: TestQuestions.objects.create(test=self.test, question='Question 3'))
+
+        resp = self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            'version': version, str(self.answer_1.pk): str(self.quest_1.pk), str(self.answer_2.pk): str(self.quest_2.pk)
+        })
+        self.assertEqual(resp.context['rights_answers'], [self.quest_1.pk, self.quest_2.pk])
+        result = TestResults.objects.get(test=self.test, user=self.user)
+        self.assertEqual((result.score, result.test_version), (100, 1))
+
+        snapshot = get_snapshot(self.test.pk)
+        self.assertEqual((snapshot.version, len(snapshot.questions)), (2, 3))
+        resp = self.client.get(reverse('test_result', args=[result.pk]))
+        self.assertEqual(len(resp.context['questions']), 2)
+        self.assertEqual(resp.context['user_answers'], [self.answer_1.pk, self.answer_2.pk])
+
+    def test_unknown_version(self):
+        resp = self.client.post(reverse('test_finish', args=[self.test.pk]), {'version': 99})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post(reverse('test_finish', args=[self.test.pk]), {'version': 'x'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_deleted_test_cannot_be_taken(self):
+        version = get_snapshot(self.test.pk).version
+        self.assertEqual(self.client.get(reverse('test_start', args=[self.test.pk])).status_code, 200)
+        self.edit(lambda: soft_delete_tests(Test.objects.filter(pk=self.test.pk)))
+        self.assertEqual(self.client.get(reverse('test_start', args=[self.test.pk])).status_code, 404)
+        resp = self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            'version': version, str(self.answer_1.pk): str(self.quest_1.pk)
+        })
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(TestResults.objects.filter(test=self.test).exists())
@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from users_app.models import User
+from ..models import Category, Test, TestQuestions, TestAnswers, TestResults, UserStatistics
+from ..purge import soft_delete_tests, soft_delete_category
+from ..scoring import rescore_test
+from ..snapshots import load_snapshot
+from ..user_statistics import record_statistics, rebuild_user_statistics
+
+
+class UserStatisticsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        cls.python = Category.objects.create(title='Python')
+        cls.django = Category.objects.create(title='Django')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=cls.python,
+                                       is_created=True, is_published=True)
+        cls.other_test = Test.objects.create(title='OtherTitle', author=cls.user, category=cls.django,
+                                             is_created=True, is_published=True)
+        cls.quest_1 = TestQuestions.objects.create(test=cls.test, question='Question 1')
+        cls.quest_2 = TestQuestions.objects.create(test=cls.test, question='Question 2')
+        cls.answer_1 = TestAnswers.objects.create(question=cls.quest_1, answer='Answer 1', is_right=True)
+        cls.answer_2 = TestAnswers.objects.create(question=cls.quest_2, answer='Answer 2', is_right=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        load_snapshot.cache_clear()
+        self.client.login(username='TestUser', password='somehardpassword')
+
+    def create_result(self, test: Test, score: int) -> TestResults:
+        result = TestResults.objects.create(test=test, user=self.user, score=score)
+        record_statistics(result, test.category_id)
+        return result
+
+    def test_record(self):
+        self.create_result(self.test, 40)
+        self.create_result(self.test, 80)
+        last = self.create_result(self.other_test, 30)
+        statistics = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((statistics.attempts, statistics.score_sum, statistics.best_score), (3, 150, 80))
+        self.assertEqual(statistics.average_score, 50)
+        self.assertEqual(statistics.last_activity_at, last.completed_at)
+        self.assertEqual(statistics.get_categories(), [
+            dict(title='Django', attempts=1, average_score=30),
+            dict(title='Python', attempts=2, average_score=60),
+        ])
+
+    def test_finish_page(self):
+        self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            str(self.answer_1.pk): str(self.quest_1.pk)
+        })
+        statistics = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((statistics.attempts, statistics.best_score), (1, 50))
+        self.assertEqual(statistics.categories[str(self.python.pk)]['title'], 'Python')
+
+    def test_rebuild(self):
+        for test, score in ((self.test, 40), (self.test, 80), (self.other_test, 30)):
+            self.create_result(test, score)
+        recorded = UserStatistics.objects.values().get(user=self.user)
+        TestResults.objects.create(test=self.other_test, user=self.user, score=90)
+        self.assertEqual(rebuild_user_statistics([self.user.pk]), 1)
+        statistics = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((statistics.attempts, statistics.best_score), (4, 90))
+        self.assertEqual(
+            statistics.categories[str(self.django.pk)], {'title': 'Django', 'attempts': 2, 'score_sum': 120}
+        )
+
+        TestResults.objects.filter(score=90).delete()
+        call_command('rebuild_user_statistics', all=True, chunk_size=1, stdout=StringIO())
+        rebuilt = UserStatistics.objects.values().get(user=self.user)
+        self.assertEqual({**rebuilt, 'id': None}, {**recorded, 'id': None})
+
+    def test_soft_delete(self):
+        first = self.create_result(self.test, 40)
+        self.create_result(self.other_test, 80)
+        self.create_result(self.other_test, 20)
+        with mock.patch('main_app.user_statistics.rebuild_user_statistics') as rebuild:
+            soft_delete_tests(Test.objects.filter(pk=self.other_test.pk))
+        rebuild.assert_not_called()
+        statistics = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((statistics.attempts, statistics.score_sum, statistics.best_score), (1, 40, 40))
+        self.assertEqual(statistics.last_activity_at, first.completed_at)
+        self.assertNotIn(str(self.django.pk), statistics.categories)
+        # Вычтенная статистика совпадает с пересобранной
+        subtracted = UserStatistics.objects.values().get(user=self.user)
+        rebuild_user_statistics([self.user.pk])
+        rebuilt = UserStatistics.objects.values().get(user=self.user)
+        self.assertEqual({**rebuilt, 'id': None}, {**subtracted, 'id': None})
+        soft_delete_category(self.python)
+        self.assertFalse(UserStatistics.objects.filter(user=self.user).exists())
+
+    def test_rescore(self):
+        self.client.post(reverse('test_finish', args=[self.test.pk]), {
+            str(self.answer_1.pk): str(self.quest_1.pk), str(self.answer_2.pk): str(self.quest_2.pk)
+        })
+        TestAnswers.objects.filter(pk=self.answer_2.pk).update(is_right=False)
+        rescore_test(self.test.pk)
+        statistics = UserStatistics.objects.get(user=self.user)
+        self.assertEqual((statistics.attempts, statistics.best_score), (1, 50))
+        self.assertEqual(statistics.categories[str(self.python.pk)]['score_sum'], 50)
+
+    def test_profile(self):
+        resp = self.client.get(reverse('profile'))
+        self.assertIsNone(resp.context['statistics'])
+        self.assertContains(resp, 'Тестов пройдено: 0')
+        self.create_result(self.test, 40)
+        self.create_result(self.other_test, 81)
+        resp = self.client.get(reverse('profile'))
+        self.assertContains(resp, 'Тестов пройдено: 2')
+        self.assertContains(resp, 'Средний балл: 60,5')
+        self.assertContains(resp, 'Django: 81,0 (1)')
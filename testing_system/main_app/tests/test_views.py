@@ -0,0 +1,107 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users_app.models import User
+from ..models import Category, Test, TestQuestions, TestAnswers
+from ..utils import get_modelformset_class
+from ..forms import TestAnswersForm
+
+
+class QuestionsCreateViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category)
+
+    def setUp(self) -> None:
+        self.client.login(username='TestUser', password='somehardpassword')
+        s = self.client.session
+        s.update({'test_slug': self.test.slug, 'quest_count': '3'})
+        s.save()
+
+    def get_post_data(self, questions: list) -> dict:
+        data = {
+            'form-TOTAL_FORMS': len(questions),
+            'form-INITIAL_FORMS': 0,
+        }
+        for num, question in enumerate(questions):
+            data[f'form-{num}-question'] = question
+        return data
+
+    def test_view_url(self):
+        resp = self.client.get(reverse('quest_create'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'main_app/question_create_page.html')
+
+    def test_view_post_method(self):
+        resp = self.client.post(reverse('quest_create'), data=self.get_post_data(['Q1', 'Q2', 'Q3']))
+        self.assertRedirects(resp, reverse('answer_create'), fetch_redirect_response=False)
+        questions = list(TestQuestions.objects.filter(test=self.test).order_by('pk').values_list('pk', 'question'))
+        self.assertEqual([question for _, question in questions], ['Q1', 'Q2', 'Q3'])
+        self.assertEqual(self.client.session['quest_pk'], [pk for pk, _ in questions])
+        self.assertNotIn('test_slug', self.client.session.keys())
+
+    def test_view_post_method_empty_question(self):
+        resp = self.client.post(reverse('quest_create'), data=self.get_post_data(['Q1', '', 'Q3']))
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(TestQuestions.objects.filter(test=self.test).exists())
+
+
+class AnswersCreateViewTestCase(TestCase):
+    question_count = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser', password='somehardpassword')
+        category = Category.objects.create(title='TestCategory')
+        cls.test = Test.objects.create(title='TestTitle', author=cls.user, category=category)
+        cls.questions = TestQuestions.objects.bulk_create(
+            TestQuestions(test=cls.test, question=f'Question {num}') for num in range(cls.question_count)
+        )
+
+    def setUp(self) -> None:
+        self.client.login(username='TestUser', password='somehardpassword')
+        s = self.client.session
+        s.update({'quest_pk': [quest.pk for quest in self.questions]})
+        s.save()
+
+    def get_post_data(self, without_right: tuple = ()) -> dict:
+        data = dict()
+        for quest in self.questions:
+            data.update({f'{quest.pk}-TOTAL_FORMS': 4, f'{quest.pk}-INITIAL_FORMS': 0})
+            for num in range(4):
+                data[f'{quest.pk}-{num}-answer'] = f'Answer {num}'
+            if quest not in without_right:
+                data[f'{quest.pk}-0-is_right'] = 'on'
+        return data
+
+    def test_formset_class_cached(self):
+        self.assertIs(
+            get_modelformset_class(TestAnswers, TestAnswersForm, 4),
+            get_modelformset_class(TestAnswers, TestAnswersForm, 4)
+        )
+
+    def test_view_post_method(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse('answer_create'), data=self.get_post_data())
+        self.assertRedirects(resp, reverse('main'), fetch_redirect_response=False)
+        self.assertLess(len(ctx.captured_queries), 15)
+        self.assertEqual(TestAnswers.objects.filter(question__test=self.test).count(), self.question_count * 4)
+        self.assertEqual(
+            TestAnswers.objects.filter(question__test=self.test, is_right=True).count(), self.question_count
+        )
+        self.test.refresh_from_db()
+        self.assertTrue(self.test.is_created)
+        self.assertNotIn('quest_pk', self.client.session.keys())
+
+    def test_view_post_method_validates_every_formset(self):
+        resp = self.client.post(reverse('answer_create'), data=self.get_post_data(without_right=(self.questions[-1],)))
+        self.assertEqual(resp.status_code, 200)
+        messages = list(resp.context['messages'])
+        self.assertEqual(str(messages[0]), 'Select one or more right answers')
+        self.assertFalse(TestAnswers.objects.filter(question__test=self.test).exists())
+        self.test.refresh_from_db()
+        self.assertFalse(self.test.is_created)
@@ -1,7 +1,9 @@
 from django.contrib.auth.decorators import login_required
 from django.urls import path
 from .views import (TestCreateView, QuestionsCreateView, AnswersCreateView, TestsListView, TestDetailView,
-                    testing_finishing_view, TestingBeginningView, ContinueTestCreateRedirectView)
+                    testing_finishing_view, TestingBeginningView, ContinueTestCreateRedirectView,
+                    AutocompleteView, TestResultView, TestLeaderboardView, CategoryLeaderboardView,
+                    AdaptiveTestingView, TestDetailCacheStatsView)
 
 urlpatterns = [
     path('', TestsListView.as_view(), name='main'),
@@ -15,4 +17,12 @@ urlpatterns = [
 
     path('tests/start/<int:test_pk>/', login_required(TestingBeginningView.as_view()), name='test_start'),
     path('tests/finish/<int:test_pk>/', testing_finishing_view, name='test_finish'),
+    path('tests/adaptive/<int:test_pk>/', login_required(AdaptiveTestingView.as_view()), name='test_adaptive'),
+    path('tests/results/<int:pk>/', login_required(TestResultView.as_view()), name='test_result'),
+    path('tests/<str:slug>/leaderboard/', login_required(TestLeaderboardView.as_view()), name='test_leaderboard'),
+    path('categories/<str:slug>/leaderboard/', login_required(CategoryLeaderboardView.as_view()),
+         name='category_leaderboard'),
+
+    path('autocomplete/<str:source>/', AutocompleteView.as_view(), name='autocomplete'),
+    path('stats/test-detail-cache/', TestDetailCacheStatsView.as_view(), name='test_detail_cache_stats'),
 ]
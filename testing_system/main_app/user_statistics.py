@@ -0,0 +1,151 @@
+from django.db import connection, transaction
+
+from .models import Category, Test, TestResults, UserStatistics
+
+USER_STATISTICS_REBUILD_CHUNK_SIZE = 1000
+
+
+def record_statistics(result: TestResults, category_pk: int) -> None:
+    """
+    Учитывает попытку в статистике пользователя одним UPSERT. Вызывается в той же транзакции,
+    что и создание результата
+    """
+    table, category_table = UserStatistics._meta.db_table, Category._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, attempts, score_sum, best_score, last_activity_at, categories)
+            VALUES (%(user)s, 1, %(score)s, %(score)s, %(completed_at)s, jsonb_build_object(
+                %(category)s::text, jsonb_build_object(
+                    'title', (SELECT title FROM {category_table} WHERE id = %(category)s),
+                    'attempts', 1, 'score_sum', %(score)s
+                )
+            ))
+            ON CONFLICT (user_id) DO UPDATE SET
+                attempts = {table}.attempts + 1,
+                score_sum = {table}.score_sum + EXCLUDED.score_sum,
+                best_score = GREATEST({table}.best_score, EXCLUDED.best_score),
+                last_activity_at = GREATEST({table}.last_activity_at, EXCLUDED.last_activity_at),
+                categories = {table}.categories || jsonb_build_object(%(category)s::text, jsonb_build_object(
+                    'title', EXCLUDED.categories -> %(category)s::text -> 'title',
+                    'attempts', COALESCE(({table}.categories -> %(category)s::text ->> 'attempts')::bigint, 0) + 1,
+                    'score_sum',
+                    COALESCE(({table}.categories -> %(category)s::text ->> 'score_sum')::bigint, 0) + %(score)s
+                ))
+            """,
+            {'user': result.user_id, 'score': result.score, 'completed_at': result.completed_at,
+             'category': category_pk}
+        )
+
+
+def rebuild_user_statistics(user_pks: list) -> int:
+    """
+    Пересобирает статистику пользователей по всем их результатам неудалённых тестов.
+    Таблица статистики блокируется до конца транзакции, поэтому попытки, завершающиеся во время
+    пересборки, будут учтены ровно один раз. Возвращает кол-во пользователей, у которых есть результаты.
+    """
+    table = UserStatistics._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {table} WHERE user_id = ANY(%s)', [user_pks])
+        cursor.execute(
+            f"""
+            WITH categories AS (
+                SELECT results.user_id, tests.category_id, min(categories.title) AS title, count(*) AS attempts,
+                       sum(results.score) AS score_sum, max(results.score) AS best_score,
+                       max(results.completed_at) AS last_activity_at
+                FROM {TestResults._meta.db_table} results
+                JOIN {Test._meta.db_table} tests ON tests.id = results.test_id
+                JOIN {Category._meta.db_table} categories ON categories.id = tests.category_id
+                WHERE results.user_id = ANY(%s) AND NOT tests.is_deleted GROUP BY 1, 2
+            )
+            INSERT INTO {table} (user_id, attempts, score_sum, best_score, last_activity_at, categories)
+            SELECT user_id, sum(attempts), sum(score_sum), max(best_score), max(last_activity_at),
+                   jsonb_object_agg(category_id::text, jsonb_build_object(
+                       'title', title, 'attempts', attempts, 'score_sum', score_sum
+                   ))
+            FROM categories GROUP BY user_id
+            """,
+            [user_pks]
+        )
+        return cursor.rowcount
+
+
+def subtract_test_statistics(test_pks: list) -> int:
+    """
+    Вычитает результаты только что скрытых тестов test_pks из статистики их пользователей одним UPDATE,
+    блокируя только строки этих пользователей. Лучший балл и последняя попытка пересчитываются по оставшимся
+    результатам, только если их дал скрытый тест. Статистика без попыток удаляется. Вызывается в транзакции
+    скрытия после пометки тестов. Возвращает кол-во затронутых пользователей
+    """
+    table, results_table, tests_table = UserStatistics._meta.db_table, TestResults._meta.db_table, Test._meta.db_table
+    remaining = f"""
+        FROM {results_table} results JOIN {tests_table} tests ON tests.id = results.test_id
+        WHERE results.user_id = statistics.user_id AND NOT tests.is_deleted
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH removed AS (
+                SELECT results.user_id, tests.category_id, count(*) AS attempts, sum(results.score) AS score_sum,
+                       max(results.score) AS best_score, max(results.completed_at) AS last_activity_at
+                FROM {results_table} results
+                JOIN {tests_table} tests ON tests.id = results.test_id
+                WHERE results.test_id = ANY(%s) GROUP BY 1, 2
+            ), users AS (
+                SELECT user_id, sum(attempts) AS attempts, sum(score_sum) AS score_sum, max(best_score) AS best_score,
+                       max(last_activity_at) AS last_activity_at,
+                       jsonb_object_agg(category_id::text, jsonb_build_object(
+                           'attempts', attempts, 'score_sum', score_sum
+                       )) AS categories
+                FROM removed GROUP BY user_id
+            )
+            UPDATE {table} statistics SET
+                attempts = statistics.attempts - users.attempts,
+                score_sum = statistics.score_sum - users.score_sum,
+                best_score = CASE WHEN users.best_score < statistics.best_score THEN statistics.best_score ELSE (
+                    SELECT COALESCE(max(results.score), 0) {remaining}
+                ) END,
+                last_activity_at = CASE
+                    WHEN users.last_activity_at < statistics.last_activity_at THEN statistics.last_activity_at
+                    ELSE (SELECT max(results.completed_at) {remaining})
+                END,
+                categories = (
+                    SELECT COALESCE(jsonb_object_agg(key, value || jsonb_build_object(
+                        'attempts', (value ->> 'attempts')::bigint - COALESCE((
+                            users.categories -> key ->> 'attempts')::bigint, 0),
+                        'score_sum', (value ->> 'score_sum')::bigint - COALESCE((
+                            users.categories -> key ->> 'score_sum')::bigint, 0)
+                    )) FILTER (WHERE (value ->> 'attempts')::bigint > COALESCE((
+                        users.categories -> key ->> 'attempts')::bigint, 0)
+                    ), '{{}}'::jsonb)
+                    FROM jsonb_each(statistics.categories)
+                )
+            FROM users
+            WHERE statistics.user_id = users.user_id
+            RETURNING statistics.user_id, statistics.attempts
+            """,
+            [test_pks]
+        )
+        updated = cursor.fetchall()
+        empty = [user_pk for user_pk, attempts in updated if not attempts]
+        if empty:
+            cursor.execute(f'DELETE FROM {table} WHERE user_id = ANY(%s)', [empty])
+    return len(updated)
+
+
+def refresh_test_users(test_pks: list, chunk_size: int = USER_STATISTICS_REBUILD_CHUNK_SIZE) -> None:
+    """
+    Пересобирает статистику всех пользователей, проходивших тесты test_pks, пачками по chunk_size
+    """
+    last_pk = 0
+    while True:
+        user_pks = list(
+            TestResults.objects.filter(test_id__in=test_pks, user_id__gt=last_pk).order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct()[:chunk_size]
+        )
+        if not user_pks:
+            return
+        last_pk = user_pks[-1]
+        rebuild_user_statistics(user_pks)
@@ -1,7 +1,17 @@
+from functools import lru_cache
+
 from django.forms import modelformset_factory
 from .models import TestQuestions
 
 
+@lru_cache(maxsize=128)
+def get_modelformset_class(model, form, extra: int):
+    """
+    Возвращает закешированный класс формсета для модели, формы и кол-ва форм
+    """
+    return modelformset_factory(model, form=form, extra=extra)
+
+
 class CustomModalFormSetMixin:
     """
     Миксин для упрощения создания как одиночных так и наборов формсетов
@@ -10,6 +20,7 @@ class CustomModalFormSetMixin:
     multiple_formsets: bool = False
     prefix: str = 'form'
     multiple_formset_setting_kwarg: str = None
+    multiple_formset_form_count: int = 4
 
     def get_form_count(self):
         if self.form_count <= 0:
@@ -26,11 +37,14 @@ class CustomModalFormSetMixin:
 
     def get_formset(self):
         if not self.multiple_formsets:
-            return modelformset_factory(self.model, form=self.form_class, extra=self.get_form_count())
+            return get_modelformset_class(self.model, self.form_class, self.get_form_count())
         formsets = dict()
         formset_settings = self.get_multiple_formset_settings()
-        queryset_dict = {obj.pk: obj for obj in TestQuestions.objects.filter(pk__in=formset_settings)}
+        formset_class = get_modelformset_class(self.model, self.form_class, self.multiple_formset_form_count)
+        queryset_dict = {
+            obj.pk: obj for obj in TestQuestions.objects.filter(pk__in=formset_settings).select_related('test')
+        }
         for prefix in formset_settings:
             instance = queryset_dict.get(int(prefix))
-            formsets[instance] = modelformset_factory(self.model, form=self.form_class, extra=4)
+            formsets[instance] = formset_class
         return formsets
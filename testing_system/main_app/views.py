@@ -1,17 +1,35 @@
+from datetime import datetime, timezone
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import AccessMixin
-from django.db.models import F, Q
-from django.http import HttpResponseRedirect
-from django.shortcuts import render, redirect
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import HttpResponseRedirect, JsonResponse, Http404
+from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy, reverse
+from django.views import View
 from django.views.generic import CreateView, FormView, ListView, DetailView, TemplateView, RedirectView
 from django_filters.views import FilterView
 
-from .models import Test, TestQuestions, TestAnswers, TestResults
+from .models import (Category, Test, TestQuestions, TestAnswers, TestResults, TestBestAttempt, CategoryBestAttempt,
+                     TestSnapshot, CATALOG_FILTER)
 from .forms import TestForm, TestQuestionsForm, TestAnswersForm
 from .utils import CustomModalFormSetMixin
+from .counters import increment_passed_times
+from .cards import update_test_cards, get_catalog_version
 from .filters import TestsFilter
+from .pagination import KeysetPaginationMixin
+from .facets import get_facets, get_facets_version
+from .autocomplete import AUTOCOMPLETE_SOURCES, get_options
+from .bitsets import encode_bitset, decode_bitset
+from .histograms import add_score, get_histogram, get_percentile
+from .leaderboards import record_attempt, get_board_queryset, get_rank, LEADERBOARD_ORDERING
+from .adaptive import get_item_bank, is_finished, ADAPTIVE_SESSION_KEY
+from .snapshots import Snapshot, get_snapshot, SNAPSHOT_FRAGMENT_TIMEOUT
+from .detail_cache import get_test_detail, get_detail_cache_stats
+from .user_statistics import record_statistics
+from .conditional import ConditionalGetMixin, get_test_stamp
 
 
 class TestCreateView(AccessMixin, CreateView):
@@ -41,6 +59,11 @@ class TestCreateView(AccessMixin, CreateView):
 
 
 class QuestionsCreateView(AccessMixin, FormView, CustomModalFormSetMixin):
+    """
+    Шаг вопросов мастера создания теста. Вопросы сохраняются сразу, отдельно от ответов: по ним создание
+    продолжается из профиля, а картинки вопросов не хранятся в сессии. Тест становится видимым только после
+    шага ответов, а вопросы брошенных тестов удаляет purge_abandoned_questions
+    """
     model = TestQuestions
     template_name = 'main_app/question_create_page.html'
     form_class = TestQuestionsForm
@@ -79,20 +102,19 @@ class QuestionsCreateView(AccessMixin, FormView, CustomModalFormSetMixin):
 
     def form_valid(self, form):
         instances = form.save(commit=False)
-        test_slug = self.request.session['test_slug']
-        test_obj = Test.objects.get(slug=test_slug)
-        del self.request.session['test_slug']
-        del self.request.session['quest_count']
-        quest_pk = list()
+        test_obj = Test.objects.get(slug=self.request.session['test_slug'])
         for instance in instances:
             instance.test = test_obj
-            instance.save()
-            quest_pk.append(instance.pk)
-        self.request.session['quest_pk'] = quest_pk
+        with transaction.atomic():
+            questions = TestQuestions.objects.bulk_create(instances)
+            update_test_cards(Test.objects.filter(pk=test_obj.pk), 'question_count')
+        del self.request.session['test_slug']
+        del self.request.session['quest_count']
+        self.request.session['quest_pk'] = [question.pk for question in questions]
         return HttpResponseRedirect(reverse('answer_create'))
 
     def form_invalid(self, form):
-        self.render_to_response(self.get_context_data(formset=form))
+        return self.render_to_response(self.get_context_data(formset=form))
 
 
 class AnswersCreateView(AccessMixin, FormView, CustomModalFormSetMixin):
@@ -121,29 +143,30 @@ class AnswersCreateView(AccessMixin, FormView, CustomModalFormSetMixin):
 
     def post(self, request, *args, **kwargs):
         formset_data = {quest: formset(request.POST, prefix=quest.pk) for quest, formset in self.get_formset().items()}
-        for question, formset in formset_data.items():
-            if formset.is_valid():
-                right_answers = [
-                    form.cleaned_data['is_right'] for form in formset if 'is_right' in form.cleaned_data.keys()
-                ]
-                if right_answers.count(True) == 0:
-                    messages.error(request, 'Select one or more right answers')
-                    return self.render_to_response(self.get_context_data(formset_list=formset_data))
-                return self.form_valid(formset_data)
-            else:
-                return self.form_invalid(formset_list=formset_data)
+        if not all([formset.is_valid() for formset in formset_data.values()]):
+            return self.form_invalid(formset_list=formset_data)
+        for formset in formset_data.values():
+            right_answers = [
+                form.cleaned_data['is_right'] for form in formset if 'is_right' in form.cleaned_data.keys()
+            ]
+            if right_answers.count(True) == 0:
+                messages.error(request, 'Select one or more right answers')
+                return self.render_to_response(self.get_context_data(formset_list=formset_data))
+        return self.form_valid(formset_data)
 
     def form_valid(self, formset_list):
         test_obj = None
+        answers = list()
         for question, formset in formset_list.items():
             if not test_obj:
                 test_obj = question.test
-            instances = formset.save(commit=False)
-            for instance in instances:
+            for instance in formset.save(commit=False):
                 instance.question = question
-                instance.save()
-        test_obj.is_created = True
-        test_obj.save()
+                answers.append(instance)
+        with transaction.atomic():
+            TestAnswers.objects.bulk_create(answers)
+            test_obj.is_created = True
+            test_obj.save()
         del self.request.session['quest_pk']
         return HttpResponseRedirect(reverse('main'))
 
@@ -151,69 +174,301 @@ class AnswersCreateView(AccessMixin, FormView, CustomModalFormSetMixin):
         return self.render_to_response(self.get_context_data(formset_list=formset_list))
 
 
-class TestsListView(FilterView):
+class TestsListView(ConditionalGetMixin, KeysetPaginationMixin, FilterView):
     model = Test
     template_name = 'main_app/test_list.html'
     context_object_name = 'tests'
     filterset_class = TestsFilter
 
     def get_queryset(self):
-        return Test.objects.filter(
-            Q(is_published=True) & Q(is_created=True)
-        ).select_related('author', 'category').prefetch_related('tags', 'questions')
+        return Test.objects.filter(CATALOG_FILTER).select_related('category').defer('search_vector')
+
+    def get_version_stamp(self):
+        # Версия общая для всех выборок: без запросов к базе, ценой лишних 200 после изменений вне выборки.
+        # Фасеты считаются и по тестам вне выборки, поэтому в версию входит и версия фасетов
+        version = get_catalog_version()
+        return datetime.fromtimestamp(version / 10 ** 9, tz=timezone.utc), (version, get_facets_version())
+
+    def get_context_data(self, **kwargs):
+        context = super(TestsListView, self).get_context_data(**kwargs)
+        context['facets'] = get_facets(self.filterset)
+        return context
 
 
-class TestDetailView(AccessMixin, DetailView):
+class TestDetailView(ConditionalGetMixin, AccessMixin, DetailView):
+    """
+    Страница теста. Данные теста - словарь из кеша detail_cache, из базы читаются только время изменения
+    и счётчик прохождений, они же - версия страницы
+    """
     model = Test
     template_name = 'main_app/test_page.html'
     context_object_name = 'test'
     login_url = reverse_lazy('login')
 
-    def get_queryset(self):
-        return Test.objects.select_related('author', 'category').prefetch_related('tags', 'questions')
+    def get_object(self, queryset=None):
+        test = get_test_detail(self.kwargs.get(self.slug_url_kwarg))
+        if test is None:
+            raise Http404
+        return test
+
+    def get_version_stamp(self):
+        stamp = get_test_stamp(self.kwargs.get(self.slug_url_kwarg))
+        if stamp is None:
+            raise Http404
+        updated_at, self.passed_times = stamp
+        return updated_at, stamp
+
+    def get_context_data(self, **kwargs):
+        context = super(TestDetailView, self).get_context_data(**kwargs)
+        context['passed_times'] = self.passed_times
+        return context
+
+
+class TestDetailCacheStatsView(View):
+    """
+    Счётчики попаданий и промахов кеша страниц тестов для сбора метрик
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+        return JsonResponse(get_detail_cache_stats())
+
+
+def get_snapshot_or_404(test_pk: int, version=None) -> Snapshot:
+    """
+    Снимок теста для прохождения. Номер текущей версии удалённого теста убирается из кеша при удалении,
+    а явно указанная версия неизменяема и читается из кеша процесса, поэтому для неё проверяется, что тест не удалён
+    """
+    if version is not None:
+        if not str(version).isdigit() or not Test.objects.filter(pk=test_pk).exists():
+            raise Http404
+        version = int(version)
+    try:
+        return get_snapshot(test_pk, version)
+    except (Test.DoesNotExist, TestSnapshot.DoesNotExist):
+        raise Http404
 
 
 class TestingBeginningView(AccessMixin, TemplateView):
     template_name = 'main_app/start_test_page.html'
     login_url = reverse_lazy('login')
 
+    def get(self, request, *args, **kwargs):
+        self.snapshot = get_snapshot_or_404(kwargs.get('test_pk'))
+        if self.snapshot.is_adaptive:
+            return redirect('test_adaptive', test_pk=self.snapshot.test_pk)
+        return super(TestingBeginningView, self).get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super(TestingBeginningView, self).get_context_data(**kwargs)
-        test = Test.objects.filter(pk=kwargs.get('test_pk')).values('pk', 'title').first()
-        questions = TestQuestions.objects.filter(test__pk=kwargs.get('test_pk')).prefetch_related('answers')
-        context.update({'test_pk': test.get('pk'), 'test_title': test.get('title'), 'questions': questions})
+        snapshot = self.snapshot
+        context.update({
+            'test_pk': snapshot.test_pk, 'test_title': snapshot.title, 'test_version': snapshot.version,
+            'questions': snapshot.questions, 'fragment_timeout': SNAPSHOT_FRAGMENT_TIMEOUT
+        })
         return context
 
 
+def save_attempt(request, snapshot: Snapshot, score: int, rights_answers: list, user_answers: list,
+                 asked: list = None) -> dict:
+    """
+    Сохраняет попытку вместе с распределением баллов, таблицами лидеров и статистикой пользователя
+    и возвращает контекст страницы результатов. asked - вопросы, заданные в адаптивной попытке
+    """
+    answer_key = snapshot.answer_key
+    with transaction.atomic():
+        results = TestResults.objects.create(
+            test_id=snapshot.test_pk, user=request.user, score=score, test_version=snapshot.version,
+            right_questions=encode_bitset(answer_key.question_pks, rights_answers),
+            answer_sheet=encode_bitset(answer_key.answer_pks, user_answers),
+            asked_questions=encode_bitset(answer_key.question_pks, asked) if asked is not None else None
+        )
+        add_score(snapshot.test_pk, score)
+        record_attempt(results, snapshot.category_pk)
+        record_statistics(results, snapshot.category_pk)
+
+    increment_passed_times(snapshot.test_pk)
+    return {
+        'rights_answers': rights_answers, 'results': results, 'user_answers': user_answers,
+        'percentile': get_percentile(get_histogram(snapshot.test_pk), score)
+    }
+
+
 @login_required
 def testing_finishing_view(request, test_pk):
-    test = Test.objects.get(pk=test_pk)
-    questions = TestQuestions.objects.filter(test__pk=test_pk).prefetch_related('answers')
-    context = {'test_title': test.title, 'questions': questions}
+    snapshot = get_snapshot_or_404(test_pk, request.POST.get('version'))
+    context = {'test_title': snapshot.title, 'questions': snapshot.questions}
     if request.method == 'POST':
         questions_resp = {
-            int(quest_pk): [] for answer_pk, quest_pk in request.POST.items() if answer_pk != 'csrfmiddlewaretoken'
+            int(quest_pk): [] for answer_pk, quest_pk in request.POST.items() if answer_pk.isdigit()
         }
         user_answers = list()
         for answer_pk, quest_pk in request.POST.items():
-            if answer_pk != 'csrfmiddlewaretoken':
+            if answer_pk.isdigit():
                 questions_resp[int(quest_pk)].append(int(answer_pk))
                 user_answers.append(int(answer_pk))
 
-        rights_answers = []
-        for quest in questions:
-            if questions_resp.get(quest.pk) == list(quest.answers.filter(is_right=True).values_list('id', flat=True)):
-                rights_answers.append(quest)
+        answer_key = snapshot.answer_key
+        rights_answers = answer_key.grade(questions_resp)
+        score = answer_key.score(rights_answers)
+        context.update(save_attempt(request, snapshot, score, rights_answers, user_answers))
+    return render(request, 'main_app/finish_test_page.html', context)
 
-        score = (len(rights_answers) / questions.count()) * 100
-        results = TestResults.objects.create(test=test, user=request.user, score=score)
-        results.right_answers.add(*rights_answers)
-        results.save()
 
-        test.passed_times = F('passed_times') + 1
-        test.save()
-        context.update({'rights_answers': rights_answers, 'results': results, 'user_answers': user_answers})
-    return render(request, 'main_app/finish_test_page.html', context)
+class AdaptiveTestingView(AccessMixin, TemplateView):
+    """
+    Адаптивное прохождение теста: вопросы выдаются по одному, следующий - самый информативный при текущей
+    оценке способности. Ход попытки хранится в сессии, попытка завершается, когда оценка достаточно точна
+    или задано максимальное кол-во вопросов, и сохраняется как обычная с ожидаемым баллом по всему тесту.
+    Вопросы выдаются и проверяются по версии теста, с которой попытка началась
+    """
+    template_name = 'main_app/adaptive_test_page.html'
+    login_url = reverse_lazy('login')
+
+    def dispatch(self, request, *args, **kwargs):
+        snapshot = get_snapshot_or_404(kwargs.get('test_pk'))
+        if not snapshot.is_adaptive:
+            raise Http404
+        self.session_key = ADAPTIVE_SESSION_KEY.format(test_pk=snapshot.test_pk)
+        state = request.session.get(self.session_key)
+        if state is None:
+            state = {'version': snapshot.version, 'asked': [], 'correct': [], 'answers': [], 'current': None}
+        self.state = state
+        self.snapshot = get_snapshot_or_404(snapshot.test_pk, state['version'])
+        return super(AdaptiveTestingView, self).dispatch(request, *args, **kwargs)
+
+    def save_state(self) -> None:
+        self.request.session[self.session_key] = self.state
+
+    def get_context_data(self, **kwargs):
+        context = super(AdaptiveTestingView, self).get_context_data(**kwargs)
+        state, snapshot = self.state, self.snapshot
+        if state['current'] is None:
+            bank = get_item_bank(snapshot)
+            ability, _ = bank.estimate(state['asked'], state['correct'])
+            quest_pk = bank.next_question(ability, set(state['asked']))
+            if quest_pk is None:
+                raise Http404
+            state['current'] = quest_pk
+            self.save_state()
+        context.update({
+            'test_pk': snapshot.test_pk, 'test_title': snapshot.title, 'question_number': len(state['asked']) + 1,
+            'quest': snapshot.question_map[state['current']],
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        state, snapshot = self.state, self.snapshot
+        quest_pk = state['current']
+        if quest_pk is None:
+            return redirect('test_adaptive', test_pk=snapshot.test_pk)
+        selected = [int(answer_pk) for answer_pk in request.POST if answer_pk.isdigit()]
+        state['asked'].append(quest_pk)
+        state['correct'].append(snapshot.answer_key.answers.get(quest_pk) == frozenset(selected))
+        state['answers'].extend(selected)
+        state['current'] = None
+
+        bank = get_item_bank(snapshot)
+        ability, standard_error = bank.estimate(state['asked'], state['correct'])
+        if not is_finished(bank, state['asked'], standard_error):
+            self.save_state()
+            return redirect('test_adaptive', test_pk=snapshot.test_pk)
+
+        del request.session[self.session_key]
+        rights_answers = [quest_pk for quest_pk, correct in zip(state['asked'], state['correct']) if correct]
+        context = {'test_title': snapshot.title, 'questions': snapshot.get_questions(state['asked'])}
+        context.update(save_attempt(
+            request, snapshot, bank.expected_score(ability), rights_answers, state['answers'], state['asked']
+        ))
+        return render(request, 'main_app/finish_test_page.html', context)
+
+
+class TestResultView(AccessMixin, DetailView):
+    """
+    Страница результатов попытки, восстановленная из сохранённого листа ответов без повторной отправки
+    """
+    template_name = 'main_app/finish_test_page.html'
+    context_object_name = 'results'
+    login_url = reverse_lazy('login')
+
+    def get_queryset(self):
+        return self.request.user.results.filter(test__is_deleted=False)
+
+    def get_context_data(self, **kwargs):
+        context = super(TestResultView, self).get_context_data(**kwargs)
+        result = self.object
+        # Попытки до появления снимков показываются по текущей версии теста
+        snapshot = get_snapshot_or_404(result.test_id, result.test_version)
+        answer_key = snapshot.answer_key
+        questions = snapshot.questions
+        if result.asked_questions is not None:
+            questions = snapshot.get_questions(decode_bitset(answer_key.question_pks, result.asked_questions))
+        context.update({
+            'test_title': snapshot.title,
+            'questions': questions,
+            'rights_answers': decode_bitset(answer_key.question_pks, result.right_questions),
+            'user_answers': decode_bitset(answer_key.answer_pks, result.answer_sheet),
+            'percentile': get_percentile(get_histogram(result.test_id), result.score),
+        })
+        return context
+
+
+class LeaderboardMixin(AccessMixin, KeysetPaginationMixin):
+    """
+    Таблица лидеров по лучшим попыткам пользователей: страницы читаются по индексу рейтинга,
+    место первой записи страницы и место текущего пользователя считаются по тому же индексу
+    """
+    template_name = 'main_app/leaderboard.html'
+    context_object_name = 'entries'
+    login_url = reverse_lazy('login')
+    keyset_ordering = [*LEADERBOARD_ORDERING, 'pk']
+    paginate_by = 50
+    model = None
+    board_field: str = None
+    # Модель таблицы (тест или категория) и, если нужна, выборка, в которой она ищется по slug
+    board_model = None
+    board_queryset = None
+
+    def get_board_queryset(self):
+        if self.board_queryset is not None:
+            return self.board_queryset.all()
+        return self.board_model._default_manager.all()
+
+    def get_board(self):
+        return get_object_or_404(self.get_board_queryset(), slug=self.kwargs.get('slug'))
+
+    def get_queryset(self):
+        self.board = self.get_board()
+        return get_board_queryset(self.model, **{self.board_field: self.board}).select_related('user')
+
+    def get_context_data(self, **kwargs):
+        context = super(LeaderboardMixin, self).get_context_data(**kwargs)
+        entries = context['entries']
+        if entries:
+            first_rank = get_rank(entries[0])
+            for num, entry in enumerate(entries):
+                entry.rank = first_rank + num
+        user_entry = self.model.objects.filter(**{self.board_field: self.board}, user=self.request.user).first()
+        context.update({
+            'board': self.board,
+            'user_entry': user_entry,
+            'user_rank': get_rank(user_entry) if user_entry else None,
+        })
+        return context
+
+
+class TestLeaderboardView(LeaderboardMixin, ListView):
+    model = TestBestAttempt
+    board_field = 'test'
+    board_model = Test
+    board_queryset = Test.objects.filter(CATALOG_FILTER)
+
+
+class CategoryLeaderboardView(LeaderboardMixin, ListView):
+    model = CategoryBestAttempt
+    board_field = 'category'
+    board_model = Category
 
 
 class ContinueTestCreateRedirectView(AccessMixin, RedirectView):
@@ -231,3 +486,15 @@ class ContinueTestCreateRedirectView(AccessMixin, RedirectView):
             return super(ContinueTestCreateRedirectView, self).get(request, *args, **kwargs)
         request.session.update({'quest_pk': request.GET.getlist('quest_pk')})
         return super(ContinueTestCreateRedirectView, self).get(request, *args, **kwargs)
+
+
+class AutocompleteView(View):
+    """
+    Варианты для селекторов фильтра каталога: {"results": [{"id": ..., "text": ...}]}
+    """
+
+    def get(self, request, *args, **kwargs):
+        source = kwargs.get('source')
+        if source not in AUTOCOMPLETE_SOURCES:
+            raise Http404
+        return JsonResponse({'results': get_options(source, request.GET.get('term', ''))})
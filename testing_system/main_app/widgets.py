@@ -0,0 +1,41 @@
+from django import forms
+
+
+class AutocompleteMixin:
+    """
+    Виджет выбора, который выводит только выбранные значения, а остальные варианты
+    подгружает из JSON-эндпоинта по мере ввода. Так форма не выбирает из БД весь справочник.
+    """
+
+    def __init__(self, url, attrs=None):
+        self.url = url
+        super(AutocompleteMixin, self).__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        attrs = dict(attrs or {}, **{'data-autocomplete-url': str(self.url)})
+        return super(AutocompleteMixin, self).get_context(name, value, attrs)
+
+    def get_selected_choices(self, value) -> list:
+        selected = [str(val) for val in value if val and str(val).isdigit()]
+        if not selected or not hasattr(self.choices, 'queryset'):
+            return []
+        return [self.choices.choice(obj) for obj in self.choices.queryset.filter(pk__in=selected)]
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        self.choices = self.get_selected_choices(value)
+        if not self.allow_multiple_selected:
+            empty_label = getattr(getattr(choices, 'field', None), 'empty_label', None)
+            self.choices.insert(0, ('', empty_label or ''))
+        try:
+            return super(AutocompleteMixin, self).optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
@@ -1,3 +1,23 @@
 from django.contrib import admin
+from .models import OutboxEmail, ModerationLease, ModerationLog
 
-# Register your models here.
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_display_links = ['id', 'subject']
+    list_filter = ['status']
+    search_fields = ['subject']
+
+
+@admin.register(ModerationLease)
+class ModerationLeaseAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test', 'moderator', 'claimed_at', 'expires_at']
+    list_display_links = ['id', 'test']
+
+
+@admin.register(ModerationLog)
+class ModerationLogAdmin(admin.ModelAdmin):
+    list_display = ['id', 'test_pk', 'moderator', 'decision', 'queued_at', 'claimed_at', 'decided_at']
+    list_display_links = ['id', 'test_pk']
+    list_filter = ['decision', 'moderator']
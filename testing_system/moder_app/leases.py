@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Exists, F, Max, OuterRef, Q
+from django.utils.timezone import now
+
+from main_app.models import Test
+
+from .models import ModerationLease, ModerationLog
+
+MODERATION_LEASE_SECONDS = getattr(settings, 'MODERATION_LEASE_SECONDS', 60 * 15)
+MODERATION_CLAIM_SIZE = getattr(settings, 'MODERATION_CLAIM_SIZE', 10)
+MODERATION_METRICS_PERIOD = timedelta(days=1)
+
+
+def get_pending_tests():
+    return Test.objects.filter(is_published=False, is_created=True)
+
+
+def get_active_leases():
+    return ModerationLease.objects.filter(expires_at__gt=now())
+
+
+def exclude_leased_by_others(queryset, moderator):
+    """
+    Исключает тесты, которые сейчас в работе у других модераторов
+    """
+    return queryset.exclude(
+        Exists(get_active_leases().filter(test=OuterRef('pk')).exclude(moderator=moderator))
+    )
+
+
+def get_claimed_tests(moderator):
+    return get_pending_tests().filter(
+        moderation_lease__moderator=moderator, moderation_lease__expires_at__gt=now()
+    ).order_by('created_at', 'pk')
+
+
+def claim_tests(moderator, count: int = MODERATION_CLAIM_SIZE) -> list:
+    """
+    Берёт в работу следующие свободные тесты очереди, пока у модератора их не станет count.
+    Строки тестов блокируются с SKIP LOCKED, поэтому параллельные модераторы получают разные тесты
+    и не ждут друг друга. Аренда истекает через MODERATION_LEASE_SECONDS, после чего тест снова свободен.
+    """
+    with transaction.atomic():
+        claimed_at = now()
+        expires_at = claimed_at + timedelta(seconds=MODERATION_LEASE_SECONDS)
+        held = list(get_claimed_tests(moderator).values_list('pk', flat=True))
+        pks = list(
+            get_pending_tests()
+            .exclude(Exists(get_active_leases().filter(test=OuterRef('pk'))))
+            .order_by('created_at', 'pk')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:max(count - len(held), 0)]
+        )
+        pks = insert_leases(pks, moderator, claimed_at, expires_at)
+        if held:
+            # Истёкшую аренду мог перехватить другой модератор, её не продлеваем
+            ModerationLease.objects.filter(test_id__in=held, moderator=moderator).update(expires_at=expires_at)
+    return held + pks
+
+
+def insert_leases(pks: list, moderator, claimed_at, expires_at) -> list:
+    """
+    Истёкшая аренда перезаписывается на месте, активная не трогается: её мог успеть закоммитить
+    другой модератор после того, как наш запрос выбрал тесты. Возвращает pk реально взятых тестов.
+    """
+    if not pks:
+        return []
+    table = ModerationLease._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (test_id, moderator_id, claimed_at, expires_at)
+            SELECT test_id, %s, %s, %s FROM unnest(%s::bigint[]) AS test_id
+            ON CONFLICT (test_id) DO UPDATE
+            SET moderator_id = EXCLUDED.moderator_id, claimed_at = EXCLUDED.claimed_at,
+                expires_at = EXCLUDED.expires_at
+            WHERE {table}.expires_at <= EXCLUDED.claimed_at
+            RETURNING test_id
+            """,
+            [moderator.pk, claimed_at, expires_at, pks]
+        )
+        claimed = {row[0] for row in cursor.fetchall()}
+    return [pk for pk in pks if pk in claimed]
+
+
+def release_tests(moderator) -> int:
+    return ModerationLease.objects.filter(moderator=moderator).delete()[0]
+
+
+def log_decisions(tests: list, moderator, decision: str) -> None:
+    """
+    Записывает решения модератора в журнал и снимает аренду с обработанных тестов.
+    tests - строки с pk и created_at тестов
+    """
+    decided_at = now()
+    pks = [test['pk'] for test in tests]
+    claimed = dict(ModerationLease.objects.filter(test_id__in=pks).values_list('test_id', 'claimed_at'))
+    ModerationLog.objects.bulk_create(
+        ModerationLog(
+            test_pk=test['pk'], moderator=moderator, decision=decision, queued_at=test['created_at'],
+            claimed_at=claimed.get(test['pk'], decided_at), decided_at=decided_at
+        ) for test in tests
+    )
+    ModerationLease.objects.filter(test_id__in=pks).delete()
+
+
+def get_moderation_metrics(period: timedelta = MODERATION_METRICS_PERIOD) -> dict:
+    """
+    Пропускная способность и ожидание в очереди за последний период:
+    решений в час, активных модераторов, среднее и максимальное ожидание до взятия в работу
+    и среднее время проверки одного теста
+    """
+    since = now() - period
+    metrics = ModerationLog.objects.filter(decided_at__gte=since).aggregate(
+        decisions=Count('pk'),
+        moderators=Count('moderator', distinct=True),
+        avg_wait=Avg(F('claimed_at') - F('queued_at')),
+        max_wait=Max(F('claimed_at') - F('queued_at')),
+        avg_review=Avg(F('decided_at') - F('claimed_at')),
+    )
+    metrics['throughput'] = metrics['decisions'] / (period.total_seconds() / 3600)
+    metrics['per_moderator'] = metrics['throughput'] / metrics['moderators'] if metrics['moderators'] else 0
+    metrics.update(get_pending_tests().aggregate(
+        pending=Count('pk'),
+        claimed=Count('pk', filter=Q(moderation_lease__expires_at__gt=now())),
+    ))
+    return metrics
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from moder_app.outbox import send_outbox, OUTBOX_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxEmail пачками через одно SMTP-соединение'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=0, help='Проверять очередь каждые N секунд')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = send_outbox(options['batch_size'])
+            if stats['sent'] or stats['failed']:
+                self.stdout.write(f'Sent {stats["sent"]} emails, {stats["failed"]} failed')
+            # Полная пачка - в очереди могут остаться письма, разбираем без паузы
+            if stats['sent'] + stats['failed'] >= options['batch_size']:
+                continue
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
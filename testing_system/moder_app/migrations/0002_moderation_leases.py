@@ -0,0 +1,53 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main_app', '0007_catalog_facet_index'),
+        ('moder_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_pk', models.PositiveBigIntegerField(verbose_name='ID теста')),
+                ('decision', models.CharField(choices=[('accepted', 'Опубликован'), ('rejected', 'Отклонён')], max_length=16, verbose_name='Решение')),
+                ('queued_at', models.DateTimeField(verbose_name='Поступил на модерацию')),
+                ('claimed_at', models.DateTimeField(verbose_name='Взят в работу')),
+                ('decided_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Решение принято')),
+                ('moderator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='moderation_logs', to=settings.AUTH_USER_MODEL, verbose_name='Модератор')),
+            ],
+            options={
+                'verbose_name': 'Решение модератора',
+                'verbose_name_plural': 'Журнал модерации',
+                'ordering': ['-decided_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ModerationLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Взят в работу')),
+                ('expires_at', models.DateTimeField(verbose_name='Истекает')),
+                ('moderator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_leases', to=settings.AUTH_USER_MODEL, verbose_name='Модератор')),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_lease', to='main_app.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'Тест в работе у модератора',
+                'verbose_name_plural': 'Тесты в работе у модераторов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='moderationlease',
+            index=models.Index(fields=['moderator', 'expires_at'], name='lease_moderator_expires_idx'),
+        ),
+    ]
@@ -1,3 +1,154 @@
+from django.conf import settings
 from django.db import models
+from django.utils.timezone import now
 
-# Create your models here.
+
+class OutboxEmail(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_TYPES = [
+        (STATUS_PENDING, 'Ожидает отправки'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Не удалось отправить'),
+    ]
+
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255
+    )
+    template_name = models.CharField(
+        verbose_name='Шаблон письма',
+        max_length=255
+    )
+    context = models.JSONField(
+        verbose_name='Контекст шаблона',
+        default=dict
+    )
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=255
+    )
+    recipients = models.JSONField(
+        verbose_name='Получатели',
+        default=list
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUS_TYPES,
+        max_length=16,
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=now
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Добавлено',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            # Выборка воркером писем, которые пора отправить
+            models.Index(
+                fields=['next_attempt_at', 'id'], name='outbox_pending_idx',
+                condition=models.Q(status='pending')
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)}'
+
+
+class ModerationLease(models.Model):
+    test = models.OneToOneField(
+        verbose_name='Тест',
+        to='main_app.Test',
+        on_delete=models.CASCADE,
+        related_name='moderation_lease'
+    )
+    moderator = models.ForeignKey(
+        verbose_name='Модератор',
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='moderation_leases'
+    )
+    claimed_at = models.DateTimeField(
+        verbose_name='Взят в работу',
+        default=now
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Истекает'
+    )
+
+    class Meta:
+        verbose_name = 'Тест в работе у модератора'
+        verbose_name_plural = 'Тесты в работе у модераторов'
+        indexes = [
+            models.Index(fields=['moderator', 'expires_at'], name='lease_moderator_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.test_id} -> {self.moderator_id}'
+
+
+class ModerationLog(models.Model):
+    DECISION_ACCEPTED = 'accepted'
+    DECISION_REJECTED = 'rejected'
+    DECISION_TYPES = [
+        (DECISION_ACCEPTED, 'Опубликован'),
+        (DECISION_REJECTED, 'Отклонён'),
+    ]
+
+    test_pk = models.PositiveBigIntegerField(
+        verbose_name='ID теста'
+    )
+    moderator = models.ForeignKey(
+        verbose_name='Модератор',
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='moderation_logs',
+        blank=True,
+        null=True
+    )
+    decision = models.CharField(
+        verbose_name='Решение',
+        choices=DECISION_TYPES,
+        max_length=16
+    )
+    queued_at = models.DateTimeField(
+        verbose_name='Поступил на модерацию'
+    )
+    claimed_at = models.DateTimeField(
+        verbose_name='Взят в работу'
+    )
+    decided_at = models.DateTimeField(
+        verbose_name='Решение принято',
+        default=now,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Решение модератора'
+        verbose_name_plural = 'Журнал модерации'
+        ordering = ['-decided_at']
+
+    def __str__(self):
+        return f'{self.test_pk}: {self.decision}'
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from django.utils.timezone import now
+
+from .models import OutboxEmail
+
+OUTBOX_BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+# Задержка перед повтором удваивается с каждой неудачной попыткой
+OUTBOX_RETRY_DELAY = getattr(settings, 'OUTBOX_RETRY_DELAY', 60)
+OUTBOX_MAX_RETRY_DELAY = getattr(settings, 'OUTBOX_MAX_RETRY_DELAY', 60 * 60 * 6)
+EMAIL_TEMPLATES_DIR = 'moder_app/email_messages'
+
+
+def build_email(subject: str, template_name: str, context: dict, recipients: list, from_email: str) -> OutboxEmail:
+    return OutboxEmail(
+        subject=subject, template_name=template_name, context=context,
+        recipients=[recipient for recipient in recipients if recipient], from_email=from_email
+    )
+
+
+def enqueue_email(subject: str, template_name: str, context: dict, recipients: list, from_email: str) -> OutboxEmail:
+    """
+    Ставит письмо в очередь. Запись создаётся в транзакции вызывающего кода,
+    поэтому письмо уйдёт только если действие модератора будет закоммичено.
+    """
+    email = build_email(subject, template_name, context, recipients, from_email)
+    email.save()
+    return email
+
+
+def enqueue_emails(emails: list) -> list:
+    """
+    Ставит в очередь сразу несколько писем одним INSERT
+    """
+    return OutboxEmail.objects.bulk_create(emails)
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_name: str):
+    return get_template(f'{EMAIL_TEMPLATES_DIR}/{template_name}')
+
+
+def render_email(email: OutboxEmail, connection=None) -> EmailMultiAlternatives:
+    html_message = get_email_template(email.template_name).render(email.context)
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=strip_tags(html_message),
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY))
+
+
+def mark_failed(email: OutboxEmail, error: Exception) -> None:
+    email.last_error = repr(error)
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.STATUS_FAILED
+    else:
+        email.next_attempt_at = now() + get_retry_delay(email.attempts)
+
+
+def send_outbox(batch_size: int = OUTBOX_BATCH_SIZE, connection=None) -> dict:
+    """
+    Отправляет пачку писем, которым подошло время, через одно SMTP-соединение.
+    Строки блокируются с SKIP LOCKED, поэтому несколько воркеров не отправят одно письмо дважды.
+    """
+    stats = dict(sent=0, failed=0)
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not emails:
+            return stats
+        connection = connection or get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                email.attempts += 1
+                mark_failed(email, error)
+        else:
+            try:
+                for email in emails:
+                    email.attempts += 1
+                    try:
+                        connection.send_messages([render_email(email, connection)])
+                    except Exception as error:
+                        mark_failed(email, error)
+                    else:
+                        email.status, email.sent_at, email.last_error = OutboxEmail.STATUS_SENT, now(), ''
+            finally:
+                connection.close()
+        OutboxEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    stats['sent'] = sum(email.status == OutboxEmail.STATUS_SENT for email in emails)
+    stats['failed'] = len(emails) - stats['sent']
+    return stats
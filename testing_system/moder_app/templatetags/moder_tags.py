@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.template import Library
 
 register = Library()
@@ -12,3 +14,10 @@ def get_section_panel(cur_section):
 def tags_list(tags_queryset):
     tag_list = tags_queryset.values_list('title', flat=True)
     return ', '.join(tag_list)
+
+
+@register.filter(name='duration')
+def duration(value) -> str:
+    if value is None:
+        return '-'
+    return str(timedelta(seconds=int(value.total_seconds())))
@@ -0,0 +1,111 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from main_app.models import Category, Test
+from users_app.models import User
+from ..leases import claim_tests, insert_leases, get_moderation_metrics
+from ..models import ModerationLease, ModerationLog
+
+
+def create_pending_tests(author, count: int) -> list:
+    category, _ = Category.objects.get_or_create(title='TestCategory')
+    tests = [
+        Test.objects.create(title=f'Test {num}', author=author, category=category, is_created=True)
+        for num in range(count)
+    ]
+    for num, test in enumerate(tests):
+        Test.objects.filter(pk=test.pk).update(created_at=now() - timedelta(hours=count - num))
+    return [test.pk for test in tests]
+
+
+class ClaimTestsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moder_1 = User.objects.create_user(username='Moder1', password='somehardpassword', is_moder=True)
+        cls.moder_2 = User.objects.create_user(username='Moder2', password='somehardpassword', is_moder=True)
+        cls.author = User.objects.create_user(username='Author', password='somehardpassword',
+                                              email='author@example.com')
+        cls.test_pks = create_pending_tests(cls.author, 5)
+
+    def test_moderators_claim_different_tests(self):
+        self.assertEqual(claim_tests(self.moder_1, 2), self.test_pks[:2])
+        self.assertEqual(claim_tests(self.moder_2, 2), self.test_pks[2:4])
+        # Повторный захват продлевает аренду и добирает тесты до нужного кол-ва
+        self.assertEqual(claim_tests(self.moder_1, 3), self.test_pks[:2] + self.test_pks[4:])
+
+    def test_expired_lease_reclaimed(self):
+        claim_tests(self.moder_1, 2)
+        ModerationLease.objects.update(expires_at=now() - timedelta(seconds=1))
+        self.assertEqual(claim_tests(self.moder_2, 2), self.test_pks[:2])
+        self.assertEqual(
+            set(ModerationLease.objects.values_list('moderator_id', flat=True)), {self.moder_2.pk}
+        )
+
+    def test_active_lease_not_overwritten(self):
+        claim_tests(self.moder_1, 1)
+        self.assertEqual(insert_leases(self.test_pks[:2], self.moder_2, now(), now() + timedelta(minutes=1)),
+                         [self.test_pks[1]])
+        self.assertEqual(ModerationLease.objects.get(test_id=self.test_pks[0]).moderator, self.moder_1)
+
+    def test_queue_mode(self):
+        claim_tests(self.moder_2, 1)
+        self.client.login(username='Moder1', password='somehardpassword')
+        resp = self.client.post(reverse('tests_claim'))
+        self.assertRedirects(resp, f'{reverse("moder_tests")}?mode=queue', fetch_redirect_response=False)
+        resp = self.client.get(reverse('moder_tests'), {'mode': 'queue'})
+        self.assertEqual([test.pk for test in resp.context['tests']], self.test_pks[1:])
+        self.client.post(reverse('tests_claim'), {'release': ''})
+        self.assertFalse(ModerationLease.objects.filter(moderator=self.moder_1).exists())
+
+    def test_leased_by_other_skipped_by_moderation(self):
+        claim_tests(self.moder_2, 1)
+        self.client.login(username='Moder1', password='somehardpassword')
+        self.client.post(reverse('tests_bulk_accepted'), {'test_pk': self.test_pks[:2]})
+        self.assertEqual(list(Test.objects.filter(is_published=True).values_list('pk', flat=True)), [self.test_pks[1]])
+
+    def test_metrics(self):
+        claim_tests(self.moder_1, 2)
+        self.client.login(username='Moder1', password='somehardpassword')
+        self.client.post(reverse('tests_bulk_accepted'), {'test_pk': self.test_pks[:2]})
+        self.assertFalse(ModerationLease.objects.exists())
+        self.assertEqual(ModerationLog.objects.filter(moderator=self.moder_1).count(), 2)
+        metrics = get_moderation_metrics()
+        self.assertEqual(metrics['decisions'], 2)
+        self.assertEqual(metrics['moderators'], 1)
+        self.assertEqual(metrics['pending'], 3)
+        self.assertGreaterEqual(metrics['max_wait'], timedelta(hours=4))
+        resp = self.client.get(reverse('moder_panel'))
+        self.assertContains(resp, 'Решений: 2')
+
+
+class ClaimSkipLockedTestCase(TransactionTestCase):
+    def test_locked_tests_skipped(self):
+        moder_1 = User.objects.create_user(username='Moder1', password='somehardpassword', is_moder=True)
+        moder_2 = User.objects.create_user(username='Moder2', password='somehardpassword', is_moder=True)
+        test_pks = create_pending_tests(moder_1, 4)
+        claimed, done = threading.Event(), threading.Event()
+        result = {}
+
+        def first_moderator():
+            try:
+                with transaction.atomic():
+                    result['first'] = claim_tests(moder_1, 2)
+                    claimed.set()
+                    done.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=first_moderator)
+        thread.start()
+        claimed.wait(10)
+        # Транзакция первого модератора ещё не закоммичена, но её строки пропускаются без ожидания
+        second = claim_tests(moder_2, 2)
+        done.set()
+        thread.join()
+        self.assertEqual(result['first'], test_pks[:2])
+        self.assertEqual(second, test_pks[2:])
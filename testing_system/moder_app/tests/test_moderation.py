@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main_app.models import Category, Test
+from users_app.models import User
+from ..models import OutboxEmail
+
+
+class BulkModerationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moder = User.objects.create_user(username='Moder', password='somehardpassword', is_moder=True)
+        cls.authors = [
+            User.objects.create_user(username=f'Author{num}', password='somehardpassword',
+                                     email=f'author{num}@example.com')
+            for num in range(3)
+        ]
+        cls.category = Category.objects.create(title='TestCategory')
+
+    def setUp(self) -> None:
+        self.client.login(username='Moder', password='somehardpassword')
+
+    def create_tests(self, count: int) -> list:
+        return [
+            Test.objects.create(title=f'Test {num}', author=self.authors[num % 3], category=self.category,
+                                is_created=True)
+            for num in range(count)
+        ]
+
+    def post(self, name: str, tests: list, **data):
+        return self.client.post(reverse(name), data={'test_pk': [test.pk for test in tests], **data})
+
+    def test_bulk_accept(self):
+        tests = self.create_tests(4)
+        resp = self.post('tests_bulk_accepted', tests[:3])
+        self.assertRedirects(resp, reverse('moder_tests'), fetch_redirect_response=False)
+        published = Test.objects.filter(is_published=True)
+        self.assertEqual(set(published.values_list('pk', flat=True)), {test.pk for test in tests[:3]})
+        self.assertFalse(published.filter(published_at__isnull=True).exists())
+        self.assertEqual(
+            sorted(email.recipients[0] for email in OutboxEmail.objects.all()),
+            ['author0@example.com', 'author1@example.com', 'author2@example.com']
+        )
+        self.assertEqual(str(list(resp.wsgi_request._messages)[0]), 'Опубликовано тестов: 3')
+
+    def test_bulk_accept_skips_published(self):
+        test = self.create_tests(1)[0]
+        Test.objects.filter(pk=test.pk).update(is_published=True)
+        self.post('tests_bulk_accepted', [test])
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_bulk_accept_constant_queries(self):
+        def count_queries(tests: list) -> int:
+            with CaptureQueriesContext(connection) as ctx:
+                self.post('tests_bulk_accepted', tests)
+            return len(ctx.captured_queries)
+        self.assertEqual(count_queries(self.create_tests(1)), count_queries(self.create_tests(10)))
+
+    def test_bulk_reject(self):
+        tests = self.create_tests(3)
+        self.post('tests_bulk_rejected', tests[:2], comment='Мало вопросов')
+        self.assertEqual(list(Test.objects.values_list('pk', flat=True)), [tests[2].pk])
+        emails = list(OutboxEmail.objects.all())
+        self.assertEqual(len(emails), 2)
+        self.assertEqual(emails[0].template_name, 'test_rejected_mail.html')
+        self.assertEqual(emails[0].context['moderator_comment'], 'Мало вопросов')
+
+    def test_moder_only(self):
+        tests = self.create_tests(1)
+        self.client.login(username='Author0', password='somehardpassword')
+        resp = self.post('tests_bulk_accepted', tests)
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(Test.objects.filter(is_published=True).exists())
+
+    def test_moder_tests_page(self):
+        tests = self.create_tests(2)
+        resp = self.client.get(reverse('moder_tests'))
+        self.assertContains(resp, f'name="test_pk" value="{tests[0].pk}"')
+        self.assertContains(resp, reverse('tests_bulk_rejected'))
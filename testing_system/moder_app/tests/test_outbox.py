@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+
+from main_app.models import Category, Test
+from users_app.models import User
+from ..models import OutboxEmail
+from ..outbox import enqueue_email, send_outbox, OUTBOX_MAX_ATTEMPTS
+
+
+class CountingEmailBackend(EmailBackend):
+    """
+    locmem-бэкенд, который считает открытые соединения и отклоняет адреса из refused
+    """
+    refused = ()
+
+    def __init__(self, *args, **kwargs):
+        super(CountingEmailBackend, self).__init__(*args, **kwargs)
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & set(self.refused):
+                raise SMTPRecipientsRefused({message.to[0]: (550, b'User unknown')})
+        return super(CountingEmailBackend, self).send_messages(messages)
+
+
+class OutboxTestCase(TestCase):
+    def enqueue(self, recipient: str) -> OutboxEmail:
+        return enqueue_email(
+            subject='Ваш тест успешно прошёл модерацию', template_name='test_accepted_mail.html',
+            context={'username': 'TestUser', 'test_name': 'TestTitle'}, recipients=[recipient],
+            from_email='TestingSystem <noreply@example.com>'
+        )
+
+    def test_send_batch_over_one_connection(self):
+        for num in range(3):
+            self.enqueue(f'user{num}@example.com')
+        connection = CountingEmailBackend()
+        self.assertEqual(send_outbox(connection=connection), {'sent': 3, 'failed': 0})
+        self.assertEqual(connection.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['user0@example.com'])
+        self.assertIn('TestTitle', message.body)
+        self.assertNotIn('<strong>', message.body)
+        self.assertIn('<strong>"TestTitle"</strong>', message.alternatives[0][0])
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+        self.assertEqual(send_outbox(connection=connection), {'sent': 0, 'failed': 0})
+
+    def test_batch_size(self):
+        for num in range(3):
+            self.enqueue(f'user{num}@example.com')
+        self.assertEqual(send_outbox(batch_size=2, connection=CountingEmailBackend()), {'sent': 2, 'failed': 0})
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING).count(), 1)
+
+    def test_retry_with_backoff(self):
+        email = self.enqueue('unknown@example.com')
+        self.enqueue('user@example.com')
+        connection = CountingEmailBackend()
+        connection.refused = ('unknown@example.com',)
+        self.assertEqual(send_outbox(connection=connection), {'sent': 1, 'failed': 1})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('SMTPRecipientsRefused', email.last_error)
+        self.assertGreater(email.next_attempt_at, now())
+        # Повтор не раньше назначенного времени
+        self.assertEqual(send_outbox(connection=connection), {'sent': 0, 'failed': 0})
+
+        delays = []
+        for _ in range(OUTBOX_MAX_ATTEMPTS - 1):
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=now() - timedelta(seconds=1))
+            started = now()
+            send_outbox(connection=connection)
+            email.refresh_from_db()
+            delays.append(email.next_attempt_at - started)
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, OUTBOX_MAX_ATTEMPTS)
+        self.assertGreater(delays[1], delays[0])
+
+    def test_command(self):
+        self.enqueue('user@example.com')
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ModerationNotificationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moder = User.objects.create_user(username='Moder', password='somehardpassword', is_moder=True)
+        cls.author = User.objects.create_user(username='Author', password='somehardpassword',
+                                              email='author@example.com')
+        cls.category = Category.objects.create(title='TestCategory')
+
+    def setUp(self) -> None:
+        self.client.login(username='Moder', password='somehardpassword')
+        self.test = Test.objects.create(title='TestTitle', author=self.author, category=self.category, is_created=True)
+
+    def test_accepted_queues_email(self):
+        resp = self.client.get(reverse('test_accepted', kwargs={'test_slug': self.test.slug}))
+        self.assertRedirects(resp, reverse('moder_tests'), fetch_redirect_response=False)
+        self.test.refresh_from_db()
+        self.assertTrue(self.test.is_published)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ['author@example.com'])
+        self.assertEqual(email.context, {'username': 'Author', 'test_name': 'TestTitle'})
+        send_outbox(connection=CountingEmailBackend())
+        self.assertEqual(mail.outbox[0].subject, 'Ваш тест успешно прошёл модерацию')
+
+    def test_rejected_queues_email(self):
+        resp = self.client.get(reverse('test_rejected', kwargs={'test_slug': self.test.slug}))
+        self.assertRedirects(resp, reverse('moder_tests'), fetch_redirect_response=False)
+        self.assertFalse(Test.objects.filter(pk=self.test.pk).exists())
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.template_name, 'test_rejected_mail.html')
+        self.assertEqual(len(mail.outbox), 0)
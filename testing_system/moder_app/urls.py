@@ -2,7 +2,8 @@ from django.contrib.auth.decorators import login_required
 from django.urls import path
 from .views import (
     ModerPanelView, ModerTestCategoriesView, test_category_delete,
-    ModerTestTagsView, test_tag_delete, ModerTestListView, ModerTestDetailView, ModerTestAcceptedRedirectView, ModerTestRejectedRedirectView
+    ModerTestTagsView, test_tag_delete, ModerTestListView, ModerTestDetailView, ModerTestAcceptedRedirectView, ModerTestRejectedRedirectView,
+    ModerTestsBulkAcceptView, ModerTestsBulkRejectView, ModerTestsClaimView
 )
 
 urlpatterns = [
@@ -15,6 +16,9 @@ urlpatterns = [
     path('tags/delete/', test_tag_delete, name='tag_delete'),
 
     path('tests/', login_required(ModerTestListView.as_view()), name='moder_tests'),
+    path('tests/claim/', login_required(ModerTestsClaimView.as_view()), name='tests_claim'),
+    path('tests/bulk/accepted/', login_required(ModerTestsBulkAcceptView.as_view()), name='tests_bulk_accepted'),
+    path('tests/bulk/rejected/', login_required(ModerTestsBulkRejectView.as_view()), name='tests_bulk_rejected'),
     path('tests/<str:slug>/', login_required(ModerTestDetailView.as_view()), name='moder_test_detail'),
     path('tests/<str:test_slug>/accepted/', login_required(ModerTestAcceptedRedirectView.as_view()), name='test_accepted'),
     path('tests/<str:test_slug>/rejected/', login_required(ModerTestRejectedRedirectView.as_view()), name='test_rejected'),
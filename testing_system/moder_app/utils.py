@@ -1,35 +1,96 @@
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.db import transaction
+from django.utils.timezone import now
+
+from main_app.cards import invalidate_catalog
+from main_app.detail_cache import invalidate_test_details
+from main_app.facets import invalidate_facets
+from main_app.models import Test
+from main_app.purge import soft_delete_tests
+
+from .leases import exclude_leased_by_others, get_pending_tests, log_decisions
+from .models import ModerationLog
+from .outbox import build_email, enqueue_emails
+
+MODERATION_FIELDS = ('pk', 'title', 'created_at', 'author__username', 'author__email')
+
+
+def publish_tests(queryset) -> None:
+    queryset.update(is_published=True, published_at=now(), updated_at=now())
+    # UPDATE не вызывает post_save, поэтому каталог, его счётчики и страницы тестов сбрасываются явно
+    invalidate_catalog()
+    invalidate_facets()
+    invalidate_test_details(queryset.values_list('slug', flat=True))
 
 
 class EmailSenderMixin:
-    queryset = None
     message_template_name: str = None
     subject: str = 'Message subject'
-    recipients: list = ['some_user_email@mail.ru', ]
     from_email: str = f'TestingSystem <{settings.EMAIL_HOST_USER}>'
-    email_context: dict = {'username': 'SomeUser', 'test_name': 'SomeTest'}
-
-    def get_recipient_list(self):
-        return self.recipients
-
-    def get_email_context(self):
-        return self.email_context
-
-    def get_queryset(self):
-        return self.queryset
-
-    def send_email(self):
-        mail_context = self.get_email_context()
-        html_message = render_to_string(f'moder_app/email_messages/{self.message_template_name}', mail_context)
-        text_message = strip_tags(html_message)
-        is_send = send_mail(
-            subject=self.subject,
-            message=text_message,
-            from_email=self.from_email,
-            recipient_list=self.get_recipient_list(),
-            html_message=html_message
-        )
-        return is_send
+
+    def get_recipient_list(self, test: dict) -> list:
+        return [test['author__email']]
+
+    def get_email_context(self, test: dict) -> dict:
+        return dict(username=test['author__username'], test_name=test['title'])
+
+    def send_emails(self, tests: list) -> list:
+        """
+        Письма не отправляются в запросе, а одним INSERT ставятся в очередь, которую разбирает команда send_outbox
+        """
+        return enqueue_emails([
+            build_email(
+                subject=self.subject,
+                template_name=self.message_template_name,
+                context=self.get_email_context(test),
+                recipients=self.get_recipient_list(test),
+                from_email=self.from_email
+            ) for test in tests
+        ])
+
+
+class TestModerationMixin(EmailSenderMixin):
+    """
+    Применяет решение модератора сразу к набору тестов: изменение, запись в журнал модерации
+    и постановка уведомлений авторов в очередь выполняются в одной транзакции.
+    Тесты, взятые в работу другими модераторами, пропускаются.
+    """
+    decision: str = None
+    # Функция, применяющая решение к выборке тестов: publish_tests или soft_delete_tests
+    moderate = None
+
+    def get_moderation_queryset(self):
+        return Test.objects.all()
+
+    def moderate_tests(self, queryset) -> int:
+        with transaction.atomic():
+            queryset = exclude_leased_by_others(queryset, self.request.user)
+            tests = list(queryset.select_for_update(of=('self',)).order_by('pk').values(*MODERATION_FIELDS))
+            if tests:
+                log_decisions(tests, self.request.user, self.decision)
+                self.moderate(Test.objects.filter(pk__in=[test['pk'] for test in tests]))
+                self.send_emails(tests)
+        return len(tests)
+
+
+class TestAcceptMixin(TestModerationMixin):
+    message_template_name = 'test_accepted_mail.html'
+    subject = 'Ваш тест успешно прошёл модерацию'
+    decision = ModerationLog.DECISION_ACCEPTED
+    moderate = staticmethod(publish_tests)
+
+    def get_moderation_queryset(self):
+        return get_pending_tests()
+
+
+class TestRejectMixin(TestModerationMixin):
+    message_template_name = 'test_rejected_mail.html'
+    subject = 'Ваш тест был отклонён модерацией'
+    decision = ModerationLog.DECISION_REJECTED
+    moderate = staticmethod(soft_delete_tests)
+
+    def get_email_context(self, test: dict) -> dict:
+        mail_context = super(TestRejectMixin, self).get_email_context(test)
+        mail_context['moderator_comment'] = self.request.POST.get('comment')
+        return mail_context
+
@@ -1,15 +1,20 @@
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import AccessMixin
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.http import Http404
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
+from django.urls import reverse_lazy, reverse
+from django.utils.timezone import now
+from django.views import View
 from django.views.generic import TemplateView, CreateView, ListView, DetailView, RedirectView
 
-from main_app.models import Category, Tag, Test
+from main_app.models import Category, Tag, Test, TestQuestions
+from main_app.purge import soft_delete_category, soft_delete_tag
 
 from .forms import CategoryForm, TagForm
-from .utils import EmailSenderMixin
+from .leases import claim_tests, release_tests, get_claimed_tests, get_moderation_metrics
+from .utils import TestAcceptMixin, TestRejectMixin
 
 
 def check_is_moder(user) -> None:
@@ -26,6 +31,11 @@ class ModerPanelView(AccessMixin, TemplateView):
         check_is_moder(request.user)
         return super(ModerPanelView, self).dispatch(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super(ModerPanelView, self).get_context_data(**kwargs)
+        context['metrics'] = get_moderation_metrics()
+        return context
+
 
 class ModerTestCategoriesView(AccessMixin, CreateView):
     model = Category
@@ -49,7 +59,7 @@ class ModerTestCategoriesView(AccessMixin, CreateView):
 def test_category_delete(request):
     check_is_moder(request.user)
     cat_slug = request.GET.get('slug_category')
-    Category.objects.get(slug=cat_slug).delete()
+    soft_delete_category(Category.objects.get(slug=cat_slug))
     return redirect('moder_categories')
 
 
@@ -75,7 +85,7 @@ class ModerTestTagsView(AccessMixin, CreateView):
 def test_tag_delete(request):
     check_is_moder(request.user)
     tag_slug = request.GET.get('slug_tag')
-    Tag.objects.get(slug=tag_slug).delete()
+    soft_delete_tag(Tag.objects.get(slug=tag_slug))
     return redirect('moder_tags')
 
 
@@ -91,8 +101,37 @@ class ModerTestListView(AccessMixin, ListView):
         return super(ModerTestListView, self).dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Test.objects.filter(Q(is_published=False) & Q(is_created=True))\
-            .select_related('category', 'author').prefetch_related('tags')
+        if self.is_queue_mode():
+            queryset = get_claimed_tests(self.request.user)
+        else:
+            queryset = Test.objects.filter(Q(is_published=False) & Q(is_created=True))
+        return queryset.select_related('category', 'author', 'moderation_lease__moderator').prefetch_related('tags')
+
+    def is_queue_mode(self) -> bool:
+        return self.request.GET.get('mode') == 'queue'
+
+    def get_context_data(self, **kwargs):
+        context = super(ModerTestListView, self).get_context_data(**kwargs)
+        context.update({'queue_mode': self.is_queue_mode(), 'now': now()})
+        return context
+
+
+class ModerTestsClaimView(AccessMixin, View):
+    """
+    Режим очереди: модератор берёт в работу следующие свободные тесты
+    """
+    login_url = reverse_lazy('login')
+
+    def dispatch(self, request, *args, **kwargs):
+        check_is_moder(request.user)
+        return super(ModerTestsClaimView, self).dispatch(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        if 'release' in request.POST:
+            release_tests(request.user)
+            return redirect('moder_tests')
+        claim_tests(request.user)
+        return redirect(f'{reverse("moder_tests")}?mode=queue')
 
 
 class ModerTestDetailView(AccessMixin, DetailView):
@@ -106,8 +145,10 @@ class ModerTestDetailView(AccessMixin, DetailView):
         return super(ModerTestDetailView, self).dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Test.objects.all().select_related('category', 'author')\
-            .prefetch_related('tags', 'questions', 'questions__answers')
+        return Test.objects.all().select_related('category', 'author', 'analytics').prefetch_related(
+            'tags', Prefetch('questions', queryset=TestQuestions.objects.select_related('analytics')),
+            'questions__answers'
+        )
 
     def get_context_data(self, **kwargs):
         context = super(ModerTestDetailView, self).get_context_data(**kwargs)
@@ -115,61 +156,57 @@ class ModerTestDetailView(AccessMixin, DetailView):
         return context
 
 
-class ModerTestAcceptedRedirectView(AccessMixin, EmailSenderMixin, RedirectView):
+class ModerTestAcceptedRedirectView(AccessMixin, TestAcceptMixin, RedirectView):
     url = reverse_lazy('moder_tests')
-    message_template_name = 'test_accepted_mail.html'
-    subject = 'Ваш тест успешно прошёл модерацию'
     login_url = reverse_lazy('login')
 
     def dispatch(self, request, *args, **kwargs):
         check_is_moder(request.user)
         return super(ModerTestAcceptedRedirectView, self).dispatch(request, *args, **kwargs)
 
-    def get_recipient_list(self):
-        recipient = self.get_queryset().values_list('author__email', flat=True).first()
-        return [recipient]
-
-    def get_queryset(self):
-        return Test.objects.filter(slug=self.kwargs['test_slug']).select_related('author')
-
-    def get_email_context(self):
-        test_obj = self.get_queryset().first()
-        mail_context = dict(username=test_obj.author.username, test_name=test_obj.title)
-        return mail_context
-
     def get(self, request, *args, **kwargs):
-        if self.send_email():
-            test_obj = self.get_queryset().first()
-            test_obj.is_published = True
-            test_obj.save()
+        self.moderate_tests(self.get_moderation_queryset().filter(slug=self.kwargs['test_slug']))
         return super(ModerTestAcceptedRedirectView, self).get(request, *args, **kwargs)
 
 
-class ModerTestRejectedRedirectView(AccessMixin, EmailSenderMixin, RedirectView):
+class ModerTestRejectedRedirectView(AccessMixin, TestRejectMixin, RedirectView):
     url = reverse_lazy('moder_tests')
-    message_template_name = 'test_rejected_mail.html'
-    subject = 'Ваш тест был отклонён модерацией'
     login_url = reverse_lazy('login')
 
     def dispatch(self, request, *args, **kwargs):
         check_is_moder(request.user)
         return super(ModerTestRejectedRedirectView, self).dispatch(request, *args, **kwargs)
 
-    def get_recipient_list(self):
-        recipient = self.get_queryset().values_list('author__email', flat=True).first()
-        return [recipient]
+    def get(self, request, *args, **kwargs):
+        self.moderate_tests(self.get_moderation_queryset().filter(slug=self.kwargs['test_slug']))
+        return super(ModerTestRejectedRedirectView, self).get(request, *args, **kwargs)
 
-    def get_queryset(self):
-        return Test.objects.filter(slug=self.kwargs['test_slug']).select_related('author')
 
-    def get_email_context(self):
-        test_obj = self.get_queryset().first()
-        comment = self.request.POST.get('comment')
-        mail_context = dict(username=test_obj.author.username, test_name=test_obj.title, moderator_comment=comment)
-        return mail_context
+class ModerTestsBulkMixin(AccessMixin):
+    """
+    Массовая модерация: pk тестов приходят списком test_pk из формы на странице модерации
+    """
+    login_url = reverse_lazy('login')
+    success_message: str = None
 
-    def get(self, request, *args, **kwargs):
-        if self.send_email():
-            test_obj = self.get_queryset().first()
-            test_obj.delete()
-        return super(ModerTestRejectedRedirectView, self).get(request, *args, **kwargs)
+    def dispatch(self, request, *args, **kwargs):
+        check_is_moder(request.user)
+        return super(ModerTestsBulkMixin, self).dispatch(request, *args, **kwargs)
+
+    def get_test_pks(self) -> list:
+        return [int(pk) for pk in self.request.POST.getlist('test_pk') if pk.isdigit()]
+
+    def post(self, request, *args, **kwargs):
+        test_pks = self.get_test_pks()
+        if test_pks:
+            count = self.moderate_tests(self.get_moderation_queryset().filter(pk__in=test_pks))
+            messages.success(request, self.success_message % count)
+        return redirect('moder_tests')
+
+
+class ModerTestsBulkAcceptView(ModerTestsBulkMixin, TestAcceptMixin, View):
+    success_message = 'Опубликовано тестов: %d'
+
+
+class ModerTestsBulkRejectView(ModerTestsBulkMixin, TestRejectMixin, View):
+    success_message = 'Отклонено тестов: %d'
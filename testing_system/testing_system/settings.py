@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'debug_toolbar',
     'django_filters',
     'users_app.apps.UsersAppConfig',
@@ -66,6 +67,10 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': '127.0.0.1',
         'PORT': '5432',
+        'OPTIONS': {
+            # Порог похожести для поиска тестов с опечатками (pg_trgm, оператор <%)
+            'options': '-c pg_trgm.word_similarity_threshold=0.4',
+        },
     }
 }
 
@@ -118,3 +123,6 @@ EMAIL_USE_SSL = True
 
 AUTH_USER_MODEL = 'users_app.User'
 LOGIN_URL = reverse_lazy('login')
+
+# Шаг создания ответов отправляет ~10 полей на каждый вопрос теста
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
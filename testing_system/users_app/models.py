@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 
 
@@ -27,3 +29,9 @@ class User(AbstractUser):
         verbose_name='Модератор',
         default=False
     )
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Поиск по префиксу без учёта регистра (istartswith) для автодополнения авторов
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'), name='user_username_prefix_idx'),
+        ]
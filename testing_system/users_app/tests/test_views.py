@@ -2,6 +2,8 @@ from django.contrib.auth.forms import SetPasswordForm
 from django.test import TestCase
 from django.urls import reverse
 
+from main_app.models import Category, Test, TestResults
+
 from ..views import RegistrationView, LogoutView, PasswordRecoveryView, RecoveryChangePasswordView
 from ..models import User
 from ..forms import RegistrationForm, LoginForm, PasswordRecoveryForm
@@ -214,3 +216,30 @@ class RecoveryChangePasswordViewTestCase(TestCase):
         resp = self.client.get(reverse('pass_change'))
         form = resp.context['form']
         self.assertEqual(user, form.user)
+
+
+class UserResultsListViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='UserResults', password='SomeHardPassword')
+        test = Test.objects.create(title='TestTitle', author=user, category=Category.objects.create(title='Category'))
+        TestResults.objects.bulk_create(TestResults(test=test, user=user, score=num) for num in range(30))
+
+    def setUp(self) -> None:
+        self.client.login(username='UserResults', password='SomeHardPassword')
+
+    def test_view_url_name(self):
+        resp = self.client.get(reverse('my_results'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'users_app/user_profile/user_results.html')
+
+    def test_view_pagination(self):
+        resp = self.client.get(reverse('my_results'))
+        self.assertTrue(resp.context['is_paginated'])
+        first_page = list(resp.context['results'])
+        self.assertEqual(len(first_page), 24)
+        resp = self.client.get(reverse('my_results'), {'cursor': resp.context['page_obj'].next_cursor})
+        second_page = list(resp.context['results'])
+        self.assertEqual(len(second_page), 6)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertFalse(resp.context['page_obj'].has_next())
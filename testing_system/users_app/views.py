@@ -12,6 +12,12 @@ from django.views.generic import CreateView, FormView, TemplateView, ListView
 from django.views.generic import RedirectView
 from django.contrib.auth.forms import SetPasswordForm
 
+from main_app.pagination import KeysetPaginationMixin
+from main_app.histograms import get_histograms, get_percentile, get_distribution
+from main_app.models import TestAnalytics, UserStatistics
+from main_app.purge import soft_delete_tests
+from main_app.conditional import ConditionalGetMixin, get_results_stamp
+
 from .models import User
 from .forms import (RegistrationForm, LoginForm, PasswordRecoveryForm, UserNamesForm, UserUsernameForm, UserEmailForm,
                     UserPasswordForm, UserSecretWordForm)
@@ -144,11 +150,12 @@ class UserProfileView(AccessMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super(UserProfileView, self).get_context_data(**kwargs)
-        context.update({'user': self.request.user})
+        user = self.request.user
+        context.update({'user': user, 'statistics': UserStatistics.objects.filter(user=user).first()})
         return context
 
 
-class UserResultsListView(AccessMixin, ListView):
+class UserResultsListView(ConditionalGetMixin, AccessMixin, KeysetPaginationMixin, ListView):
     """
         Представление для результатов тестирования пользователя
     """
@@ -158,10 +165,23 @@ class UserResultsListView(AccessMixin, ListView):
 
     def get_queryset(self):
         user = self.request.user
-        return user.results.all().prefetch_related('right_answers', 'test__questions').select_related('test')
+        return user.results.filter(test__is_deleted=False).select_related('test')
+
+    def get_version_stamp(self):
+        stamp = get_results_stamp(self.request.user)
+        last_modified = max(filter(None, (stamp['completed_at'], stamp['updated_at'])), default=None)
+        return last_modified, tuple(sorted(stamp.items()))
 
+    def get_context_data(self, **kwargs):
+        context = super(UserResultsListView, self).get_context_data(**kwargs)
+        results = context['results']
+        histograms = get_histograms({result.test_id for result in results})
+        for result in results:
+            result.percentile = get_percentile(histograms[result.test_id], result.score)
+        return context
 
-class UserTestsListView(AccessMixin, ListView):
+
+class UserTestsListView(AccessMixin, KeysetPaginationMixin, ListView):
     """
         Представление для тестов пользователя
     """
@@ -173,6 +193,15 @@ class UserTestsListView(AccessMixin, ListView):
         user = self.request.user
         return user.tests.all().prefetch_related('questions', 'questions__answers', 'tags').select_related('category')
 
+    def get_context_data(self, **kwargs):
+        context = super(UserTestsListView, self).get_context_data(**kwargs)
+        tests = context['tests']
+        histograms = get_histograms([test.pk for test in tests])
+        for test in tests:
+            test.score_distribution = get_distribution(histograms[test.pk])
+            test.results_count = sum(histograms[test.pk])
+        return context
+
 
 class UserTestDelete(AccessMixin, RedirectView):
     """
@@ -182,7 +211,7 @@ class UserTestDelete(AccessMixin, RedirectView):
     login_url = reverse_lazy('login')
 
     def get(self, request, *args, **kwargs):
-        request.user.tests.get(slug=request.GET.get('test_slug')).delete()
+        soft_delete_tests(request.user.tests.filter(slug=request.GET.get('test_slug')))
         return super(UserTestDelete, self).get(request, *args, **kwargs)
 
 
@@ -197,13 +226,14 @@ class UserTestAnswersListView(AccessMixin, ListView):
     def get_queryset(self):
         user = self.request.user
         test_slug = self.kwargs.get('test_slug')
-        return user.tests.get(slug=test_slug).questions.all().prefetch_related('answers')
+        return user.tests.get(slug=test_slug).questions.all().select_related('analytics').prefetch_related('answers')
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super(UserTestAnswersListView, self).get_context_data(**kwargs)
         user = self.request.user
         test_slug = self.kwargs.get('test_slug')
         context['test_title'] = user.tests.filter(slug=test_slug).values_list('title', flat=True).first()
+        context['test_analytics'] = TestAnalytics.objects.filter(test__author=user, test__slug=test_slug).first()
         return context
 
 